@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+On-disk format of the JSON artifacts of a processed dataset.
+
+Two formats are supported, selected with the ARTIFACT_FORMAT environment
+variable:
+- "json" (default): indented JSON with the full DQ report, as before
+- "compact": JSON without whitespace (serialized with orjson when it is
+  installed and the artifact has no NaN or infinite values) and a normalized DQ report that refers to metadata columns by
+  index. Per-column quality figures and rule descriptions are derived from
+  the metadata when the report is read, so they are not stored twice.
+
+ARTIFACT_COMPRESSION=zstd additionally compresses both artifacts
+(`*.json.zst`, requires the `zstandard` package).
+
+Readers use `load_metadata` / `load_dq_report`, which accept every
+combination, so datasets written in different formats can live side by side.
+"""
+
+import os
+import json
+import math
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+ARTIFACT_FORMATS = ("json", "compact")
+ARTIFACT_COMPRESSIONS = ("none", "zstd")
+
+ZSTD_SUFFIX = ".zst"
+ZSTD_LEVEL = 10
+
+# Marks a normalized DQ report
+NORMALIZED_REPORT_VERSION = 2
+
+
+def artifact_settings() -> Tuple[str, str]:
+    """Return the configured (format, compression), validated."""
+    artifact_format = os.getenv('ARTIFACT_FORMAT', 'json').lower()
+    compression = os.getenv('ARTIFACT_COMPRESSION', 'none').lower()
+    if artifact_format not in ARTIFACT_FORMATS:
+        raise ValueError(f"Invalid ARTIFACT_FORMAT '{artifact_format}'. Must be one of: {', '.join(ARTIFACT_FORMATS)}")
+    if compression not in ARTIFACT_COMPRESSIONS:
+        raise ValueError(f"Invalid ARTIFACT_COMPRESSION '{compression}'. Must be one of: {', '.join(ARTIFACT_COMPRESSIONS)}")
+    if compression == "zstd" and not ZSTD_AVAILABLE:
+        raise ValueError("ARTIFACT_COMPRESSION=zstd requires the zstandard package (pip install zstandard)")
+    return artifact_format, compression
+
+
+def describe_dq_rule(rule: Dict[str, Any], col: Dict[str, Any]) -> str:
+    """Human-readable description of a DQ rule on the given column."""
+    col_name = rule["column"]
+    rule_type = rule["rule_type"]
+    if rule_type == "not_null":
+        return f"Column '{col_name}' should not contain null values"
+    if rule_type == "unique":
+        return f"Column '{col_name}' should contain unique values"
+    if rule_type == "range":
+        return f"Column '{col_name}' values should be between {rule['min_value']} and {rule['max_value']}"
+    if rule_type == "expected_range":
+        return f"Column '{col_name}' values are expected between {rule['min_value']:.4g} and {rule['max_value']:.4g} (1st-99th percentile)"
+    if rule_type == "datetime_range":
+        return f"Column '{col_name}' timestamps should be between {rule['min_value']} and {rule['max_value']} at {col['datetime_granularity']} granularity"
+    if rule_type == "allowed_values":
+        return f"Column '{col_name}' should only contain: {', '.join(str(v) for v in rule['allowed_values'])}"
+    if rule_type == "pattern":
+        return f"Column '{col_name}' values should match the {rule['pattern_name']} format"
+    return f"Column '{col_name}' {rule_type} rule"
+
+
+def column_quality(col: Dict[str, Any], row_count: int) -> Dict[str, Any]:
+    """Completeness and uniqueness of a profiled column, as shown in the DQ report."""
+    return {
+        "column_name": col["name"],
+        "completeness": 100 - col["null_percentage"],
+        "uniqueness": (col["unique_count"] / row_count) * 100,
+        "data_type": col["data_type"]
+    }
+
+
+def normalize_dq_report(dq_report: Dict[str, Any], metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop everything from a DQ report that can be rebuilt from the metadata."""
+    column_index = {col["name"]: i for i, col in enumerate(metadata["columns"])}
+    rules = []
+    for rule in dq_report["suggested_rules"]:
+        compact_rule = {"column_index": column_index[rule["column"]]}
+        compact_rule.update((key, value) for key, value in rule.items() if key not in ("column", "description"))
+        rules.append(compact_rule)
+    return {
+        "report_version": NORMALIZED_REPORT_VERSION,
+        "dataset_info": dq_report["dataset_info"],
+        "data_quality_summary": dq_report["data_quality_summary"],
+        "rules": rules
+    }
+
+
+def expand_dq_report(dq_report: Dict[str, Any], metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the full DQ report; full reports are returned unchanged."""
+    if dq_report.get("report_version") != NORMALIZED_REPORT_VERSION:
+        return dq_report
+
+    columns = metadata["columns"]
+    rules = []
+    for compact_rule in dq_report["rules"]:
+        col = columns[compact_rule["column_index"]]
+        rule = {"column": col["name"]}
+        rule.update((key, value) for key, value in compact_rule.items() if key != "column_index")
+        rules.append({"column": rule["column"], "rule_type": rule["rule_type"],
+                      "description": describe_dq_rule(rule, col), **rule})
+    return {
+        "dataset_info": dq_report["dataset_info"],
+        "data_quality_summary": dq_report["data_quality_summary"],
+        "column_quality": [column_quality(col, metadata["row_count"]) for col in columns],
+        "suggested_rules": rules
+    }
+
+
+def _has_non_finite(obj: Any) -> bool:
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_non_finite(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_non_finite(value) for value in obj)
+    return False
+
+
+def _serialize(obj: Any, artifact_format: str) -> bytes:
+    if artifact_format == "json":
+        return json.dumps(obj, indent=2).encode('utf-8')
+    # orjson writes NaN and Infinity as null; the standard encoder keeps them (read back
+    # by the fallback parser in read_json_artifact), e.g. for all-null numeric columns
+    if ORJSON_AVAILABLE and not _has_non_finite(obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def write_json_artifact(folder: str, stem: str, obj: Any,
+                        artifact_format: str = "json", compression: str = "none") -> str:
+    """Write `obj` as `{stem}.json` (or `.json.zst`) in a folder. Returns the file name."""
+    content = _serialize(obj, artifact_format)
+    filename = f"{stem}.json"
+    if compression == "zstd":
+        content = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(content)
+        filename += ZSTD_SUFFIX
+    with open(os.path.join(folder, filename), 'wb') as f:
+        f.write(content)
+    return filename
+
+
+def find_artifact(folder: str, stem: str) -> Optional[str]:
+    """Path of a JSON artifact in whichever form it was written, or None."""
+    for filename in (f"{stem}.json", f"{stem}.json{ZSTD_SUFFIX}"):
+        path = os.path.join(folder, filename)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def read_json_artifact(path: str) -> Any:
+    """Read a JSON artifact, decompressing it if needed."""
+    with open(path, 'rb') as f:
+        content = f.read()
+    if path.endswith(ZSTD_SUFFIX):
+        if not ZSTD_AVAILABLE:
+            raise ValueError(f"Reading {os.path.basename(path)} requires the zstandard package (pip install zstandard)")
+        content = zstandard.ZstdDecompressor().decompress(content)
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # Artifacts may contain NaN, which only the standard parser accepts
+            pass
+    return json.loads(content)
+
+
+def load_metadata(folder: str, dataset_name: str) -> Optional[Dict[str, Any]]:
+    """Load a dataset's metadata, or None if the folder has none."""
+    path = find_artifact(folder, f"{dataset_name}_metadata")
+    return read_json_artifact(path) if path else None
+
+
+def load_dq_report(folder: str, dataset_name: str,
+                   metadata: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Load a dataset's full DQ report (expanded if stored normalized), or None."""
+    path = find_artifact(folder, f"{dataset_name}_dq_report")
+    if not path:
+        return None
+    report = read_json_artifact(path)
+    if report.get("report_version") == NORMALIZED_REPORT_VERSION:
+        report = expand_dq_report(report, metadata or load_metadata(folder, dataset_name))
+    return report
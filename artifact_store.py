@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Crash-safe publication of processed-dataset folders.
+
+Artifacts are written into a private staging directory under
+`processed_datasets/.staging/`, flushed to disk, and marked complete by
+writing a manifest last. The staging directory is then swapped into place
+with renames, so a dataset folder is either the previous version or the
+complete new one - never a mix.
+
+`recover_incomplete_datasets` runs at startup and finishes whatever a
+crash interrupted: complete staged datasets are published, previous
+versions moved aside mid-swap are restored, incomplete staging directories
+are discarded so the file is processed again, and published datasets
+missing from the catalog are indexed.
+
+Several processes may share an output folder (the auto-processor, the API
+server, MCP sessions). Each staging directory holds an owner file with the
+owning process and a heartbeat that the process renews while the directory
+exists, and recovery only touches staging whose owner is gone. Swaps into
+place and recovery are serialized with a lock file in the staging area, so
+recovery never sees a swap of a live process halfway through.
+"""
+
+import os
+import json
+import shutil
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Any, Optional
+from catalog import DatasetCatalog
+from artifact_format import load_metadata
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows: publications are only serialized within a process
+    FCNTL_AVAILABLE = False
+
+STAGING_DIRNAME = ".staging"
+MANIFEST_FILENAME = "_manifest.json"
+OWNER_FILENAME = "_owner.json"
+LOCK_FILENAME = ".lock"
+
+# Owners renew the heartbeat in their staging directories this often...
+STAGING_HEARTBEAT_SECONDS = 30
+
+# ...and staging whose heartbeat is older than this is considered abandoned
+STAGING_STALE_SECONDS = 120
+
+# Suffixes of directories inside the staging area
+_STAGED = "staged"
+_PREVIOUS = "previous"
+
+
+def _fsync_directory(path: str):
+    """Persist directory entries (renames, new files). Not supported on Windows."""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_tree(folder: str):
+    """Flush every file in a folder, and the folder itself, to disk."""
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                os.fsync(f.fileno())
+    _fsync_directory(folder)
+
+
+def _staging_root(output_folder: str) -> str:
+    return os.path.join(output_folder, STAGING_DIRNAME)
+
+
+# Staging directories of this process, whose owner files the heartbeat renews
+_active_staging: Dict[str, Dict[str, Any]] = {}
+_active_lock = threading.Lock()
+_heartbeat: Optional[threading.Thread] = None
+
+# Serializes publications within this process (the lock file does across processes)
+_publication_thread_lock = threading.RLock()
+
+
+def _write_owner(path: str, owner: Dict[str, Any]):
+    tmp_path = os.path.join(path, f"{OWNER_FILENAME}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(owner, f)
+    os.replace(tmp_path, os.path.join(path, OWNER_FILENAME))
+
+
+def _renew_owners_forever():
+    while True:
+        time.sleep(STAGING_HEARTBEAT_SECONDS)
+        with _active_lock:
+            for path, owner in _active_staging.items():
+                owner["heartbeat_at"] = time.time()
+                try:
+                    _write_owner(path, owner)
+                except OSError as e:
+                    print(f"Warning: Could not renew the staging heartbeat of {path}: {e}")
+
+
+def create_staging_folder(output_folder: str, dataset_name: str, file_id: Optional[str] = None) -> str:
+    """
+    Create an empty, uniquely named staging directory for a dataset.
+
+    The directory belongs to this process until it is published or
+    discarded; `file_id` (the source Drive file) lets recovery ask whether
+    the file is still being worked on elsewhere.
+    """
+    global _heartbeat
+    path = os.path.join(_staging_root(output_folder), f"{dataset_name}.{uuid.uuid4().hex}.{_STAGED}")
+    os.makedirs(path)
+    owner = {"pid": os.getpid(), "host": socket.gethostname(), "file_id": file_id, "heartbeat_at": time.time()}
+    with _active_lock:
+        _write_owner(path, owner)
+        _active_staging[path] = owner
+        if _heartbeat is None:
+            _heartbeat = threading.Thread(target=_renew_owners_forever, name="staging-heartbeat", daemon=True)
+            _heartbeat.start()
+    return path
+
+
+def _release_staging(path: str):
+    with _active_lock:
+        _active_staging.pop(path, None)
+
+
+def discard_staging_folder(path: str):
+    """Remove a staging directory that will not be published."""
+    _release_staging(path)
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def _read_owner(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(path, OWNER_FILENAME), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def pid_alive(pid: int) -> bool:
+    """True if a process with this ID exists on this host (POSIX only)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _owner_alive(path: str, now: float) -> bool:
+    """True unless the process that created a staging directory is provably gone."""
+    owner = _read_owner(path)
+    if owner is None:
+        # Being created right now, or left by a version without owner files
+        return now - os.path.getmtime(path) < STAGING_STALE_SECONDS
+    if now - owner.get('heartbeat_at', 0) > STAGING_STALE_SECONDS:
+        return False
+    if owner.get('host') != socket.gethostname():
+        return True
+    if owner.get('pid') == os.getpid():
+        with _active_lock:
+            return path in _active_staging
+    # Signal 0 only checks for existence on POSIX; elsewhere trust the heartbeat
+    return pid_alive(owner['pid']) if os.name == 'posix' else True
+
+
+@contextmanager
+def _publication_lock(output_folder: str) -> Iterator[None]:
+    """Exclusive lock for swapping datasets into place and for recovery."""
+    staging_root = _staging_root(output_folder)
+    os.makedirs(staging_root, exist_ok=True)
+    with _publication_thread_lock:
+        if not FCNTL_AVAILABLE:
+            yield
+            return
+        with open(os.path.join(staging_root, LOCK_FILENAME), 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _read_manifest(folder: str) -> Optional[Dict[str, Any]]:
+    manifest_path = os.path.join(folder, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _swap_into_place(staging_path: str, final_path: str, output_folder: str, dataset_name: str):
+    previous_path = None
+    if os.path.exists(final_path):
+        previous_path = os.path.join(_staging_root(output_folder), f"{dataset_name}.{uuid.uuid4().hex}.{_PREVIOUS}")
+        os.rename(final_path, previous_path)
+    os.rename(staging_path, final_path)
+    _fsync_directory(output_folder)
+    _fsync_directory(_staging_root(output_folder))
+    if previous_path:
+        shutil.rmtree(previous_path, ignore_errors=True)
+
+
+def publish_dataset(staging_path: str, output_folder: str, dataset_name: str,
+                    manifest: Dict[str, Any]) -> str:
+    """
+    Atomically replace `output_folder/dataset_name` with the staged artifacts.
+
+    Args:
+        staging_path: Directory from `create_staging_folder` holding every artifact
+        output_folder: Base folder of processed datasets
+        dataset_name: Name of the dataset folder
+        manifest: Details recorded alongside the artifacts (e.g. source file ID)
+
+    Returns:
+        Path of the published dataset folder
+    """
+    # The staging directory stays registered (and heartbeating) until it has been moved,
+    # so a recovery scan cannot mistake it for abandoned while it is being published
+    owner_files = (OWNER_FILENAME, f"{OWNER_FILENAME}.tmp")
+    files = sorted(name for name in os.listdir(staging_path) if name not in owner_files)
+    manifest = dict(manifest, dataset_name=dataset_name, files=files, published_at=time.time())
+    with open(os.path.join(staging_path, MANIFEST_FILENAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    fsync_tree(staging_path)
+
+    final_path = os.path.join(output_folder, dataset_name)
+    with _publication_lock(output_folder):
+        # Holding _active_lock keeps the heartbeat from writing into the directory mid-rename
+        with _active_lock:
+            _swap_into_place(staging_path, final_path, output_folder, dataset_name)
+            _active_staging.pop(staging_path, None)
+        try:
+            os.remove(os.path.join(final_path, OWNER_FILENAME))
+        except FileNotFoundError:
+            pass
+    return final_path
+
+
+def _index(output_folder: str, dataset_name: str, final_path: str, manifest: Optional[Dict[str, Any]]):
+    metadata = load_metadata(final_path, dataset_name)
+    if metadata is not None:
+        DatasetCatalog(output_folder).upsert(dataset_name, final_path, metadata,
+                                             file_id=(manifest or {}).get('source_file_id'),
+                                             processed_date=(manifest or {}).get('published_at'))
+
+
+def _index_unindexed(output_folder: str) -> List[str]:
+    """Index published datasets the catalog is missing (a crash hit between publishing and indexing)."""
+    indexed = {entry['dataset_name']: entry for entry in DatasetCatalog(output_folder).list()}
+    names = []
+    for dataset_name in sorted(os.listdir(output_folder)):
+        final_path = os.path.join(output_folder, dataset_name)
+        if dataset_name.startswith('.') or not os.path.isdir(final_path):
+            continue
+        manifest = _read_manifest(final_path)
+        if manifest is None:
+            continue
+        entry = indexed.get(dataset_name)
+        if (entry is None or entry['file_id'] != manifest.get('source_file_id')
+                or entry['processed_date'] < manifest.get('published_at', 0)):
+            _index(output_folder, dataset_name, final_path, manifest)
+            names.append(dataset_name)
+    return names
+
+
+def recover_incomplete_datasets(output_folder: str = "processed_datasets",
+                                in_use: Optional[Callable[[str], bool]] = None) -> Dict[str, List[str]]:
+    """
+    Finish or roll back dataset publications interrupted by a crash.
+
+    Staging directories whose owning process is still running (see
+    `create_staging_folder`) are left alone, so this is safe to call while
+    other processes are writing to the same folder.
+
+    Args:
+        output_folder: Folder holding the datasets
+        in_use: Tells whether a source file ID is still being processed
+            somewhere (e.g. it holds an unexpired lease); its staging is left
+            alone even if its owner looks gone
+
+    Returns:
+        Dataset names grouped by what happened to them: "published" (a
+        complete staged version was moved into place), "restored" (the
+        previous version was put back), "discarded" (incomplete staging
+        removed; the dataset will be processed again) and "indexed" (a
+        published dataset was added to the catalog)
+    """
+    outcome = {"published": [], "restored": [], "discarded": [], "indexed": []}
+    if not os.path.isdir(output_folder):
+        return outcome
+
+    with _publication_lock(output_folder):
+        _recover_staging(output_folder, in_use, outcome)
+        outcome["indexed"] = [name for name in _index_unindexed(output_folder)
+                              if name not in outcome["published"] and name not in outcome["restored"]]
+
+    for action, names in outcome.items():
+        if names:
+            print(f"🩹 Recovery: {action} {len(names)} dataset(s): {', '.join(names)}")
+    return outcome
+
+
+def _recover_staging(output_folder: str, in_use: Optional[Callable[[str], bool]],
+                     outcome: Dict[str, List[str]]):
+    staging_root = _staging_root(output_folder)
+    now = time.time()
+    staged: Dict[str, List[str]] = {}
+    previous: Dict[str, List[str]] = {}
+    for entry in sorted(os.listdir(staging_root)):
+        parts = entry.rsplit('.', 2)
+        if len(parts) != 3:
+            continue
+        dataset_name, _, kind = parts
+        path = os.path.join(staging_root, entry)
+        if kind == _STAGED:
+            if _owner_alive(path, now):
+                continue
+            file_id = (_read_owner(path) or {}).get('file_id')
+            if in_use and file_id and in_use(file_id):
+                continue
+            if _read_manifest(path) is None:
+                shutil.rmtree(path, ignore_errors=True)
+                outcome["discarded"].append(dataset_name)
+            else:
+                staged.setdefault(dataset_name, []).append(path)
+        elif kind == _PREVIOUS:
+            # Swaps hold the publication lock, so this one was interrupted by a crash
+            previous.setdefault(dataset_name, []).append(path)
+
+    for dataset_name in sorted(set(staged) | set(previous)):
+        final_path = os.path.join(output_folder, dataset_name)
+        candidates = sorted(staged.get(dataset_name, []),
+                            key=lambda path: _read_manifest(path).get('published_at', 0))
+
+        if candidates:
+            # The newest complete version wins; older complete stagings are obsolete
+            newest = candidates[-1]
+            manifest = _read_manifest(newest)
+            _swap_into_place(newest, final_path, output_folder, dataset_name)
+            _index(output_folder, dataset_name, final_path, manifest)
+            outcome["published"].append(dataset_name)
+            for path in candidates[:-1] + previous.get(dataset_name, []):
+                shutil.rmtree(path, ignore_errors=True)
+        elif not os.path.exists(final_path):
+            # Crashed between moving the old version aside and moving the new one in
+            old_versions = sorted(previous[dataset_name], key=os.path.getmtime)
+            os.rename(old_versions[-1], final_path)
+            _fsync_directory(output_folder)
+            _index(output_folder, dataset_name, final_path, _read_manifest(final_path))
+            outcome["restored"].append(dataset_name)
+            for path in old_versions[:-1]:
+                shutil.rmtree(path, ignore_errors=True)
+        else:
+            for path in previous[dataset_name]:
+                shutil.rmtree(path, ignore_errors=True)
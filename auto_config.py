@@ -13,8 +13,12 @@ AUTO_PROCESSOR_CONFIG = {
     # How often to check for new files (in seconds)
     "check_interval": 30,
     
-    # Minimum age of file before processing (to avoid processing while uploading)
-    "min_file_age_minutes": 1,
+    # Files up to this size with a Drive checksum are processed as soon as they appear
+    "ready_immediately_max_bytes": 32 * 1024 * 1024,
+    
+    # Other files are processed once their size, checksum and modification time
+    # have not changed for this many seconds (their upload has finished)
+    "upload_stable_seconds": 10,
     
     # Supported file extensions
     "supported_extensions": ['.csv', '.xlsx', '.xls'],
@@ -28,11 +32,58 @@ AUTO_PROCESSOR_CONFIG = {
     # Enable detailed logging
     "verbose_logging": True,
     
-    # Auto-retry failed files after this many seconds
+    # Auto-retry failed files after this many seconds (doubles after each further failure)
     "retry_failed_after": 3600,  # 1 hour
     
+    # Failed attempts after which a file is dead-lettered and no longer retried
+    "max_retry_attempts": 5,
+    
+    # Log file for tracking failed files and their retry schedule
+    "failed_files_log": "failed_files.json",
+    
+    # Live status published for processor_dashboard.py --live
+    "status_file": "processor_status.json",
+    
+    # SQLite history of processing attempts, for processor_dashboard.py --stats
+    "history_db": "processing_history.db",
+    
+    # Lease store shared by several auto-processor instances (SQLite path on a shared
+    # volume, or a directory for the "file" backend); None runs a single instance
+    "lease_store": None,
+    
+    # Lease store backend: "sqlite" or "file"
+    "lease_backend": "sqlite",
+    
+    # Seconds after which the files of an unresponsive instance are reclaimed by others
+    "lease_ttl": 120,
+    
     # Maximum number of files to process in one cycle
-    "max_files_per_cycle": 5
+    "max_files_per_cycle": 5,
+    
+    # Profile mode for auto-processed files: "exact" or "sampled"
+    "profile_mode": "exact",
+    
+    # Per-folder profile mode overrides, keyed by Google Drive folder ID
+    "folder_profile_modes": {},
+    
+    # Further Google Drive folder IDs to watch besides MCP_SERVER_FOLDER_ID
+    "extra_folder_ids": [],
+    
+    # Order of waiting files: "size" (smallest first), "age" (oldest first) or "priority"
+    "scheduling_policy": "size",
+    
+    # Per-folder priorities for the "priority" policy (higher goes first), keyed by folder ID
+    "folder_priorities": {},
+    
+    # Files in the processing pipeline at the same time, across all folders
+    "max_concurrent_files": 4,
+    
+    # Per-folder caps on files processed at the same time, keyed by folder ID
+    "folder_max_concurrent": {},
+    
+    # Worker threads per pipeline stage: files download, are analysed (profile,
+    # DQ rules, contract) and are published in overlapping stages
+    "stage_workers": {"download": 2, "analyze": 1, "publish": 1}
 }
 
 def get_config():
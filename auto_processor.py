@@ -1,25 +1,71 @@
 #!/usr/bin/env python3
 """
-Automated Dataset Processor - Watches Google Drive folder for new files
+Automated Dataset Processor - Watches Google Drive folders for new files
 and automatically processes them without manual intervention.
 """
 
 import os
+import queue
 import time
 import json
-from datetime import datetime, timedelta
+import random
+import threading
+from collections import deque
+from datetime import datetime
 from typing import Set, Dict, List, Any
 from dotenv import load_dotenv
-from dataset_processor import process_dataset_with_organization
-from utils import get_drive_service, list_files_in_folder
+from artifact_store import recover_incomplete_datasets
+from catalog import DatasetCatalog
+from drive_governor import get_drive_governor
+from retry_scheduler import RetryScheduler, DEFAULT_RETRY_AFTER_SECONDS, DEFAULT_MAX_ATTEMPTS, FAILED_FILES_LOG
+from file_scheduler import FileScheduler, DEFAULT_MAX_CONCURRENT_FILES, file_size
+from pipeline_config import DEFAULT_STAGE_WORKERS, validate_profile_mode, validate_stage_workers
+from stage_pipeline import bottleneck
+from status_publisher import StatusPublisher, STATUS_FILE, STATUS_HEARTBEAT_SECONDS
+from processing_history import ProcessingHistory, StageTimer, DEFAULT_HISTORY_DB, drive_timestamp
+from work_leases import LeaseKeeper, create_lease_store, DEFAULT_LEASE_TTL_SECONDS, HOLD_INDEFINITELY
+from upload_readiness import ReadinessDetector, READY_IMMEDIATELY_MAX_BYTES, UPLOAD_STABLE_SECONDS
 
 load_dotenv()
 
+# Backoff between monitoring cycles that fail repeatedly
+ERROR_BACKOFF_MAX_SECONDS = 600
+
+# Files up to this size count as "small" in the time-to-catalog status line
+SMALL_FILE_BYTES = 10 * 1024 * 1024
+
+# Recently processed files included in the published status
+RECENT_FILES_PUBLISHED = 5
+
+# A pipeline stage this busy holds the others up
+BOTTLENECK_UTILIZATION = 0.8
+
+# While queued files wait for room in the pipeline, look for room this often
+ADMISSION_RECHECK_SECONDS = 1
+
 class AutoDatasetProcessor:
     def __init__(self, 
                  server_folder_id: str = None,
                  check_interval: int = 30,
-                 processed_files_log: str = "processed_files.json"):
+                 processed_files_log: str = "processed_files.json",
+                 profile_mode: str = "exact",
+                 folder_profile_modes: Dict[str, str] = None,
+                 retry_failed_after: int = DEFAULT_RETRY_AFTER_SECONDS,
+                 max_retry_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 failed_files_log: str = FAILED_FILES_LOG,
+                 extra_folder_ids: List[str] = None,
+                 scheduling_policy: str = "size",
+                 folder_priorities: Dict[str, int] = None,
+                 max_concurrent_files: int = DEFAULT_MAX_CONCURRENT_FILES,
+                 folder_max_concurrent: Dict[str, int] = None,
+                 status_file: str = STATUS_FILE,
+                 history_db: str = DEFAULT_HISTORY_DB,
+                 lease_store: str = None,
+                 lease_backend: str = "sqlite",
+                 lease_ttl: int = DEFAULT_LEASE_TTL_SECONDS,
+                 ready_immediately_max_bytes: int = READY_IMMEDIATELY_MAX_BYTES,
+                 upload_stable_seconds: float = UPLOAD_STABLE_SECONDS,
+                 stage_workers: Dict[str, int] = None):
         """
         Initialize the auto processor.
         
@@ -27,15 +73,85 @@ class AutoDatasetProcessor:
             server_folder_id: Google Drive folder ID to monitor
             check_interval: How often to check for new files (seconds)
             processed_files_log: File to track already processed files
+            profile_mode: Default profile mode ("exact" or "sampled")
+            folder_profile_modes: Per-folder profile mode overrides
+            retry_failed_after: Delay before the first retry of a failed file (seconds),
+                doubling with every further failure
+            max_retry_attempts: Failures after which a file is dead-lettered
+            failed_files_log: File to track failed files and their retry schedule
+            extra_folder_ids: Further Google Drive folder IDs to monitor
+            scheduling_policy: Order of waiting files: "size", "age" or "priority"
+            folder_priorities: Per-folder priorities for the "priority" policy (higher first)
+            max_concurrent_files: Files in the processing pipeline at the same time across all folders
+            folder_max_concurrent: Per-folder caps on files processed at the same time
+            status_file: File the live status for the dashboard is published to
+            history_db: SQLite database of processing attempts, for analytics
+            lease_store: Lease store shared by several instances (database path for
+                "sqlite", directory for "file"); None runs a single instance
+            lease_backend: Lease store backend: "sqlite" or "file"
+            lease_ttl: Seconds after which the lease of an unresponsive instance expires
+            ready_immediately_max_bytes: Files up to this size with a checksum are
+                processed as soon as they appear
+            upload_stable_seconds: Other files are processed once their size, checksum
+                and modification time have not changed for this long
+            stage_workers: Worker threads per pipeline stage ("download", "analyze",
+                "publish"); stages not given use DEFAULT_STAGE_WORKERS
         """
         self.server_folder_id = server_folder_id or os.getenv('MCP_SERVER_FOLDER_ID')
+        self.folder_ids = list(dict.fromkeys([self.server_folder_id] + list(extra_folder_ids or [])))
         self.check_interval = check_interval
         self.processed_files_log = processed_files_log
+        self.profile_mode = validate_profile_mode(profile_mode)
+        self.folder_profile_modes = {
+            folder_id: validate_profile_mode(mode)
+            for folder_id, mode in (folder_profile_modes or {}).items()
+        }
         self.drive_service = None
         self.processed_files = self._load_processed_files()
+        self.retry_scheduler = RetryScheduler(failed_files_log, retry_failed_after, max_retry_attempts)
+        self.max_concurrent_files = max_concurrent_files
+        self.stage_workers = validate_stage_workers(stage_workers or {})
+        # The dataset pipeline stays up across checks while files are in flight
+        self._pipeline = None
+        self._last_stage_metrics: Dict[str, Dict[str, Any]] = {}
+        self._in_flight: Set[str] = set()
+        self._finished = queue.Queue()
+        self.readiness = ReadinessDetector(ready_immediately_max_bytes, upload_stable_seconds)
+        self.scheduler = FileScheduler(scheduling_policy, folder_priorities, folder_max_concurrent,
+                                       default_max_concurrent=max_concurrent_files)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        
+        # Live status for the dashboard, published as things happen
+        self.status = StatusPublisher(status_file)
+        self._folder_stats: Dict[str, Dict[str, Any]] = {}
+        self._folder_unprocessed: Dict[str, Set[str]] = {}
+        self._running_files: Dict[str, Dict[str, Any]] = {}
+        self._recent_files = deque(maxlen=RECENT_FILES_PUBLISHED)
+        self._last_check_at = None
+        self._next_check_at = None
+        self._stopped = False
         
         if not self.server_folder_id:
             raise ValueError("MCP_SERVER_FOLDER_ID not found in environment variables")
+        
+        # Coordinated mode: instances claim files with expiring leases in a shared store
+        self.leases = LeaseKeeper(create_lease_store(lease_backend, lease_store), ttl=lease_ttl) if lease_store else None
+        
+        # Finish publications interrupted by a crash before deciding what is new. Staging
+        # of other live processes, and of files other instances hold leases on, is left alone.
+        recover_incomplete_datasets(in_use=self.leases.store.in_use if self.leases else None)
+        self._reconcile_with_catalog()
+        
+        # Timings of every attempt and the backlog, for the dashboard's analytics
+        self.history = ProcessingHistory(history_db)
+        if self.history.is_empty() and self.processed_files:
+            imported = self.history.import_processed_files(self.processed_files)
+            print(f"📈 Imported {imported} processed file(s) into the processing history")
+        
+        recent = sorted(self.processed_files.items(), key=lambda item: item[1].get('processed_at', ''))
+        for file_id, info in recent[-RECENT_FILES_PUBLISHED:]:
+            self._recent_files.append(self._recent_entry(file_id, info))
     
     def _load_processed_files(self) -> Dict[str, Dict[str, Any]]:
         """Load the list of already processed files."""
@@ -50,25 +166,85 @@ class AutoDatasetProcessor:
     def _save_processed_files(self):
         """Save the list of processed files."""
         try:
-            with open(self.processed_files_log, 'w') as f:
-                json.dump(self.processed_files, f, indent=2)
+            with self._save_lock:
+                with self._lock:
+                    processed_files = dict(self.processed_files)
+                tmp_path = f"{self.processed_files_log}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(processed_files, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.processed_files_log)
         except Exception as e:
             print(f"Warning: Could not save processed files log: {e}")
     
+    def _reconcile_with_catalog(self, output_folder: str = "processed_datasets"):
+        """
+        Record datasets that were published after the log was last saved.
+        
+        A crash between publishing a dataset and saving the log would
+        otherwise get the same file processed a second time.
+        """
+        if not os.path.exists(self.processed_files_log):
+            return
+        log_saved_at = os.path.getmtime(self.processed_files_log)
+        
+        adopted = 0
+        for dataset in DatasetCatalog(output_folder).list():
+            file_id = dataset.get('file_id')
+            if not file_id or file_id in self.processed_files or dataset['processed_date'] <= log_saved_at:
+                continue
+            self.processed_files[file_id] = {
+                "filename": dataset['filename'],
+                "processed_at": datetime.fromtimestamp(dataset['processed_date']).isoformat(),
+                "output_folder": dataset['folder_path'],
+                "row_count": dataset['row_count'],
+                "column_count": dataset['column_count'],
+                "recovered": True
+            }
+            adopted += 1
+        
+        if adopted:
+            print(f"🩹 Recovery: marked {adopted} already published file(s) as processed")
+            self._save_processed_files()
+    
+    def _profile_mode_for(self, folder_id: str) -> str:
+        """Get the profile mode configured for a folder."""
+        return self.folder_profile_modes.get(folder_id, self.profile_mode)
+    
     def _is_supported_file(self, filename: str) -> bool:
         """Check if the file is a supported format."""
         return filename.lower().endswith(('.csv', '.xlsx', '.xls'))
     
     def _get_new_files(self) -> List[Dict[str, Any]]:
-        """Get list of new files that haven't been processed yet."""
-        try:
-            if not self.drive_service:
-                self.drive_service = get_drive_service()
+        """Get list of new files that haven't been processed yet, across all watched folders."""
+        from utils import get_drive_service, list_files_in_folder
+        
+        if not self.drive_service:
+            self.drive_service = get_drive_service()
+        
+        new_files = []
+        waiting_retries = 0
+        candidates = set()
+        listing_failed = False
+        for folder_id in self.folder_ids:
+            try:
+                # Get all files in the folder
+                all_files = list_files_in_folder(self.drive_service, folder_id)
+            except Exception as e:
+                print(f"❌ Error checking folder {folder_id} for new files: {e}")
+                listing_failed = True
+                continue
             
-            # Get all files in the server folder
-            all_files = list_files_in_folder(self.drive_service, self.server_folder_id)
+            supported = [f for f in all_files if self._is_supported_file(f['name'])]
+            self._folder_stats[folder_id] = {
+                "total_files": len(all_files),
+                "supported_files": len(supported),
+                "unsupported_files": len(all_files) - len(supported),
+                "listed_at": time.time()
+            }
+            self._folder_unprocessed[folder_id] = {f['id'] for f in supported if f['id'] not in self.processed_files}
             
-            new_files = []
             for file_info in all_files:
                 file_id = file_info['id']
                 filename = file_info['name']
@@ -77,51 +253,121 @@ class AutoDatasetProcessor:
                 if not self._is_supported_file(filename):
                     continue
                 
-                # Skip if already processed
-                if file_id in self.processed_files:
+                # Skip if already processed, or still in the pipeline since an earlier check
+                if file_id in self.processed_files or file_id in self._running_files:
                     continue
                 
-                # Skip if file is too recent (might still be uploading)
-                try:
-                    created_time = datetime.fromisoformat(file_info['createdTime'].replace('Z', '+00:00'))
-                    if datetime.now().astimezone() - created_time < timedelta(minutes=1):
-                        print(f"⏳ Skipping {filename} - too recent, might still be uploading")
-                        continue
-                except:
-                    pass  # If we can't parse time, process anyway
+                # Skip failed files until their retry is due
+                if not self.retry_scheduler.is_due(file_info):
+                    waiting_retries += 1
+                    continue
                 
+                # Skip until the upload has finished (size/checksum settled)
+                candidates.add(file_id)
+                if not self.readiness.is_ready(file_info):
+                    print(f"⏳ Skipping {filename} - upload may still be in progress")
+                    continue
+                
+                file_info['folder_id'] = folder_id
                 new_files.append(file_info)
-            
-            return new_files
-            
-        except Exception as e:
-            print(f"❌ Error checking for new files: {e}")
-            return []
+        
+        if waiting_retries:
+            print(f"⏸️  {waiting_retries} failed file(s) waiting for retry or dead-lettered")
+        
+        # Keep observing the files of folders that could not be listed this time
+        if not listing_failed:
+            self.readiness.retain(candidates)
+        
+        if self.leases:
+            new_files = self._skip_claimed_files(new_files)
+        
+        return new_files
+    
+    def _skip_claimed_files(self, new_files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop files other instances have processed (adopting their results) or currently hold."""
+        leases = self.leases.store.lookup(f['id'] for f in new_files)
+        now = time.time()
+        unclaimed = []
+        adopted = held_elsewhere = 0
+        for file_info in new_files:
+            lease = leases.get(file_info['id'])
+            if lease and lease['state'] == "done":
+                with self._lock:
+                    self.processed_files[file_info['id']] = {**lease['result'], "processed_by": lease['owner']}
+                adopted += 1
+            elif lease and lease['expires_at'] > now:
+                held_elsewhere += 1
+            else:
+                unclaimed.append(file_info)
+        
+        if adopted:
+            print(f"🤝 {adopted} file(s) already processed by other instances")
+            self._save_processed_files()
+        if held_elsewhere:
+            print(f"🔒 {held_elsewhere} file(s) claimed by other instances")
+        return unclaimed
     
-    def _process_file(self, file_info: Dict[str, Any]) -> bool:
-        """Process a single file."""
+    def _start_file(self, file_info: Dict[str, Any]) -> bool:
+        """Claim a file and mark it as running. Returns False if another instance has it."""
         file_id = file_info['id']
         filename = file_info['name']
         
+        if self.leases and not self.leases.claim(file_id):
+            print(f"⏭️  Skipping {filename} - claimed by another instance")
+            return False
+        
+        print(f"\n🚀 Auto-processing new file: {filename}")
+        print(f"📄 File ID: {file_id}")
+        print(f"⏰ Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        with self._lock:
+            self._running_files[file_id] = {"file_id": file_id, "filename": filename,
+                                            "folder_id": file_info.get('folder_id', self.server_folder_id),
+                                            "started_at": time.time()}
+        self._publish_status("started", file_id=file_id, filename=filename)
+        return True
+    
+    def _finish_file(self, file_info: Dict[str, Any], result: Dict[str, Any],
+                     started_at: float, stage_timer: StageTimer) -> bool:
+        """Record the result of a file that went through the pipeline. Returns True if it succeeded."""
+        file_id = file_info['id']
+        filename = file_info['name']
+        folder_id = file_info.get('folder_id', self.server_folder_id)
+        
         try:
-            print(f"\n🚀 Auto-processing new file: {filename}")
-            print(f"📄 File ID: {file_id}")
-            print(f"⏰ Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            
-            # Process the dataset
-            result = process_dataset_with_organization(file_id)
-            
             if result["status"] == "success":
-                # Mark as processed
-                self.processed_files[file_id] = {
+                processed = {
                     "filename": filename,
                     "processed_at": datetime.now().isoformat(),
                     "output_folder": result["output_folder"],
                     "row_count": result["metadata"]["row_count"],
                     "column_count": result["metadata"]["column_count"],
-                    "dq_rules_count": len(result["dq_rules"])
+                    "dq_rules_count": len(result["dq_rules"]),
+                    "profile_mode": result["metadata"].get("profile_mode", "exact"),
+                    "folder_id": folder_id,
+                    "size_bytes": file_size(file_info),
+                    "time_to_catalog_seconds": self._seconds_since_upload(file_info)
                 }
+                
+                # Only the instance still holding the lease records the result
+                if self.leases and not self.leases.complete(file_id, processed):
+                    print(f"⚠️  Lease on {filename} was taken over by another instance; its result counts instead")
+                    with self._lock:
+                        self._running_files.pop(file_id, None)
+                    return False
+                
+                # Mark as processed
+                with self._lock:
+                    self.processed_files[file_id] = processed
                 self._save_processed_files()
+                self.retry_scheduler.record_success(file_id)
+                self._record_run(file_info, "success", started_at, stage_timer, metadata=result["metadata"])
+                with self._lock:
+                    self._running_files.pop(file_id, None)
+                    self._recent_files.append(self._recent_entry(file_id, self.processed_files[file_id]))
+                self._publish_status("processed", file_id=file_id, filename=filename,
+                                     row_count=result["metadata"]["row_count"],
+                                     column_count=result["metadata"]["column_count"],
+                                     dq_rules_count=len(result["dq_rules"]))
                 
                 print(f"✅ Successfully processed {filename}")
                 print(f"📁 Output: {result['output_folder']}")
@@ -130,76 +376,333 @@ class AutoDatasetProcessor:
                 return True
             else:
                 print(f"❌ Failed to process {filename}: {result.get('message', 'Unknown error')}")
+                self._record_run(file_info, "failed", started_at, stage_timer, error=result.get('message', 'Unknown error'))
+                self._record_failure(file_info, result.get('message', 'Unknown error'))
                 return False
                 
         except Exception as e:
             print(f"❌ Error processing {filename}: {e}")
+            self._record_run(file_info, "failed", started_at, stage_timer, error=str(e))
+            self._record_failure(file_info, str(e))
             return False
     
+    def _record_run(self, file_info: Dict[str, Any], status: str, started_at: float, stage_timer: StageTimer,
+                    metadata: Dict[str, Any] = None, error: str = None):
+        """Add a processing attempt to the history."""
+        finished_at = time.time()
+        try:
+            self.history.record_run(
+                file_info['id'], status, finished_at,
+                filename=file_info['name'],
+                folder_id=file_info.get('folder_id', self.server_folder_id),
+                started_at=started_at,
+                created_at=drive_timestamp(file_info.get('createdTime')),
+                size_bytes=file_size(file_info),
+                row_count=metadata["row_count"] if metadata else None,
+                column_count=metadata["column_count"] if metadata else None,
+                error=error,
+                stage_seconds=stage_timer.durations(finished_at)
+            )
+        except Exception as e:
+            print(f"Warning: Could not record processing history: {e}")
+    
+    @staticmethod
+    def _seconds_since_upload(file_info: Dict[str, Any]):
+        """Seconds from the file's creation on Drive until now, or None if unknown."""
+        try:
+            created_time = datetime.fromisoformat(file_info['createdTime'].replace('Z', '+00:00'))
+            return round((datetime.now().astimezone() - created_time).total_seconds(), 1)
+        except (KeyError, ValueError):
+            return None
+    
+    def _record_failure(self, file_info: Dict[str, Any], error: str):
+        """Schedule the next attempt of a failed file, or dead-letter it."""
+        shared = self.leases.failure_history(file_info['id']) if self.leases else None
+        failure = self.retry_scheduler.record_failure(file_info, error, shared)
+        if self.leases:
+            # Keep other instances off the file until its retry is due; the history
+            # goes with the lease so whichever instance retries it keeps counting
+            self.leases.release(file_info['id'], failure["next_retry_at"]
+                                if failure["status"] == "retrying" else HOLD_INDEFINITELY, failure)
+        with self._lock:
+            self._running_files.pop(file_info['id'], None)
+        self._publish_status("failed", file_id=file_info['id'], filename=file_info['name'], error=error[:200],
+                             status=failure["status"], attempts=failure["attempts"])
+        if failure["status"] == "dead_letter":
+            print(f"☠️  {file_info['name']} failed {failure['attempts']} times; moved to dead letter "
+                  f"(requeue with --requeue {file_info['id']})")
+        else:
+            next_retry = datetime.fromtimestamp(failure["next_retry_at"]).strftime('%Y-%m-%d %H:%M:%S')
+            print(f"🔁 Attempt {failure['attempts']}/{self.retry_scheduler.max_attempts} failed; "
+                  f"next retry at {next_retry}")
+    
+    @staticmethod
+    def _recent_entry(file_id: str, info: Dict[str, Any]) -> Dict[str, Any]:
+        """Summary of a processed file for the published status."""
+        return {
+            "file_id": file_id,
+            "filename": info['filename'],
+            "processed_at": info['processed_at'],
+            "row_count": info['row_count'],
+            "column_count": info['column_count'],
+            "dq_rules_count": info.get('dq_rules_count')
+        }
+    
+    def _pending_by_folder(self) -> Dict[str, int]:
+        """Files seen at the last check that have been neither processed nor failed since."""
+        failures = self.retry_scheduler.failures
+        with self._lock:
+            return {
+                folder_id: sum(1 for file_id in unprocessed
+                               if file_id not in self.processed_files and file_id not in failures)
+                for folder_id, unprocessed in self._folder_unprocessed.items()
+            }
+    
+    def _status_state(self) -> Dict[str, Any]:
+        """Current state as published for the dashboard."""
+        pending = self._pending_by_folder()
+        with self._lock:
+            processed_count = len(self.processed_files)
+            running = list(self._running_files.values())
+            recent = list(self._recent_files)
+        folders = {folder_id: {**stats, "pending_files": pending[folder_id]}
+                   for folder_id, stats in self._folder_stats.items()}
+        return {
+            "folder_ids": self.folder_ids,
+            "check_interval": self.check_interval,
+            "folders": folders,
+            "processed_count": processed_count,
+            "queue": self.scheduler.queue_depth(),
+            "running": running,
+            "failed": {
+                "retrying": len(self.retry_scheduler.entries("retrying")),
+                "dead_letter": len(self.retry_scheduler.entries("dead_letter"))
+            },
+            "recent": recent,
+            "last_check_at": self._last_check_at,
+            "next_check_at": self._next_check_at,
+            "drive": get_drive_governor().metrics(),
+            "stages": self._stage_metrics(),
+            "stopped": self._stopped
+        }
+    
+    def _publish_status(self, event: str = None, **details):
+        """Publish the live status, recording an event if given."""
+        self.status.publish(self._status_state(), event, **details)
+    
     def _print_status(self):
         """Print current monitoring status."""
         print(f"\n📊 Monitoring Status:")
-        print(f"   📁 Folder ID: {self.server_folder_id}")
+        print(f"   📁 Folder ID(s): {', '.join(self.folder_ids)}")
         print(f"   ⏱️  Check interval: {self.check_interval} seconds")
         print(f"   📋 Processed files: {len(self.processed_files)}")
+        depth = self.scheduler.queue_depth()
+        print(f"   📥 Queue: {depth['pending']} waiting, {depth['running']} running "
+              f"(policy: {self.scheduler.policy}, max {self.max_concurrent_files} at once)")
+        
+        # Time from upload to catalog for the most recent small files
+        with self._lock:
+            recent = sorted(self.processed_files.values(), key=lambda info: info.get('processed_at', ''))[-100:]
+        latencies = sorted(info['time_to_catalog_seconds'] for info in recent
+                           if info.get('time_to_catalog_seconds') is not None
+                           and info.get('size_bytes', 0) <= SMALL_FILE_BYTES)
+        if latencies:
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"   ⏱️  Time to catalog (files ≤ {SMALL_FILE_BYTES // (1024 * 1024)} MB): p95 {p95:.0f}s")
+        retrying = len(self.retry_scheduler.entries("retrying"))
+        dead_letter = len(self.retry_scheduler.entries("dead_letter"))
+        if retrying or dead_letter:
+            print(f"   🔁 Failed files: {retrying} awaiting retry, {dead_letter} dead-lettered")
         print(f"   🕐 Last check: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        stages = self._stage_metrics()
+        if stages:
+            print(f"   ⚙️  Pipeline stages (last cycle): " + ", ".join(
+                f"{name} {stage['utilization']:.0%} busy ({stage['workers']} worker(s))"
+                for name, stage in stages.items()))
+            slowest = bottleneck(stages)
+            if slowest and stages[slowest]['utilization'] >= BOTTLENECK_UTILIZATION:
+                print(f"      Bottleneck: {slowest}; give it more workers with stage_workers")
+        
+        drive = get_drive_governor().metrics()
+        print(f"   🌐 Drive API: {drive['requests']} requests, {drive['retries']} retries, "
+              f"{drive['throttled_requests']} throttled, {drive['current_rate']}/{drive['max_rate']} req/s, "
+              f"circuit {drive['circuit_state']}")
     
     def run_once(self) -> int:
-        """Run one check cycle and return number of files processed."""
+        """Run one check cycle, wait for its files and return the number processed."""
+        self._check_for_new_files()
+        try:
+            return self._process_until(None)
+        finally:
+            self._close_pipeline()
+    
+    def _check_for_new_files(self) -> int:
+        """List the watched folders and queue new files for processing. Returns the number queued."""
         print(f"\n🔍 Checking for new files...")
         
         new_files = self._get_new_files()
+        self._last_check_at = time.time()
+        self._publish_status("check", new_files=len(new_files))
+        try:
+            self.history.record_backlog(sum(self._pending_by_folder().values()),
+                                        len(self.retry_scheduler.entries("retrying")))
+        except Exception as e:
+            print(f"Warning: Could not record backlog: {e}")
         
-        if not new_files:
+        # Files queued by an earlier check and not started yet are not new
+        queued = [file_info for file_info in new_files
+                  if self.scheduler.enqueue(file_info, file_info['folder_id'],
+                                            retry=file_info['id'] in self.retry_scheduler.failures)]
+        if not queued:
             print("📭 No new files found")
             return 0
         
-        print(f"🆕 Found {len(new_files)} new file(s) to process:")
-        for file_info in new_files:
+        print(f"🆕 Found {len(queued)} new file(s) to process:")
+        for file_info in queued:
             print(f"   - {file_info['name']} (ID: {file_info['id']})")
+        return len(queued)
+    
+    def _admit_files(self):
+        """
+        Start queued files in scheduling order while the global and per-folder
+        caps allow and the pipeline has room, without waiting for it.
+        """
+        # The pipeline is loaded on first use
+        from dataset_processor import DatasetPipeline
+        
+        while len(self._in_flight) < self.max_concurrent_files and self.scheduler.has_pending():
+            if self._pipeline is None:
+                self._pipeline = DatasetPipeline(self.stage_workers)
+            if not self._pipeline.has_room():
+                return
+            entry = self.scheduler.next_ready()
+            if entry is None:
+                return
+            file_info = entry["file_info"]
+            if not self._start_file(file_info):
+                self.scheduler.complete(file_info['id'])
+                continue
+            self._in_flight.add(file_info['id'])
+            self._submit(file_info)
+    
+    def _submit(self, file_info: Dict[str, Any]):
+        started_at = time.time()
+        stage_timer = StageTimer()
+        
+        def on_done(result: Dict[str, Any]):
+            succeeded = False
+            try:
+                succeeded = self._finish_file(file_info, result, started_at, stage_timer)
+            finally:
+                self._finished.put((file_info['id'], succeeded))
         
+        self._pipeline.submit(file_info['id'], on_done,
+                              profile_mode=self._profile_mode_for(file_info.get('folder_id', self.server_folder_id)),
+                              progress_callback=stage_timer)
+    
+    def _process_until(self, deadline) -> int:
+        """
+        Run queued files through the pipeline until `deadline` (a timestamp),
+        or with None until nothing is queued or in flight.
+        
+        Files go through the staged dataset pipeline, so one file downloads
+        while another is analysed and a third is published; up to
+        `max_concurrent_files` files are in the pipeline at once. Files still
+        in flight at the deadline keep going, so the next check is not held
+        up by a large file. Returns the number of files processed.
+        """
         processed_count = 0
-        for file_info in new_files:
-            if self._process_file(file_info):
-                processed_count += 1
+        while True:
+            self._admit_files()
+            if deadline is None and not self._in_flight and not self.scheduler.has_pending():
+                return processed_count
             
-            # Small delay between files
-            if len(new_files) > 1:
-                time.sleep(2)
-        
-        return processed_count
+            timeout = STATUS_HEARTBEAT_SECONDS
+            if self.scheduler.has_pending() and len(self._in_flight) < self.max_concurrent_files:
+                timeout = ADMISSION_RECHECK_SECONDS
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.time())
+                if timeout <= 0:
+                    return processed_count
+            
+            try:
+                file_id, succeeded = self._finished.get(timeout=timeout)
+            except queue.Empty:
+                if self._in_flight:
+                    # Long-running files: let the dashboard know the processor is alive
+                    self._publish_status()
+                continue
+            self._in_flight.discard(file_id)
+            self.scheduler.complete(file_id)
+            if succeeded:
+                processed_count += 1
+    
+    def _close_pipeline(self):
+        """Wait for the files in flight and stop the pipeline's workers."""
+        pipeline = self._pipeline
+        if pipeline is None:
+            return
+        pipeline.close()
+        self._pipeline = None
+        self._last_stage_metrics = pipeline.metrics()
+    
+    def _stage_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Utilization of the pipeline stages since the pipeline started (or of the last one)."""
+        pipeline = self._pipeline
+        return pipeline.metrics() if pipeline else self._last_stage_metrics
     
     def run_continuous(self):
         """Run continuous monitoring."""
         print("🤖 MCP Auto Dataset Processor Started")
         print("=" * 50)
-        print(f"📁 Monitoring folder: {self.server_folder_id}")
+        print(f"📁 Monitoring folder(s): {', '.join(self.folder_ids)}")
         print(f"⏱️  Check interval: {self.check_interval} seconds")
         print(f"🛑 Press Ctrl+C to stop")
         
+        self._publish_status("running")
+        consecutive_errors = 0
         try:
             while True:
                 try:
-                    processed_count = self.run_once()
+                    self._check_for_new_files()
+                    consecutive_errors = 0
+                    
+                    # Check again on schedule, sooner while uploads are settling, longer
+                    # if Drive calls are being rejected - even while files are in flight
+                    wait = self.check_interval
+                    recheck_after = self.readiness.recheck_after()
+                    if recheck_after is not None:
+                        wait = min(wait, max(1.0, recheck_after))
+                    wait = max(wait, get_drive_governor().circuit.retry_after())
+                    self._next_check_at = time.time() + wait
+                    self._publish_status()
+                    print(f"\n💤 Next check in {wait:.0f} seconds"
+                          + (f" ({len(self._in_flight)} file(s) in progress)" if self._in_flight else "") + "...")
+                    processed_count = self._process_until(self._next_check_at)
                     
                     if processed_count > 0:
-                        print(f"\n✨ Processed {processed_count} file(s) in this cycle")
+                        print(f"\n✨ Processed {processed_count} file(s) since the last check")
                     
                     self._print_status()
                     
-                    # Wait before next check
-                    print(f"\n💤 Waiting {self.check_interval} seconds before next check...")
-                    time.sleep(self.check_interval)
-                    
                 except KeyboardInterrupt:
                     raise
                 except Exception as e:
+                    consecutive_errors += 1
+                    backoff = min(ERROR_BACKOFF_MAX_SECONDS, self.check_interval * 2 ** consecutive_errors)
+                    wait = max(random.uniform(backoff / 2, backoff), get_drive_governor().circuit.retry_after())
                     print(f"❌ Error in monitoring cycle: {e}")
-                    print("⏳ Waiting 60 seconds before retry...")
-                    time.sleep(60)
+                    print(f"⏳ Waiting {wait:.0f} seconds before retry...")
+                    self._next_check_at = time.time() + wait
+                    self._publish_status("error", error=str(e)[:200])
+                    # Files already in the pipeline keep going meanwhile
+                    self._process_until(self._next_check_at)
                     
         except KeyboardInterrupt:
             print(f"\n\n🛑 Auto processor stopped by user")
+            self._stopped = True
+            self._publish_status("stopped")
             print(f"📊 Total files processed: {len(self.processed_files)}")
     
     def list_processed_files(self):
@@ -216,16 +719,56 @@ class AutoDatasetProcessor:
             print(f"📄 {info['filename']}")
             print(f"   🕐 Processed: {processed_time}")
             print(f"   📊 Size: {info['row_count']:,} rows × {info['column_count']} columns")
-            print(f"   🔍 DQ Rules: {info['dq_rules_count']}")
+            print(f"   🔍 DQ Rules: {info.get('dq_rules_count', 'n/a')}")
             print(f"   📁 Output: {info['output_folder']}")
             print()
     
+    def list_failed_files(self):
+        """List failed files with their retry schedule."""
+        failures = self.retry_scheduler.entries()
+        if not failures:
+            print("✅ No failed files.")
+            return
+        
+        print(f"🔁 Failed Files ({len(failures)} total):")
+        print("-" * 80)
+        
+        for failure in failures:
+            print(f"📄 {failure['filename']} (ID: {failure['file_id']})")
+            print(f"   🔢 Attempts: {failure['attempts']}/{self.retry_scheduler.max_attempts}")
+            if failure['status'] == "dead_letter":
+                print(f"   ☠️  Dead-lettered")
+            else:
+                print(f"   ⏰ Next retry: {datetime.fromtimestamp(failure['next_retry_at']).strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f"   ❌ Last error: {failure['last_error']}")
+            print()
+    
+    def requeue_failed_files(self, file_id: str = None):
+        """Retry one failed file, or every dead-lettered file, on the next cycle."""
+        file_ids = [file_id] if file_id else [failure['file_id'] for failure in self.retry_scheduler.entries("dead_letter")]
+        count = self.retry_scheduler.requeue(file_id)
+        if self.leases:
+            # The file may have been failed by another instance, which holds it
+            count = max(count, sum(self.leases.store.reset(fid) for fid in file_ids))
+        print(f"🔄 Requeued {count} file(s) for processing.")
+    
     def reset_processed_files(self):
         """Reset the processed files log (for testing)."""
         self.processed_files = {}
         self._save_processed_files()
         print("🔄 Processed files log has been reset.")
 
+def parse_stage_workers(value: str) -> Dict[str, int]:
+    """Parse "download=3,analyze=2" into per-stage worker counts."""
+    workers = {}
+    for item in filter(None, value.split(',')):
+        stage, _, count = item.partition('=')
+        try:
+            workers[stage.strip()] = int(count)
+        except ValueError:
+            raise ValueError(f"Invalid stage worker count '{item}'; expected STAGE=N")
+    return workers
+
 def main():
     import argparse
     
@@ -238,16 +781,44 @@ def main():
                        help='List all processed files')
     parser.add_argument('--reset', action='store_true', 
                        help='Reset processed files log')
+    parser.add_argument('--failed', action='store_true',
+                       help='List failed files and their retry schedule')
+    parser.add_argument('--requeue', nargs='?', const='', metavar='FILE_ID',
+                       help='Retry a failed file on the next cycle (all dead-lettered files if no ID is given)')
+    parser.add_argument('--profile-mode', choices=['exact', 'sampled'], default='exact',
+                       help='Profile mode for processed files (default: exact)')
+    parser.add_argument('--policy', choices=['size', 'age', 'priority'], default='size',
+                       help='Order of waiting files (default: size, smallest first)')
+    parser.add_argument('--max-concurrent', type=int, default=DEFAULT_MAX_CONCURRENT_FILES,
+                       help=f'Files processed at the same time (default: {DEFAULT_MAX_CONCURRENT_FILES})')
+    parser.add_argument('--lease-store', metavar='PATH',
+                       help='Lease store shared with other instances (enables coordinated mode)')
+    parser.add_argument('--lease-backend', choices=['sqlite', 'file'], default='sqlite',
+                       help='Lease store backend: SQLite database or local directory (default: sqlite)')
+    parser.add_argument('--lease-ttl', type=int, default=DEFAULT_LEASE_TTL_SECONDS,
+                       help=f'Seconds before an unresponsive instance loses its files (default: {DEFAULT_LEASE_TTL_SECONDS})')
+    parser.add_argument('--stage-workers', metavar='STAGE=N,...', default='',
+                       help='Workers per pipeline stage, e.g. download=3,analyze=2 (default: '
+                            + ','.join(f'{stage}={count}' for stage, count in DEFAULT_STAGE_WORKERS.items()) + ')')
     
     args = parser.parse_args()
     
     try:
-        processor = AutoDatasetProcessor(check_interval=args.interval)
+        processor = AutoDatasetProcessor(check_interval=args.interval, profile_mode=args.profile_mode,
+                                         scheduling_policy=args.policy,
+                                         max_concurrent_files=args.max_concurrent,
+                                         lease_store=args.lease_store, lease_backend=args.lease_backend,
+                                         lease_ttl=args.lease_ttl,
+                                         stage_workers=parse_stage_workers(args.stage_workers))
         
         if args.list:
             processor.list_processed_files()
         elif args.reset:
             processor.reset_processed_files()
+        elif args.failed:
+            processor.list_failed_files()
+        elif args.requeue is not None:
+            processor.requeue_failed_files(args.requeue or None)
         elif args.once:
             print("🔍 Running single check cycle...")
             processed_count = processor.run_once()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the CLIs and the MCP server.
+
+Each scenario runs in a fresh interpreter (as an MCP client spawning the
+stdio server would) and is timed from the first import to the end of its
+listing call. The listing paths must finish within STARTUP_BUDGET_MS and
+must not load the processing pipeline's heavy dependencies.
+
+The MCP SDK takes a sizeable, fixed share of the server's import time on its
+own, so the server is measured against it: the budget applies to what the
+server adds on top of the SDK.
+
+Usage:
+    python benchmark_startup.py [--runs N]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+STARTUP_BUDGET_MS = 200
+
+# Modules that only the processing pipeline needs
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "googleapiclient.discovery")
+
+_HARNESS = """
+import contextlib, io, json, sys, time
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+{body}
+elapsed = (time.perf_counter() - start) * 1000
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"ms": elapsed, "heavy": heavy}}))
+"""
+
+SCENARIOS = {
+    "mcp SDK (baseline)": """
+    import mcp.server, mcp.server.stdio, mcp.types, pydantic""",
+    "mcp_server list_processed_datasets": """
+    import asyncio, mcp_server
+    asyncio.run(mcp_server.handle_call_tool("list_processed_datasets", {"limit": 20}))""",
+    "dataset_manager list": """
+    import dataset_manager
+    dataset_manager.list_datasets(limit=20)""",
+    "processor_dashboard import": """
+    import processor_dashboard""",
+    "auto_processor import": """
+    import auto_processor""",
+}
+
+# Scenario -> baseline scenario subtracted before comparing with the budget
+BUDGETED = {
+    "mcp_server list_processed_datasets": "mcp SDK (baseline)",
+    "dataset_manager list": None,
+}
+
+
+def run_scenario(body: str) -> dict:
+    code = _HARNESS.format(body=body, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark")
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per scenario (default: 5)')
+    args = parser.parse_args()
+
+    print(f"⏱️  Cold-start benchmark (median of {args.runs} runs, budget {STARTUP_BUDGET_MS} ms)")
+    print("=" * 70)
+
+    medians = {}
+    heavy_loaded = {}
+    for name, body in SCENARIOS.items():
+        runs = [run_scenario(body) for _ in range(args.runs)]
+        medians[name] = statistics.median(run["ms"] for run in runs)
+        heavy_loaded[name] = runs[-1]["heavy"]
+        heavy = f"  (loads {', '.join(heavy_loaded[name])})" if heavy_loaded[name] else ""
+        print(f"{name:40} {medians[name]:8.1f} ms{heavy}")
+
+    print()
+    failures = 0
+    for name, baseline in BUDGETED.items():
+        cost = medians[name] - (medians[baseline] if baseline else 0)
+        label = f"{name} (over {baseline})" if baseline else name
+        ok = cost < STARTUP_BUDGET_MS and not heavy_loaded[name]
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {label}: {cost:.1f} ms")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
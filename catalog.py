@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Persistent local catalog of processed datasets.
+
+The catalog is a small SQLite index stored next to the datasets
+(`processed_datasets/catalog.db`). It is updated whenever a dataset is
+written, so listing and lookup never have to walk the output folder or
+parse every `_metadata.json`. If the index is missing it is rebuilt from
+disk on first use.
+
+Every column of every dataset is indexed as well (name, name tokens, dtype
+and key statistics), so questions like "which datasets have a customer_id
+column with more than 5% nulls" are answered by `search_columns` with a
+single indexed query.
+"""
+
+import os
+import re
+import sqlite3
+import time
+from contextlib import closing
+from typing import Dict, List, Any, Iterator, Optional
+from artifact_format import find_artifact, read_json_artifact
+
+CATALOG_FILENAME = "catalog.db"
+
+# Bumped whenever the schema changes; older indexes are rebuilt from disk
+SCHEMA_VERSION = 2
+
+# Columns that listings may be sorted by
+SORTABLE_FIELDS = ("processed_date", "dataset_name", "row_count", "column_count")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    dataset_name TEXT PRIMARY KEY,
+    folder_path TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    column_count INTEGER NOT NULL,
+    processed_date REAL NOT NULL,
+    file_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_datasets_processed_date ON datasets (processed_date);
+CREATE INDEX IF NOT EXISTS idx_datasets_file_id ON datasets (file_id);
+CREATE TABLE IF NOT EXISTS columns (
+    dataset_name TEXT NOT NULL,
+    column_index INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    data_type TEXT NOT NULL,
+    null_percentage REAL,
+    unique_count INTEGER,
+    min_value REAL,
+    max_value REAL,
+    PRIMARY KEY (dataset_name, column_index)
+);
+CREATE INDEX IF NOT EXISTS idx_columns_name ON columns (name_lower);
+CREATE INDEX IF NOT EXISTS idx_columns_data_type ON columns (data_type);
+CREATE TABLE IF NOT EXISTS column_tokens (
+    token TEXT NOT NULL,
+    dataset_name TEXT NOT NULL,
+    column_index INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_column_tokens_token ON column_tokens (token);
+CREATE INDEX IF NOT EXISTS idx_column_tokens_dataset ON column_tokens (dataset_name);
+"""
+
+_FIELDS = ("dataset_name", "folder_path", "filename", "row_count", "column_count", "processed_date", "file_id")
+_COLUMN_FIELDS = ("dataset_name", "column_index", "name", "name_lower", "data_type",
+                  "null_percentage", "unique_count", "min_value", "max_value")
+
+
+def column_name_tokens(name: str) -> List[str]:
+    """Split a column name into lowercase search tokens ("customerID_v2" -> customer, id, v2)."""
+    spaced = re.sub(r'([a-z0-9])([A-Z])', r'\1 \2', str(name))
+    return sorted({token for token in re.split(r'[^0-9a-zA-Z]+', spaced.lower()) if token})
+
+
+def _column_rows(dataset_name: str, columns: List[Dict[str, Any]]) -> List[tuple]:
+    rows = []
+    for i, col in enumerate(columns):
+        name = str(col.get('name'))
+        rows.append((dataset_name, i, name, name.lower(), col.get('data_type', 'unknown'),
+                     col.get('null_percentage'), col.get('unique_count'),
+                     col.get('min_value'), col.get('max_value')))
+    return rows
+
+
+def _token_rows(dataset_name: str, columns: List[Dict[str, Any]]) -> List[tuple]:
+    return [(token, dataset_name, i)
+            for i, col in enumerate(columns)
+            for token in column_name_tokens(col.get('name'))]
+
+
+def scan_dataset_folders(output_folder: str) -> Iterator[Dict[str, Any]]:
+    """Yield a catalog entry for every valid dataset folder on disk."""
+    if not os.path.exists(output_folder):
+        return
+
+    for item in os.listdir(output_folder):
+        item_path = os.path.join(output_folder, item)
+        if os.path.isdir(item_path):
+            # Check if it's a valid dataset folder
+            readme_path = os.path.join(item_path, "README.md")
+            metadata_path = find_artifact(item_path, f"{item}_metadata")
+
+            if os.path.exists(readme_path) and metadata_path:
+                try:
+                    metadata = read_json_artifact(metadata_path)
+
+                    yield {
+                        "dataset_name": item,
+                        "folder_path": item_path,
+                        "filename": metadata.get('filename', 'Unknown'),
+                        "row_count": metadata.get('row_count', 0),
+                        "column_count": metadata.get('column_count', 0),
+                        "processed_date": os.path.getctime(item_path),
+                        "file_id": metadata.get('source_file_id'),
+                        "columns": metadata.get('columns', [])
+                    }
+                except Exception as e:
+                    print(f"Error reading metadata for {item}: {e}")
+
+
+class DatasetCatalog:
+    """SQLite-backed index of the datasets in an output folder."""
+
+    def __init__(self, output_folder: str = "processed_datasets"):
+        self.output_folder = output_folder
+        self.db_path = os.path.join(output_folder, CATALOG_FILENAME)
+        self._ensure_index()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _ensure_index(self):
+        """Create the index, rebuilding it from disk if it is missing or outdated."""
+        if os.path.exists(self.db_path):
+            with closing(self._connect()) as conn:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version == SCHEMA_VERSION:
+                return
+        elif not os.path.exists(self.output_folder):
+            # Nothing to index; the database is created on the first write
+            return
+        self.rebuild()
+
+    def _write_columns(self, conn: sqlite3.Connection, dataset_name: str, columns: List[Dict[str, Any]]):
+        conn.execute("DELETE FROM columns WHERE dataset_name = ?", (dataset_name,))
+        conn.execute("DELETE FROM column_tokens WHERE dataset_name = ?", (dataset_name,))
+        conn.executemany(
+            f"INSERT INTO columns ({', '.join(_COLUMN_FIELDS)}) VALUES ({', '.join('?' * len(_COLUMN_FIELDS))})",
+            _column_rows(dataset_name, columns)
+        )
+        conn.executemany("INSERT INTO column_tokens (token, dataset_name, column_index) VALUES (?, ?, ?)",
+                         _token_rows(dataset_name, columns))
+
+    def rebuild(self) -> int:
+        """Re-create the index from the dataset folders on disk. Returns the dataset count."""
+        os.makedirs(self.output_folder, exist_ok=True)
+        entries = list(scan_dataset_folders(self.output_folder))
+        with closing(self._connect()) as conn, conn:
+            # Drop everything so indexes from older schema versions are replaced
+            conn.executescript("DROP TABLE IF EXISTS datasets; DROP TABLE IF EXISTS columns; "
+                               "DROP TABLE IF EXISTS column_tokens;" + _SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.executemany(
+                f"INSERT INTO datasets ({', '.join(_FIELDS)}) VALUES ({', '.join('?' * len(_FIELDS))})",
+                [tuple(entry[field] for field in _FIELDS) for entry in entries]
+            )
+            for entry in entries:
+                self._write_columns(conn, entry["dataset_name"], entry["columns"])
+        return len(entries)
+
+    def upsert(self, dataset_name: str, folder_path: str, metadata: Dict[str, Any],
+               file_id: Optional[str] = None, processed_date: Optional[float] = None):
+        """Add or replace the catalog entry for a dataset."""
+        os.makedirs(self.output_folder, exist_ok=True)
+        entry = {
+            "dataset_name": dataset_name,
+            "folder_path": folder_path,
+            "filename": metadata.get('filename', 'Unknown'),
+            "row_count": metadata.get('row_count', 0),
+            "column_count": metadata.get('column_count', 0),
+            "processed_date": processed_date or time.time(),
+            "file_id": file_id
+        }
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            with conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO datasets ({', '.join(_FIELDS)}) VALUES ({', '.join('?' * len(_FIELDS))})",
+                    tuple(entry[field] for field in _FIELDS)
+                )
+                self._write_columns(conn, dataset_name, metadata.get('columns', []))
+
+    def remove(self, dataset_name: str):
+        """Drop a dataset from the index."""
+        if not os.path.exists(self.db_path):
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM datasets WHERE dataset_name = ?", (dataset_name,))
+            conn.execute("DELETE FROM columns WHERE dataset_name = ?", (dataset_name,))
+            conn.execute("DELETE FROM column_tokens WHERE dataset_name = ?", (dataset_name,))
+
+    def _prune_missing(self):
+        """Drop entries whose dataset folder was deleted outside the pipeline."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT dataset_name, folder_path FROM datasets").fetchall()
+        for row in rows:
+            if not os.path.isdir(row["folder_path"]):
+                self.remove(row["dataset_name"])
+
+    def get(self, dataset_name: str) -> Optional[Dict[str, Any]]:
+        """Look up a dataset by name; stale entries whose folder is gone are dropped."""
+        if not os.path.exists(self.db_path):
+            return None
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM datasets WHERE dataset_name = ?", (dataset_name,)).fetchone()
+        if row is None:
+            return None
+        if not os.path.isdir(row["folder_path"]):
+            self.remove(dataset_name)
+            return None
+        return dict(row)
+
+    def find_by_file_id(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Look up the dataset produced from a Google Drive file."""
+        if not os.path.exists(self.db_path):
+            return None
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM datasets WHERE file_id = ?", (file_id,)).fetchone()
+        if row is None:
+            return None
+        if not os.path.isdir(row["folder_path"]):
+            self.remove(row["dataset_name"])
+            return None
+        return dict(row)
+
+    def list(self, offset: int = 0, limit: Optional[int] = None,
+             sort_by: str = "processed_date", descending: bool = True) -> List[Dict[str, Any]]:
+        """Return a page of catalog entries in sorted order; stale entries are dropped first."""
+        if sort_by not in SORTABLE_FIELDS:
+            raise ValueError(f"Cannot sort by '{sort_by}'. Expected one of: {', '.join(SORTABLE_FIELDS)}")
+        if not os.path.exists(self.db_path):
+            return []
+        self._prune_missing()
+
+        query = f"SELECT * FROM datasets ORDER BY {sort_by} {'DESC' if descending else 'ASC'}, dataset_name"
+        params: List[Any] = []
+        if limit is not None:
+            query += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        elif offset:
+            query += " LIMIT -1 OFFSET ?"
+            params.append(offset)
+
+        with closing(self._connect()) as conn:
+            return [dict(row) for row in conn.execute(query, params)]
+
+    def count(self) -> int:
+        """Number of datasets in the index, not counting stale entries."""
+        if not os.path.exists(self.db_path):
+            return 0
+        self._prune_missing()
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM datasets").fetchone()[0]
+
+    def search_columns(self, name: Optional[str] = None, query: Optional[str] = None,
+                       data_type: Optional[str] = None,
+                       min_null_percentage: Optional[float] = None,
+                       max_null_percentage: Optional[float] = None,
+                       min_unique_count: Optional[int] = None,
+                       max_unique_count: Optional[int] = None,
+                       limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Find columns across all processed datasets.
+
+        Args:
+            name: Exact column name (case-insensitive)
+            query: Words that must all appear in the column name ("customer id"
+                matches customer_id, CustomerID and id_customer)
+            data_type: Data type, or a prefix of it ("int" matches int8..int64)
+            min_null_percentage / max_null_percentage: Null percentage bounds
+            min_unique_count / max_unique_count: Distinct count bounds
+            limit: Maximum number of matches
+
+        Returns:
+            Matching columns with their dataset name, position and statistics
+        """
+        if not os.path.exists(self.db_path):
+            return []
+        self._prune_missing()
+
+        clauses = []
+        params: List[Any] = []
+        if name is not None:
+            clauses.append("c.name_lower = ?")
+            params.append(name.lower())
+        for token in column_name_tokens(query) if query else []:
+            clauses.append("EXISTS (SELECT 1 FROM column_tokens t WHERE t.token = ? "
+                           "AND t.dataset_name = c.dataset_name AND t.column_index = c.column_index)")
+            params.append(token)
+        if data_type is not None:
+            clauses.append("(c.data_type = ? OR c.data_type LIKE ? ESCAPE '\\')")
+            params += [data_type, data_type.replace('%', '\\%').replace('_', '\\_') + '%']
+        for sql, value in (("c.null_percentage >= ?", min_null_percentage),
+                           ("c.null_percentage <= ?", max_null_percentage),
+                           ("c.unique_count >= ?", min_unique_count),
+                           ("c.unique_count <= ?", max_unique_count)):
+            if value is not None:
+                clauses.append(sql)
+                params.append(value)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (f"SELECT c.*, d.row_count, d.folder_path FROM columns c "
+               f"JOIN datasets d ON d.dataset_name = c.dataset_name {where} "
+               f"ORDER BY c.dataset_name, c.column_index LIMIT ?")
+        params.append(limit)
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [{key: row[key] for key in row.keys() if key != "name_lower"} for row in rows]
+
+
+def list_processed_datasets(output_folder: str = "processed_datasets", offset: int = 0,
+                            limit: int = None, sort_by: str = "processed_date",
+                            descending: bool = True) -> List[Dict[str, Any]]:
+    """
+    List processed datasets from the local catalog index.
+
+    Args:
+        output_folder: Base folder containing the processed datasets
+        offset: Number of datasets to skip
+        limit: Maximum number of datasets to return (all when None)
+        sort_by: One of processed_date, dataset_name, row_count, column_count
+        descending: Sort order
+    """
+    return DatasetCatalog(output_folder).list(offset=offset, limit=limit, sort_by=sort_by, descending=descending)
+
+
+def get_processed_dataset(dataset_name: str, output_folder: str = "processed_datasets") -> Dict[str, Any]:
+    """Look up a single processed dataset by name. Returns None if it does not exist."""
+    return DatasetCatalog(output_folder).get(dataset_name)
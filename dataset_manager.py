@@ -7,13 +7,13 @@ import os
 import sys
 import argparse
 from dotenv import load_dotenv
-from dataset_processor import process_dataset_with_organization, list_processed_datasets
+from catalog import DatasetCatalog, SORTABLE_FIELDS, list_processed_datasets, get_processed_dataset
 
 load_dotenv()
 
-def list_datasets():
-    """List all processed datasets."""
-    datasets = list_processed_datasets()
+def list_datasets(offset: int = 0, limit: int = None, sort_by: str = "processed_date"):
+    """List processed datasets."""
+    datasets = list_processed_datasets(offset=offset, limit=limit, sort_by=sort_by)
     
     if not datasets:
         print("📭 No processed datasets found.")
@@ -22,7 +22,7 @@ def list_datasets():
     print(f"📊 Found {len(datasets)} processed dataset(s):")
     print("-" * 80)
     
-    for i, dataset in enumerate(datasets, 1):
+    for i, dataset in enumerate(datasets, offset + 1):
         print(f"{i:2d}. {dataset['dataset_name']}")
         print(f"    📄 File: {dataset['filename']}")
         print(f"    📊 Size: {dataset['row_count']:,} rows × {dataset['column_count']} columns")
@@ -31,6 +31,9 @@ def list_datasets():
 
 def process_new_dataset(file_id: str):
     """Process a new dataset."""
+    # The pipeline (pandas, Google client) is only loaded by commands that process data
+    from dataset_processor import process_dataset_with_organization
+    
     print(f"🚀 Processing dataset with file ID: {file_id}")
     result = process_dataset_with_organization(file_id)
     
@@ -43,8 +46,7 @@ def process_new_dataset(file_id: str):
 
 def show_dataset_info(dataset_name: str):
     """Show detailed information about a specific dataset."""
-    datasets = list_processed_datasets()
-    dataset = next((d for d in datasets if d['dataset_name'] == dataset_name), None)
+    dataset = get_processed_dataset(dataset_name)
     
     if not dataset:
         print(f"❌ Dataset '{dataset_name}' not found.")
@@ -59,15 +61,20 @@ def show_dataset_info(dataset_name: str):
     else:
         print(f"❌ README file not found for dataset '{dataset_name}'")
 
+def reindex_datasets():
+    """Rebuild the dataset catalog index from the folders on disk."""
+    count = DatasetCatalog().rebuild()
+    print(f"✅ Catalog rebuilt: {count} dataset(s) indexed.")
+
 def clean_datasets():
     """Remove all processed datasets."""
-    datasets = list_processed_datasets()
+    dataset_count = DatasetCatalog().count()
     
-    if not datasets:
+    if not dataset_count:
         print("📭 No datasets to clean.")
         return
     
-    confirm = input(f"⚠️  Are you sure you want to delete {len(datasets)} dataset(s)? (y/N): ")
+    confirm = input(f"⚠️  Are you sure you want to delete {dataset_count} dataset(s)? (y/N): ")
     if confirm.lower() != 'y':
         print("❌ Operation cancelled.")
         return
@@ -75,7 +82,7 @@ def clean_datasets():
     import shutil
     try:
         shutil.rmtree("processed_datasets")
-        print(f"✅ Successfully removed {len(datasets)} dataset(s).")
+        print(f"✅ Successfully removed {dataset_count} dataset(s).")
     except Exception as e:
         print(f"❌ Error cleaning datasets: {e}")
 
@@ -84,7 +91,10 @@ def main():
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
     # List command
-    subparsers.add_parser('list', help='List all processed datasets')
+    list_parser = subparsers.add_parser('list', help='List processed datasets')
+    list_parser.add_argument('--offset', type=int, default=0, help='Number of datasets to skip')
+    list_parser.add_argument('--limit', type=int, help='Maximum number of datasets to show')
+    list_parser.add_argument('--sort-by', choices=SORTABLE_FIELDS, default='processed_date', help='Sort field')
     
     # Process command
     process_parser = subparsers.add_parser('process', help='Process a new dataset')
@@ -94,6 +104,9 @@ def main():
     info_parser = subparsers.add_parser('info', help='Show dataset information')
     info_parser.add_argument('dataset_name', help='Dataset name')
     
+    # Reindex command
+    subparsers.add_parser('reindex', help='Rebuild the dataset catalog index from disk')
+    
     # Clean command
     subparsers.add_parser('clean', help='Remove all processed datasets')
     
@@ -107,11 +120,13 @@ def main():
     print("=" * 30)
     
     if args.command == 'list':
-        list_datasets()
+        list_datasets(args.offset, args.limit, args.sort_by)
     elif args.command == 'process':
         process_new_dataset(args.file_id)
     elif args.command == 'info':
         show_dataset_info(args.dataset_name)
+    elif args.command == 'reindex':
+        reindex_datasets()
     elif args.command == 'clean':
         clean_datasets()
 
@@ -4,211 +4,389 @@ Centralized dataset processing module for both local and server use.
 """
 
 import os
-import json
+import tempfile
 import pandas as pd
 from io import BytesIO
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Callable, Optional
+from profiler import dataframe_schema
 from utils import (
     get_drive_service,
     download_file_from_drive,
+    download_file_to_path,
+    download_file_ranges,
     extract_metadata_from_dataframe,
+    extract_metadata_from_chunks,
     suggest_dq_rules,
     create_contract_excel,
     generate_dq_report
 )
+from catalog import DatasetCatalog, list_processed_datasets, get_processed_dataset
+from artifact_store import create_staging_folder, discard_staging_folder, publish_dataset
+from artifact_format import artifact_settings, normalize_dq_report, write_json_artifact
+from drive_metadata import get_file_metadata
+from ingestion import (
+    DatasetSource,
+    read_csv_source,
+    read_csv_optimized,
+    read_csv_chunks_optimized,
+    optimize_dataframe_dtypes,
+    source_size
+)
+from sampling import (
+    DEFAULT_SAMPLE_SIZE,
+    block_ranges,
+    reservoir_sample,
+    extract_sampled_metadata,
+    sample_csv_blocks
+)
+from pipeline_config import PIPELINE_STAGES, STAGE_QUEUED, download_mode, validate_profile_mode, validate_stage_workers
+from readme_renderer import write_readme
+from stage_pipeline import StagePipeline, DEFAULT_STAGE_QUEUE_SIZE
+
+# Rows read per chunk when streaming a CSV through the reservoir sampler
+SAMPLE_CHUNK_ROWS = 100_000
+
+# CSVs at least this large are profiled in streamed chunks in exact mode
+STREAMING_PROFILE_MIN_BYTES = 256 * 1024 * 1024
+STREAMING_CHUNK_ROWS = 500_000
+
+
+def read_dataframe(file_content: DatasetSource, filename: str, optimize_dtypes: bool = True) -> pd.DataFrame:
+    """
+    Read CSV or Excel file content (or a downloaded file, by path) into a DataFrame.
+    
+    With `optimize_dtypes`, strings are read as categoricals, Arrow strings or
+    datetimes and numbers are downcast (see ingestion.py).
+    """
+    if filename.lower().endswith('.csv'):
+        if optimize_dtypes:
+            return read_csv_optimized(file_content)
+        return read_csv_source(file_content)
+    elif filename.lower().endswith(('.xlsx', '.xls')):
+        df = pd.read_excel(BytesIO(file_content) if isinstance(file_content, bytes) else file_content)
+        return optimize_dataframe_dtypes(df) if optimize_dtypes else df
+    else:
+        raise ValueError("Unsupported file format. Only CSV and Excel files are supported.")
+
+def _stage_reporter(progress_callback: Optional[Callable[..., None]], stage: str) -> Optional[Callable[..., None]]:
+    """Bind a pipeline progress callback to one stage, for helpers that only report details."""
+    if progress_callback is None:
+        return None
+    return lambda **details: progress_callback(stage, **details)
+
+def profile_file_content(file_content: DatasetSource, filename: str, profile_mode: str = "exact",
+                         progress_callback: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+    """
+    Extract metadata from downloaded file content, or from a downloaded file
+    given by its path (CSV files are then memory-mapped, not read into memory).
+    
+    In "sampled" mode the rows are streamed through a reservoir sampler and
+    only the sample is profiled; small files that fit entirely in the sample
+    get an exact profile. `progress_callback` receives "profile" stage events
+    (see PIPELINE_STAGES), starting with the schema.
+    """
+    validate_profile_mode(profile_mode)
+    report = _stage_reporter(progress_callback, "profile")
+    if profile_mode == "exact":
+        if filename.lower().endswith('.csv') and source_size(file_content) >= STREAMING_PROFILE_MIN_BYTES:
+            # Large CSVs are profiled chunk by chunk instead of being loaded whole
+            chunks, original_dtypes = read_csv_chunks_optimized(file_content, STREAMING_CHUNK_ROWS)
+            return extract_metadata_from_chunks(chunks, filename, original_dtypes, report)
+        df = read_dataframe(file_content, filename)
+        if report:
+            report(schema=dataframe_schema(df), row_count=len(df))
+        return extract_metadata_from_dataframe(df, filename, progress_callback=report)
+    
+    if filename.lower().endswith('.csv'):
+        chunks = read_csv_source(file_content, chunksize=SAMPLE_CHUNK_ROWS)
+    else:
+        chunks = [read_dataframe(file_content, filename)]
+    
+    sample, rows_seen = reservoir_sample(chunks, DEFAULT_SAMPLE_SIZE)
+    if report:
+        report(schema=dataframe_schema(sample), row_count=rows_seen)
+    if len(sample) == rows_seen:
+        return extract_metadata_from_dataframe(sample, filename, progress_callback=report)
+    return extract_sampled_metadata(sample, filename, rows_seen)
+
+def extract_file_metadata(file_id: str, drive_service=None, profile_mode: str = "exact",
+                          progress_callback: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+    """
+    Extract metadata for a Google Drive file without running the full pipeline.
+    
+    In "sampled" mode large CSV files are never downloaded in full: a fixed
+    number of byte ranges spread across the file are fetched and profiled,
+    and the row count is estimated from the file size.
+    
+    `progress_callback` receives the "download" and "profile" stage events
+    described at PIPELINE_STAGES.
+    """
+    validate_profile_mode(profile_mode)
+    drive_service = drive_service or get_drive_service()
+    file_info = get_file_metadata(drive_service, file_id)
+    filename = file_info['name']
+    
+    if progress_callback:
+        progress_callback("download")
+    if profile_mode == "sampled" and filename.lower().endswith('.csv'):
+        ranges = block_ranges(int(file_info.get('size', 0)))
+        if len(ranges) > 1:
+            blocks = download_file_ranges(file_id, drive_service, ranges,
+                                          _stage_reporter(progress_callback, "download"))
+            if progress_callback:
+                progress_callback("profile")
+            return sample_csv_blocks(blocks, filename, int(file_info['size']))
+    
+    if download_mode() == "disk":
+        with tempfile.TemporaryDirectory(prefix="extract-") as download_dir:
+            path = os.path.join(download_dir, filename)
+            download_file_to_path(file_id, drive_service, path, _stage_reporter(progress_callback, "download"))
+            if progress_callback:
+                progress_callback("profile")
+            return profile_file_content(path, filename, profile_mode, progress_callback)
+    
+    file_content = download_file_from_drive(file_id, drive_service, _stage_reporter(progress_callback, "download"))
+    if progress_callback:
+        progress_callback("profile")
+    return profile_file_content(file_content, filename, profile_mode, progress_callback)
 
 def create_dataset_readme(metadata: Dict[str, Any], dq_rules: List[Dict[str, Any]], 
-                         dq_report: Dict[str, Any], readme_path: str):
+                         dq_report: Dict[str, Any], readme_path: str, **kwargs):
     """Create a comprehensive README file for the processed dataset."""
-    content = f"""# Dataset Processing Report
+    write_readme(readme_path, metadata, dq_rules, dq_report, **kwargs)
 
-## Dataset Information
-- **Filename**: {metadata['filename']}
-- **Rows**: {metadata['row_count']:,}
-- **Columns**: {metadata['column_count']}
-- **Processing Date**: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}
+def _new_job(file_id: str, output_folder: str, profile_mode: str,
+             progress_callback: Optional[Callable[..., None]]) -> Dict[str, Any]:
+    """State of one file travelling through the processing stages."""
+    validate_profile_mode(profile_mode)
+    return {"file_id": file_id, "output_folder": output_folder, "profile_mode": profile_mode,
+            "progress_callback": progress_callback, "staging_folder": None}
 
-## Column Details
-| Column Name | Data Type | Null Count | Null % | Unique Count | Min Value | Max Value | Mean |
-|-------------|-----------|------------|--------|--------------|-----------|-----------|------|
-"""
+def _report(job: Dict[str, Any], stage: str):
+    if job["progress_callback"]:
+        job["progress_callback"](stage)
+
+def _download_stage(job: Dict[str, Any]):
+    """Download the file and prepare its staging folder (network-bound)."""
+    file_id = job["file_id"]
+    job["artifact_settings"] = artifact_settings()
+    job["download_mode"] = download_mode()
+    print(f"Processing file ID: {file_id}")
+    _report(job, "download")
     
-    for col in metadata['columns']:
-        min_val = f"{col.get('min_value', 'N/A'):.4f}" if col.get('min_value') is not None else "N/A"
-        max_val = f"{col.get('max_value', 'N/A'):.4f}" if col.get('max_value') is not None else "N/A"
-        mean_val = f"{col.get('mean_value', 'N/A'):.4f}" if col.get('mean_value') is not None else "N/A"
-        
-        content += f"| {col['name']} | {col['data_type']} | {col['null_count']} | {col['null_percentage']:.1f}% | {col['unique_count']} | {min_val} | {max_val} | {mean_val} |\n"
+    # Step 1: Download and extract metadata
+    print("Step 1: Downloading file and extracting metadata...")
+    drive_service = get_drive_service()
+    
+    # Get file info (usually cached from the folder listing)
+    file_info = get_file_metadata(drive_service, file_id)
+    filename = job["filename"] = file_info['name']
     
-    content += f"""
-## Data Quality Summary
-- **Total Rules**: {dq_report['data_quality_summary']['total_rules']}
-- **Error Rules**: {dq_report['data_quality_summary']['error_rules']}
-- **Warning Rules**: {dq_report['data_quality_summary']['warning_rules']}
+    # Artifacts are written to a staging folder and published atomically at the end
+    job["base_name"] = filename.split('.')[0]
+    job["staging_folder"] = create_staging_folder(job["output_folder"], job["base_name"], file_id)
+    
+    # Download file: into memory, or straight to its place in the dataset folder
+    reporter = _stage_reporter(job["progress_callback"], "download")
+    if job["download_mode"] == "disk":
+        path = os.path.join(job["staging_folder"], filename)
+        download_file_to_path(file_id, drive_service, path, reporter)
+        job["file_content"] = path
+    else:
+        job["file_content"] = download_file_from_drive(file_id, drive_service, reporter)
+    print(f"Downloaded: {filename}")
 
-## Data Quality Rules
-"""
+def _analyze_stage(job: Dict[str, Any]):
+    """Profile the data and derive DQ rules, contract and DQ report (CPU-bound)."""
+    base_name = job["base_name"]
     
-    for rule in dq_rules:
-        severity_icon = "🔴" if rule['severity'] == 'error' else "🟡"
-        content += f"- {severity_icon} **{rule['rule_type'].upper()}**: {rule['description']}\n"
+    # Read file and extract metadata
+    _report(job, "profile")
+    metadata = profile_file_content(job["file_content"], job["filename"], job["profile_mode"], job["progress_callback"])
+    metadata["source_file_id"] = job["file_id"]
+    job["metadata"] = metadata
+    print(f"[OK] Extracted metadata ({metadata.get('profile_mode', 'exact')}): {metadata['row_count']} rows, {metadata['column_count']} columns")
     
-    content += f"""
-## Column Quality Metrics
-"""
+    # Step 2: Generate DQ rules
+    print("Step 2: Generating data quality rules...")
+    _report(job, "dq_rules")
+    job["dq_rules"] = suggest_dq_rules(metadata)
+    print(f"[OK] Generated {len(job['dq_rules'])} DQ rules")
     
-    for col_quality in dq_report['column_quality']:
-        content += f"- **{col_quality['column_name']}**: {col_quality['completeness']:.1f}% complete, {col_quality['uniqueness']:.1f}% unique\n"
+    # Step 3: Create contract Excel
+    print("Step 3: Creating contract Excel file...")
+    _report(job, "contract")
+    contract_name = f"{base_name}_contract.xlsx"
+    create_contract_excel(metadata, job["dq_rules"], os.path.join(job["staging_folder"], contract_name))
+    job["contract_name"] = contract_name
+    print(f"[OK] Created contract: {contract_name}")
     
-    content += f"""
-## Files Generated
-- `{metadata['filename']}` - Original dataset
-- `{metadata['filename'].split('.')[0]}_metadata.json` - Detailed metadata
-- `{metadata['filename'].split('.')[0]}_contract.xlsx` - Data contract with schema and DQ rules
-- `{metadata['filename'].split('.')[0]}_dq_report.json` - Comprehensive data quality report
-- `README.md` - This summary document
+    # Step 4: Generate DQ report
+    print("Step 4: Generating DQ report...")
+    _report(job, "dq_report")
+    job["dq_report"] = generate_dq_report(metadata, job["dq_rules"])
 
-## Usage
-This dataset has been processed through the MCP Dataset Onboarding pipeline. All artifacts are ready for catalog publication or further analysis.
-"""
+def _publish_stage(job: Dict[str, Any]):
+    """Write the remaining artifacts, publish the folder and index it (disk-bound)."""
+    artifact_format, compression = job["artifact_settings"]
+    staging_folder, output_folder = job["staging_folder"], job["output_folder"]
+    filename, base_name, file_id = job["filename"], job["base_name"], job["file_id"]
+    metadata, dq_rules, dq_report = job["metadata"], job["dq_rules"], job["dq_report"]
+    dataset_folder = os.path.join(output_folder, base_name)
+    
+    # Save artifacts in organized folder
+    _report(job, "save")
+    
+    # Save original dataset for reference (in disk mode it was downloaded there)
+    file_content = job.pop("file_content")
+    if job["download_mode"] == "memory":
+        with open(os.path.join(staging_folder, filename), 'wb') as f:
+            f.write(file_content)
+    
+    metadata_name = write_json_artifact(staging_folder, f"{base_name}_metadata", metadata,
+                                        artifact_format, compression)
+    stored_report = normalize_dq_report(dq_report, metadata) if artifact_format == "compact" else dq_report
+    dq_report_name = write_json_artifact(staging_folder, f"{base_name}_dq_report", stored_report,
+                                         artifact_format, compression)
+    
+    # Create a summary README for the dataset
+    create_dataset_readme(metadata, dq_rules, dq_report, os.path.join(staging_folder, "README.md"),
+                          metadata_file=metadata_name, dq_report_file=dq_report_name)
     
-    with open(readme_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    # Swap the complete dataset folder into place, then index it
+    publish_dataset(staging_folder, output_folder, base_name, {"source_file_id": file_id})
+    job["staging_folder"] = None
+    DatasetCatalog(output_folder).upsert(base_name, dataset_folder, metadata, file_id=file_id)
+    
+    original_filename = os.path.join(dataset_folder, filename)
+    metadata_filename = os.path.join(dataset_folder, metadata_name)
+    contract_filename = os.path.join(dataset_folder, job["contract_name"])
+    dq_report_filename = os.path.join(dataset_folder, dq_report_name)
+    readme_filename = os.path.join(dataset_folder, "README.md")
+    
+    print(f"[OK] Saved artifacts in folder: {dataset_folder}")
+    print(f"  - {os.path.basename(original_filename)} (original dataset)")
+    print(f"  - {os.path.basename(metadata_filename)} (metadata)")
+    print(f"  - {os.path.basename(contract_filename)} (contract)")
+    print(f"  - {os.path.basename(dq_report_filename)} (DQ report)")
+    print(f"  - {os.path.basename(readme_filename)} (summary)")
+    
+    job["result"] = {
+        "status": "success",
+        "output_folder": dataset_folder,
+        "files_created": [
+            original_filename,
+            metadata_filename, 
+            contract_filename, 
+            dq_report_filename,
+            readme_filename
+        ],
+        "metadata": metadata,
+        "dq_rules": dq_rules,
+        "dq_report": dq_report
+    }
+
+# The processing stages, in order, under the names of EXECUTION_STAGES
+DATASET_STAGES = (
+    ("download", _download_stage),
+    ("analyze", _analyze_stage),
+    ("publish", _publish_stage),
+)
 
-def process_dataset_with_organization(file_id: str, output_folder: str = "processed_datasets") -> Dict[str, Any]:
+def _finish_job(job: Dict[str, Any], error: Optional[BaseException]) -> Dict[str, Any]:
+    """Turn a finished (or failed) job into the result of process_dataset_with_organization."""
+    # A failed run leaves nothing behind; the previous version (if any) stays published
+    if job["staging_folder"] and os.path.isdir(job["staging_folder"]):
+        discard_staging_folder(job["staging_folder"])
+    job.pop("file_content", None)
+    if error is None:
+        return job["result"]
+    print(f"Error: {str(error)}")
+    import traceback
+    traceback.print_exception(type(error), error, error.__traceback__)
+    return {"status": "error", "message": str(error)}
+
+def process_dataset_with_organization(file_id: str, output_folder: str = "processed_datasets",
+                                      profile_mode: str = "exact",
+                                      progress_callback: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
     """
     Process dataset and organize all artifacts in a dedicated folder structure.
     
     Args:
         file_id: Google Drive file ID
         output_folder: Base folder for organizing processed datasets
+        profile_mode: "exact" for full statistics, "sampled" for a fast estimated profile
+        progress_callback: Called with each stage name in PIPELINE_STAGES as it starts,
+            and with progress details within the download and profile stages.
+            An exception raised by the callback aborts processing.
         
     Returns:
         Dictionary with processing results and file paths
     """
+    job = {"staging_folder": None}
     try:
-        print(f"Processing file ID: {file_id}")
-        
-        # Step 1: Download and extract metadata
-        print("Step 1: Downloading file and extracting metadata...")
-        drive_service = get_drive_service()
-        
-        # Download file
-        file_content = download_file_from_drive(file_id, drive_service)
-        
-        # Get file info
-        file_info = drive_service.files().get(fileId=file_id).execute()
-        filename = file_info['name']
-        print(f"Downloaded: {filename}")
-        
-        # Create output directory structure
-        base_name = filename.split('.')[0]
-        dataset_folder = os.path.join(output_folder, base_name)
-        os.makedirs(dataset_folder, exist_ok=True)
-        print(f"Created output folder: {dataset_folder}")
-        
-        # Read file based on extension
-        if filename.lower().endswith('.csv'):
-            df = pd.read_csv(BytesIO(file_content))
-        elif filename.lower().endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(BytesIO(file_content))
-        else:
-            raise Exception("Unsupported file format")
-        
-        # Extract metadata
-        metadata = extract_metadata_from_dataframe(df, filename)
-        print(f"[OK] Extracted metadata: {metadata['row_count']} rows, {metadata['column_count']} columns")
-        
-        # Step 2: Generate DQ rules
-        print("Step 2: Generating data quality rules...")
-        dq_rules = suggest_dq_rules(metadata)
-        print(f"[OK] Generated {len(dq_rules)} DQ rules")
-        
-        # Step 3: Create contract Excel
-        print("Step 3: Creating contract Excel file...")
-        contract_filename = os.path.join(dataset_folder, f"{base_name}_contract.xlsx")
-        create_contract_excel(metadata, dq_rules, contract_filename)
-        print(f"[OK] Created contract: {contract_filename}")
-        
-        # Step 4: Generate DQ report
-        print("Step 4: Generating DQ report...")
-        dq_report = generate_dq_report(metadata, dq_rules)
-        
-        # Save artifacts in organized folder
-        metadata_filename = os.path.join(dataset_folder, f"{base_name}_metadata.json")
-        dq_report_filename = os.path.join(dataset_folder, f"{base_name}_dq_report.json")
-        
-        # Save original dataset for reference
-        original_filename = os.path.join(dataset_folder, filename)
-        with open(original_filename, 'wb') as f:
-            f.write(file_content)
-        
-        with open(metadata_filename, 'w') as f:
-            json.dump(metadata, f, indent=2)
-        
-        with open(dq_report_filename, 'w') as f:
-            json.dump(dq_report, f, indent=2)
-        
-        # Create a summary README for the dataset
-        readme_filename = os.path.join(dataset_folder, "README.md")
-        create_dataset_readme(metadata, dq_rules, dq_report, readme_filename)
-        
-        print(f"[OK] Saved artifacts in folder: {dataset_folder}")
-        print(f"  - {os.path.basename(original_filename)} (original dataset)")
-        print(f"  - {os.path.basename(metadata_filename)} (metadata)")
-        print(f"  - {os.path.basename(contract_filename)} (contract)")
-        print(f"  - {os.path.basename(dq_report_filename)} (DQ report)")
-        print(f"  - {os.path.basename(readme_filename)} (summary)")
-        
-        return {
-            "status": "success",
-            "output_folder": dataset_folder,
-            "files_created": [
-                original_filename,
-                metadata_filename, 
-                contract_filename, 
-                dq_report_filename,
-                readme_filename
-            ],
-            "metadata": metadata,
-            "dq_rules": dq_rules,
-            "dq_report": dq_report
-        }
-        
+        job = _new_job(file_id, output_folder, profile_mode, progress_callback)
+        for _, stage in DATASET_STAGES:
+            stage(job)
     except Exception as e:
-        print(f"Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return {"status": "error", "message": str(e)}
-
-def list_processed_datasets(output_folder: str = "processed_datasets") -> List[Dict[str, Any]]:
-    """List all processed datasets in the output folder."""
-    datasets = []
-    
-    if not os.path.exists(output_folder):
-        return datasets
-    
-    for item in os.listdir(output_folder):
-        item_path = os.path.join(output_folder, item)
-        if os.path.isdir(item_path):
-            # Check if it's a valid dataset folder
-            readme_path = os.path.join(item_path, "README.md")
-            metadata_path = os.path.join(item_path, f"{item}_metadata.json")
-            
-            if os.path.exists(readme_path) and os.path.exists(metadata_path):
-                try:
-                    with open(metadata_path, 'r') as f:
-                        metadata = json.load(f)
-                    
-                    datasets.append({
-                        "dataset_name": item,
-                        "folder_path": item_path,
-                        "filename": metadata.get('filename', 'Unknown'),
-                        "row_count": metadata.get('row_count', 0),
-                        "column_count": metadata.get('column_count', 0),
-                        "processed_date": os.path.getctime(item_path)
-                    })
-                except Exception as e:
-                    print(f"Error reading metadata for {item}: {e}")
-    
-    return sorted(datasets, key=lambda x: x['processed_date'], reverse=True)
\ No newline at end of file
+        return _finish_job(job, e)
+    return _finish_job(job, None)
+
+class DatasetPipeline:
+    """
+    Processes several files at once with overlapping stages.
+    
+    File N+1 downloads while file N is analysed and file N-1 publishes. Each
+    stage of EXECUTION_STAGES has its own workers and a bounded queue in
+    front of it (see stage_pipeline.py); `metrics()` reports how busy each
+    stage was, for tuning the worker counts.
+    """
+    
+    def __init__(self, stage_workers: Optional[Dict[str, int]] = None,
+                 queue_size: int = DEFAULT_STAGE_QUEUE_SIZE):
+        workers = validate_stage_workers(stage_workers or {})
+        last = len(DATASET_STAGES) - 1
+        self._pipeline = StagePipeline(
+            [(name, stage if index == last else self._then_queued(stage), workers[name])
+             for index, (name, stage) in enumerate(DATASET_STAGES)],
+            queue_size=queue_size, name="dataset")
+    
+    @staticmethod
+    def _then_queued(stage: Callable[[Dict[str, Any]], None]) -> Callable[[Dict[str, Any]], None]:
+        """Run a stage, then report that the file waits for the next one."""
+        def run(job: Dict[str, Any]):
+            stage(job)
+            _report(job, STAGE_QUEUED)
+        return run
+    
+    def submit(self, file_id: str, on_done: Callable[[Dict[str, Any]], None],
+               output_folder: str = "processed_datasets", profile_mode: str = "exact",
+               progress_callback: Optional[Callable[..., None]] = None):
+        """
+        Queue a file, waiting while the download stage is full.
+        
+        `on_done` is called from a worker thread with the same result dict as
+        process_dataset_with_organization returns. `progress_callback` gets the
+        same events as there, plus STAGE_QUEUED whenever the file waits for the
+        next worker stage.
+        """
+        job = _new_job(file_id, output_folder, profile_mode, progress_callback)
+        self._pipeline.submit(job, lambda job, error: on_done(_finish_job(job, error)))
+    
+    def has_room(self) -> bool:
+        """Whether `submit` would queue a file without waiting."""
+        return self._pipeline.has_room()
+    
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage utilization (see StagePipeline.metrics)."""
+        return self._pipeline.metrics()
+    
+    def close(self):
+        """Wait for all submitted files to finish."""
+        self._pipeline.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Read access to processed-dataset artifacts as MCP resources.
+
+Each processed dataset is addressable through `dataset://` URIs, so an LLM
+client can fetch exactly the part it needs - dataset-level metadata, a page
+of column profiles, a single column or a page of the DQ report - instead of
+pulling a whole README or metadata file into its context window:
+
+    dataset://{dataset_name}/metadata
+    dataset://{dataset_name}/columns?offset=0&limit=50
+    dataset://{dataset_name}/columns/{column_name}
+    dataset://{dataset_name}/dq_report?offset=0&limit=50
+    dataset://{dataset_name}/readme
+
+Names in URIs are percent-encoded. Artifacts are read from the local
+processed_datasets folder only when a resource is requested, and parsed
+JSON is kept in a small LRU cache that is invalidated when a file changes.
+"""
+
+import os
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit, parse_qs
+from catalog import DatasetCatalog
+from artifact_format import find_artifact, read_json_artifact, expand_dq_report
+
+RESOURCE_SCHEME = "dataset"
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Parsed artifacts kept in memory
+ARTIFACT_CACHE_SIZE = 32
+
+RESOURCE_TEMPLATES = [
+    {
+        "uriTemplate": "dataset://{dataset_name}/metadata",
+        "name": "Dataset metadata",
+        "description": "Dataset-level metadata (row/column counts, profile mode) and the column names, without per-column statistics"
+    },
+    {
+        "uriTemplate": "dataset://{dataset_name}/columns{?offset,limit}",
+        "name": "Column profiles",
+        "description": f"A page of column profiles with full statistics (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE} per page)"
+    },
+    {
+        "uriTemplate": "dataset://{dataset_name}/columns/{column_name}",
+        "name": "Column profile",
+        "description": "Full statistics for a single column"
+    },
+    {
+        "uriTemplate": "dataset://{dataset_name}/dq_report{?offset,limit}",
+        "name": "Data quality report",
+        "description": "DQ summary plus a page of column quality scores and the rules for those columns"
+    },
+    {
+        "uriTemplate": "dataset://{dataset_name}/readme",
+        "name": "Dataset README",
+        "description": "The full human-readable processing report"
+    }
+]
+
+
+class ArtifactCache:
+    """LRU cache of artifact contents keyed by path, invalidated on file modification."""
+
+    def __init__(self, max_entries: int = ARTIFACT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, path: str, parse_json: bool = True) -> Any:
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached and cached[0] == version:
+                self._entries.move_to_end(path)
+                return cached[1]
+
+        if parse_json:
+            value = read_json_artifact(path)
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = f.read()
+
+        with self._lock:
+            self._entries[path] = (version, value)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+_cache = ArtifactCache()
+
+
+def dataset_uri(dataset_name: str, resource: str = "metadata") -> str:
+    """Build the URI of a dataset resource."""
+    return f"{RESOURCE_SCHEME}://{quote(dataset_name, safe='')}/{resource}"
+
+
+def list_dataset_resources(output_folder: str = "processed_datasets", limit: int = 100) -> List[Dict[str, str]]:
+    """Describe the metadata and README resources of the most recently processed datasets."""
+    resources = []
+    for dataset in DatasetCatalog(output_folder).list(limit=limit):
+        name = dataset['dataset_name']
+        resources.append({
+            "uri": dataset_uri(name, "metadata"),
+            "name": f"{name} metadata",
+            "description": f"{dataset['filename']}: {dataset['row_count']:,} rows × {dataset['column_count']} columns",
+            "mimeType": "application/json"
+        })
+        resources.append({
+            "uri": dataset_uri(name, "readme"),
+            "name": f"{name} README",
+            "mimeType": "text/markdown"
+        })
+    return resources
+
+
+def _page_params(query: Dict[str, List[str]]) -> Tuple[int, int]:
+    try:
+        offset = int(query.get("offset", ["0"])[0])
+        limit = int(query.get("limit", [str(DEFAULT_PAGE_SIZE)])[0])
+    except ValueError:
+        raise ValueError("offset and limit must be integers")
+    if offset < 0 or limit < 1:
+        raise ValueError("offset must be >= 0 and limit >= 1")
+    return offset, min(limit, MAX_PAGE_SIZE)
+
+
+def _page(dataset_name: str, resource: str, items: List[Any], offset: int, limit: int) -> Dict[str, Any]:
+    end = offset + limit
+    return {
+        "dataset_name": dataset_name,
+        "offset": offset,
+        "limit": limit,
+        "total": len(items),
+        "next": f"{dataset_uri(dataset_name, resource)}?offset={end}&limit={limit}" if end < len(items) else None
+    }
+
+
+def _artifact_path(folder: str, dataset_name: str, artifact: str) -> str:
+    path = find_artifact(folder, f"{dataset_name}_{artifact}")
+    if path is None:
+        raise ValueError(f"Dataset '{dataset_name}' has no {artifact} artifact")
+    return path
+
+
+def read_dataset_resource(uri: str, output_folder: str = "processed_datasets") -> str:
+    """
+    Read a dataset resource and return its content as text (JSON or Markdown).
+
+    Raises:
+        ValueError: If the URI is malformed or the dataset, artifact or column does not exist
+    """
+    parts = urlsplit(uri)
+    if parts.scheme != RESOURCE_SCHEME or not parts.netloc:
+        raise ValueError(f"Unsupported resource URI: {uri}")
+
+    dataset_name = unquote(parts.netloc)
+    path = [unquote(segment) for segment in parts.path.strip('/').split('/')]
+    query = parse_qs(parts.query)
+
+    dataset = DatasetCatalog(output_folder).get(dataset_name)
+    if not dataset:
+        raise ValueError(f"Dataset '{dataset_name}' not found")
+    folder = dataset['folder_path']
+
+    if path == ["readme"]:
+        return _cache.load(os.path.join(folder, "README.md"), parse_json=False)
+
+    metadata = _cache.load(_artifact_path(folder, dataset_name, "metadata"))
+    columns = metadata.get("columns", [])
+
+    if path == ["dq_report"]:
+        report = expand_dq_report(_cache.load(_artifact_path(folder, dataset_name, "dq_report")), metadata)
+        offset, limit = _page_params(query)
+        column_quality = report.get("column_quality", [])
+        page = column_quality[offset:offset + limit]
+        page_columns = {col["column_name"] for col in page}
+        content = _page(dataset_name, "dq_report", column_quality, offset, limit)
+        content.update({
+            "dataset_info": report.get("dataset_info"),
+            "data_quality_summary": report.get("data_quality_summary"),
+            "column_quality": page,
+            "suggested_rules": [rule for rule in report.get("suggested_rules", []) if rule.get("column") in page_columns]
+        })
+        return json.dumps(content, indent=2, default=str)
+
+    if path == ["metadata"]:
+        content = {key: value for key, value in metadata.items() if key != "columns"}
+        content["column_names"] = [col["name"] for col in columns]
+        content["columns_uri"] = dataset_uri(dataset_name, "columns")
+        return json.dumps(content, indent=2, default=str)
+
+    if path == ["columns"]:
+        offset, limit = _page_params(query)
+        content = _page(dataset_name, "columns", columns, offset, limit)
+        content["columns"] = columns[offset:offset + limit]
+        return json.dumps(content, indent=2, default=str)
+
+    if len(path) == 2 and path[0] == "columns":
+        column = next((col for col in columns if str(col["name"]) == path[1]), None)
+        if column is None:
+            raise ValueError(f"Column '{path[1]}' not found in dataset '{dataset_name}'")
+        return json.dumps(column, indent=2, default=str)
+
+    raise ValueError(f"Unknown resource '{parts.path}' for dataset '{dataset_name}'")
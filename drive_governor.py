@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Central request governor for Google Drive API calls.
+
+Every Drive request goes through one governor per service account
+credential, which combines:
+- an adaptive token bucket: the request rate is halved whenever Drive
+  answers with a rate-limit error and creeps back up towards the configured
+  rate on success, so parallel workers settle just under the quota
+- retries with full-jitter exponential backoff, only for retryable errors
+  (429, 5xx, 403 rate-limit reasons and network failures), honouring
+  Retry-After when Drive sends it
+- a circuit breaker that fails fast after repeated retryable failures and
+  lets a single trial request through once the cool-down has passed
+- counters for requests, retries, throttling and failures
+
+Configured through DRIVE_REQUESTS_PER_SECOND, DRIVE_BURST and
+DRIVE_MAX_RETRIES.
+"""
+
+import os
+import random
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from googleapiclient.errors import HttpError
+
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+DEFAULT_BURST = 20
+DEFAULT_MAX_RETRIES = 6
+
+# Backoff delay bounds in seconds
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 64.0
+
+# The adaptive rate never drops below this fraction of the configured rate
+MIN_RATE_FRACTION = 0.05
+
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30.0
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = ("userRateLimitExceeded", "rateLimitExceeded", "sharingRateLimitExceeded")
+
+
+class DriveCircuitOpenError(Exception):
+    """Raised instead of calling Drive while the circuit breaker is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Drive API circuit breaker is open after repeated failures; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose refill rate can be adjusted at runtime."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 1) -> float:
+        """
+        Take tokens, blocking until they are available. Returns the time spent waiting.
+
+        More tokens than the bucket holds are taken once it is full, leaving
+        it in debt, so later requests wait for the excess.
+        """
+        needed = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open trial after a cool-down."""
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_seconds: float = CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def retry_after(self) -> float:
+        """Seconds until requests are allowed again (0 when closed)."""
+        if self.state == "closed":
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def before_call(self):
+        with self._lock:
+            if self.state == "closed":
+                return
+            if self.retry_after() > 0 or self._trial_in_flight:
+                raise DriveCircuitOpenError(max(self.retry_after(), 1.0))
+            # Cool-down over: let one trial request through
+            self.state = "half_open"
+            self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """End a half-open trial without a verdict, so another call can make the trial."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Count a retryable failure. Returns True if this opened the circuit."""
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                opened = self.state != "open"
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                return opened
+            return False
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    if not isinstance(error, HttpError):
+        return False
+    if error.resp.status == 429:
+        return True
+    content = error.content.decode('utf-8', errors='replace') if error.content else ""
+    return error.resp.status == 403 and any(reason in content for reason in RATE_LIMIT_REASONS)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Whether a failed Drive call is worth retrying."""
+    if isinstance(error, HttpError):
+        return error.resp.status in RETRYABLE_STATUS_CODES or _is_rate_limit_error(error)
+    return isinstance(error, (ConnectionError, TimeoutError, socket.timeout))
+
+
+class DriveRequestGovernor:
+    """Rate limiting, retries and circuit breaking for one credential's Drive requests."""
+
+    def __init__(self, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 burst: int = DEFAULT_BURST, max_retries: int = DEFAULT_MAX_RETRIES):
+        self.max_rate = requests_per_second
+        self.min_rate = requests_per_second * MIN_RATE_FRACTION
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.circuit = CircuitBreaker()
+        self._lock = threading.Lock()
+        self._metrics = {
+            "requests": 0,
+            "successes": 0,
+            "failures": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "throttled_requests": 0,
+            "throttle_wait_seconds": 0.0,
+            "backoff_wait_seconds": 0.0,
+            "circuit_opens": 0,
+            "circuit_rejections": 0,
+            "status_codes": {}
+        }
+
+    def _count(self, key: str, amount: float = 1):
+        with self._lock:
+            self._metrics[key] += amount
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        retry_after = None
+        if isinstance(error, HttpError):
+            retry_after = error.resp.get('retry-after')
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+    def _on_rate_limited(self, count: int = 1):
+        with self._lock:
+            self._metrics["rate_limited"] += count
+            self.bucket.rate = max(self.min_rate, self.bucket.rate / 2)
+
+    def record_batch_errors(self, errors: List[Exception]):
+        """
+        Account for the errors Drive answered for single requests of a batch.
+
+        The batch itself succeeded, so `call` only saw its overall outcome.
+        Every rate-limited item is counted; a batch with any of them halves
+        the rate once, like a single rate-limited request.
+        """
+        with self._lock:
+            codes = self._metrics["status_codes"]
+            for error in errors:
+                if isinstance(error, HttpError):
+                    codes[error.resp.status] = codes.get(error.resp.status, 0) + 1
+        rate_limited = sum(1 for error in errors if _is_rate_limit_error(error))
+        if rate_limited:
+            self._on_rate_limited(rate_limited)
+
+    def _on_success(self):
+        with self._lock:
+            self._metrics["successes"] += 1
+            self.bucket.rate = min(self.max_rate, self.bucket.rate + self.max_rate * 0.02)
+
+    def call(self, func: Callable[[], Any], cost: int = 1) -> Any:
+        """
+        Run one Drive call under the governor, retrying retryable failures.
+
+        Args:
+            func: The call
+            cost: Requests the call counts as against the quota (the number
+                of requests in a batch)
+        """
+        attempt = 0
+        while True:
+            try:
+                self.circuit.before_call()
+            except DriveCircuitOpenError:
+                self._count("circuit_rejections")
+                raise
+
+            waited = self.bucket.acquire(cost)
+            if waited:
+                self._count("throttled_requests", cost)
+                self._count("throttle_wait_seconds", waited)
+            self._count("requests", cost)
+
+            try:
+                result = func()
+            except Exception as e:
+                if isinstance(e, HttpError):
+                    with self._lock:
+                        codes = self._metrics["status_codes"]
+                        codes[e.resp.status] = codes.get(e.resp.status, 0) + 1
+                if not is_retryable_error(e):
+                    if isinstance(e, HttpError):
+                        # Drive answered: client errors (404, permission denied, ...) show it is up
+                        self.circuit.record_success()
+                    else:
+                        # No response (bad arguments, local I/O, ...) says nothing about Drive;
+                        # the circuit keeps its state, but a half-open trial is handed on
+                        self.circuit.release_trial()
+                    self._count("failures")
+                    raise
+                if _is_rate_limit_error(e):
+                    self._on_rate_limited()
+                if self.circuit.record_failure():
+                    self._count("circuit_opens")
+                    print(f"⚠️ Drive API circuit breaker opened for {self.circuit.reset_seconds:.0f}s after repeated failures")
+                if attempt >= self.max_retries or self.circuit.state == "open":
+                    self._count("failures")
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                attempt += 1
+                self._count("retries")
+                self._count("backoff_wait_seconds", delay)
+                time.sleep(delay)
+                continue
+
+            self.circuit.record_success()
+            self._on_success()
+            return result
+
+    def execute(self, request) -> Any:
+        """Execute a googleapiclient request under the governor."""
+        return self.call(request.execute)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of the retry, throttle and circuit breaker counters."""
+        with self._lock:
+            snapshot = dict(self._metrics)
+            snapshot["status_codes"] = dict(self._metrics["status_codes"])
+        snapshot.update({
+            "current_rate": round(self.bucket.rate, 2),
+            "max_rate": self.max_rate,
+            "circuit_state": self.circuit.state,
+            "circuit_retry_after": round(self.circuit.retry_after(), 1)
+        })
+        return snapshot
+
+
+_governors: Dict[str, DriveRequestGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def get_drive_governor(credential: Optional[str] = None) -> DriveRequestGovernor:
+    """
+    Return the governor shared by every caller using the same credential
+    (by default the configured service account key).
+    """
+    credential = credential or os.getenv('GOOGLE_SERVICE_ACCOUNT_KEY_PATH', 'default')
+    with _governors_lock:
+        if credential not in _governors:
+            _governors[credential] = DriveRequestGovernor(
+                requests_per_second=float(os.getenv('DRIVE_REQUESTS_PER_SECOND', DEFAULT_REQUESTS_PER_SECOND)),
+                burst=int(os.getenv('DRIVE_BURST', DEFAULT_BURST)),
+                max_retries=int(os.getenv('DRIVE_MAX_RETRIES', DEFAULT_MAX_RETRIES))
+            )
+        return _governors[credential]
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Cache of Drive file metadata, so processing a file does not cost an extra
+`files().get` round trip just to learn its name.
+
+Folder listings already return everything the pipeline needs about a file
+(FILE_METADATA_FIELDS: name, mimeType, size, md5Checksum, ...), so
+`list_files_in_folder` stores its results here. `get_file_metadata` answers
+from the cache and only asks Drive for files it has not seen recently;
+`prefetch_file_metadata` fetches many unknown files at once with one Drive
+batch HTTP request per METADATA_BATCH_SIZE files.
+
+Entries expire after METADATA_TTL_SECONDS, so renamed files are picked up.
+Drive counts every request of a batch against the quota, so a batch takes
+one governor token per request even though it is one round trip.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+from drive_governor import get_drive_governor
+
+# Fields fetched for every file, by listings and by single or batched gets
+FILE_METADATA_FIELDS = "id, name, mimeType, createdTime, modifiedTime, size, md5Checksum"
+
+# Drive accepts at most 100 requests per batch
+METADATA_BATCH_SIZE = 100
+
+METADATA_TTL_SECONDS = 300
+METADATA_CACHE_SIZE = 10_000
+
+
+class DriveMetadataCache:
+    """Thread-safe LRU cache of file metadata keyed by file ID, with expiry."""
+
+    def __init__(self, ttl_seconds: float = METADATA_TTL_SECONDS, max_entries: int = METADATA_CACHE_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def remember(self, files: Iterable[Dict[str, Any]]):
+        """Store the metadata of listed or fetched files."""
+        now = time.time()
+        with self._lock:
+            for file_info in files:
+                self._entries[file_info['id']] = (dict(file_info), now)
+                self._entries.move_to_end(file_info['id'])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def lookup(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Cached metadata of a file, or None if it is unknown or expired."""
+        with self._lock:
+            entry = self._entries.get(file_id)
+            if entry is None or time.time() - entry[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(entry[0])
+
+    def missing(self, file_ids: Iterable[str]) -> List[str]:
+        """The given files that are not cached (or have expired), without duplicates."""
+        now = time.time()
+        with self._lock:
+            return [file_id for file_id in dict.fromkeys(file_ids)
+                    if file_id not in self._entries or now - self._entries[file_id][1] > self.ttl_seconds]
+
+    def forget(self, file_id: str):
+        with self._lock:
+            self._entries.pop(file_id, None)
+
+
+_cache = DriveMetadataCache()
+
+
+def get_metadata_cache() -> DriveMetadataCache:
+    """Return the process-wide metadata cache."""
+    return _cache
+
+
+def prefetch_file_metadata(service, file_ids: Iterable[str]) -> int:
+    """
+    Fetch the metadata of every uncached file with batched requests.
+
+    Files Drive reports an error for (not found, no access, rate limited,
+    ...) are left out; `get_file_metadata` fetches them singly, with
+    retries, or raises the error when they are used.
+
+    Returns:
+        Number of files fetched
+    """
+    missing = _cache.missing(file_ids)
+    fetched = []
+    errors = []
+    governor = get_drive_governor()
+
+    def on_response(request_id, response, exception):
+        if exception is None:
+            fetched.append(response)
+        else:
+            errors.append(exception)
+
+    for start in range(0, len(missing), METADATA_BATCH_SIZE):
+        batch_ids = missing[start:start + METADATA_BATCH_SIZE]
+        batch = service.new_batch_http_request(callback=on_response)
+        for file_id in batch_ids:
+            batch.add(service.files().get(fileId=file_id, fields=FILE_METADATA_FIELDS), request_id=file_id)
+        governor.call(batch.execute, cost=len(batch_ids))
+        governor.record_batch_errors(errors)
+        errors.clear()
+
+    _cache.remember(fetched)
+    return len(fetched)
+
+
+def get_file_metadata(service, file_id: str) -> Dict[str, Any]:
+    """Metadata of a file (FILE_METADATA_FIELDS), from the cache when possible."""
+    file_info = _cache.lookup(file_id)
+    if file_info is None:
+        file_info = get_drive_governor().execute(service.files().get(fileId=file_id, fields=FILE_METADATA_FIELDS))
+        _cache.remember([file_info])
+    return file_info
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Ordering and concurrency control for files waiting to be processed.
+
+The auto-processor enqueues every new file it finds across its watched
+folders, then repeatedly asks for the next file to run. The scheduler picks
+it according to a policy:
+- "size": smallest file first, so one huge upload does not hold up many
+  small ones (the default)
+- "age": oldest file on Drive first
+- "priority": highest folder priority first, smallest file first within it
+
+Files being retried after a failure go after files that never failed. A
+folder never runs more files at once than its concurrency cap, and a file
+that has waited longer than STARVATION_SECONDS goes ahead of everything else
+so large files still get their turn.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+SCHEDULING_POLICIES = ("size", "age", "priority")
+
+# Enough files in flight to keep every stage of the default pipeline busy
+DEFAULT_MAX_CONCURRENT_FILES = 4
+
+# Files waiting longer than this are scheduled before all others
+STARVATION_SECONDS = 3600
+
+
+def validate_scheduling_policy(policy: str) -> str:
+    """Validate a scheduling policy name and return it."""
+    if policy not in SCHEDULING_POLICIES:
+        raise ValueError(f"Invalid scheduling policy '{policy}'. Must be one of: {', '.join(SCHEDULING_POLICIES)}")
+    return policy
+
+
+def file_size(file_info: Dict[str, Any]) -> int:
+    """Size in bytes reported by Drive (0 for files without one, e.g. Google Sheets)."""
+    try:
+        return int(file_info.get('size') or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class FileScheduler:
+    """Thread-safe priority queue of files with per-folder concurrency caps."""
+
+    def __init__(self, policy: str = "size",
+                 folder_priorities: Optional[Dict[str, int]] = None,
+                 folder_max_concurrent: Optional[Dict[str, int]] = None,
+                 default_max_concurrent: int = DEFAULT_MAX_CONCURRENT_FILES):
+        self.policy = validate_scheduling_policy(policy)
+        self.folder_priorities = folder_priorities or {}
+        self.folder_max_concurrent = folder_max_concurrent or {}
+        self.default_max_concurrent = default_max_concurrent
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._running: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _max_concurrent(self, folder_id: str) -> int:
+        return self.folder_max_concurrent.get(folder_id, self.default_max_concurrent)
+
+    def _sort_key(self, entry: Dict[str, Any], now: float) -> tuple:
+        file_info = entry["file_info"]
+        starving = now - entry["enqueued_at"] > STARVATION_SECONDS
+        if starving:
+            return (0, entry["enqueued_at"])
+        if self.policy == "age":
+            return (1, entry["retry"], file_info.get('createdTime', ''))
+        if self.policy == "priority":
+            return (1, entry["retry"], -self.folder_priorities.get(entry["folder_id"], 0), file_size(file_info))
+        return (1, entry["retry"], file_size(file_info))
+
+    def enqueue(self, file_info: Dict[str, Any], folder_id: str, retry: bool = False) -> bool:
+        """Add a file unless it is already waiting or running. Returns True if added."""
+        with self._lock:
+            file_id = file_info['id']
+            if file_id in self._pending or file_id in self._running:
+                return False
+            self._pending[file_id] = {
+                "file_info": file_info,
+                "folder_id": folder_id,
+                "retry": retry,
+                "enqueued_at": time.time()
+            }
+            return True
+
+    def next_ready(self) -> Optional[Dict[str, Any]]:
+        """
+        Take the best waiting file whose folder is below its concurrency cap
+        and mark it running. Returns the entry (file_info, folder_id,
+        enqueued_at, started_at) or None if nothing can start now.
+        """
+        now = time.time()
+        with self._lock:
+            running_per_folder: Dict[str, int] = {}
+            for entry in self._running.values():
+                running_per_folder[entry["folder_id"]] = running_per_folder.get(entry["folder_id"], 0) + 1
+
+            ready = [entry for entry in self._pending.values()
+                     if running_per_folder.get(entry["folder_id"], 0) < self._max_concurrent(entry["folder_id"])]
+            if not ready:
+                return None
+
+            entry = min(ready, key=lambda e: self._sort_key(e, now))
+            file_id = entry["file_info"]['id']
+            del self._pending[file_id]
+            entry["started_at"] = now
+            self._running[file_id] = entry
+            return dict(entry)
+
+    def complete(self, file_id: str):
+        """Mark a running file as finished, successfully or not."""
+        with self._lock:
+            self._running.pop(file_id, None)
+
+    def has_pending(self) -> bool:
+        with self._lock:
+            return bool(self._pending)
+
+    def queue_depth(self) -> Dict[str, Any]:
+        """Waiting and running file counts, overall and per folder."""
+        with self._lock:
+            by_folder: Dict[str, Dict[str, int]] = {}
+            for state, entries in (("pending", self._pending), ("running", self._running)):
+                for entry in entries.values():
+                    counts = by_folder.setdefault(entry["folder_id"], {"pending": 0, "running": 0})
+                    counts[state] += 1
+            oldest = min((e["enqueued_at"] for e in self._pending.values()), default=None)
+            return {
+                "pending": len(self._pending),
+                "running": len(self._running),
+                "pending_bytes": sum(file_size(e["file_info"]) for e in self._pending.values()),
+                "oldest_wait_seconds": round(time.time() - oldest, 1) if oldest else 0.0,
+                "by_folder": by_folder
+            }
+
+    def pending_files(self) -> List[Dict[str, Any]]:
+        """Waiting files in the order they would be scheduled (ignoring concurrency caps)."""
+        now = time.time()
+        with self._lock:
+            entries = sorted(self._pending.values(), key=lambda e: self._sort_key(e, now))
+            return [dict(entry) for entry in entries]
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Memory-efficient dataset ingestion.
+
+`pd.read_csv` with default settings produces int64/float64 columns and
+object columns for every string. This module runs a small sample pass first
+to decide which string columns are better stored as categoricals, Arrow
+strings or datetimes, reads the full file with those dtypes, and finally
+downcasts numeric columns to the smallest lossless width.
+
+The dtype each column would have had without optimization is kept in
+`df.attrs["original_dtypes"]` so metadata can report both.
+
+The readers take either the downloaded content (bytes) or the path of a
+downloaded file. A file is memory-mapped for parsing, so its content is
+never copied into the Python heap.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from io import BytesIO
+from typing import Dict, Iterator, Tuple, Union
+
+# Downloaded content, or the path of a downloaded file
+DatasetSource = Union[bytes, str]
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+try:
+    import pyarrow  # noqa: F401
+    ARROW_STRINGS_AVAILABLE = True
+except ImportError:
+    ARROW_STRINGS_AVAILABLE = False
+
+# Rows read by the dtype inference pass
+INFERENCE_SAMPLE_ROWS = 10_000
+
+# String columns whose sampled distinct ratio is at or below this become categoricals
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+def _infer_string_dtypes(sample: pd.DataFrame) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Decide target dtypes for the object columns of a sample.
+
+    Returns:
+        Tuple of (dtype map for read_csv, datetime format map for read_csv)
+    """
+    dtypes = {}
+    date_formats = {}
+
+    for col in sample.columns:
+        if sample[col].dtype != object:
+            continue
+
+        values = sample[col].dropna()
+        if values.empty or not all(isinstance(v, str) for v in values):
+            continue
+
+        # A column is a datetime only if every sampled value parses with one format
+        fmt = guess_datetime_format(values.iloc[0])
+        if fmt:
+            try:
+                pd.to_datetime(values, format=fmt)
+                date_formats[col] = fmt
+                continue
+            except (ValueError, TypeError):
+                pass
+
+        if values.nunique() / len(values) <= CATEGORY_MAX_UNIQUE_RATIO:
+            dtypes[col] = 'category'
+        elif ARROW_STRINGS_AVAILABLE:
+            dtypes[col] = 'string[pyarrow]'
+
+    return dtypes, date_formats
+
+
+def downcast_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Downcast int and float columns to the smallest width that holds their values.
+
+    Floats are only narrowed to float32 when every value round-trips exactly.
+    """
+    for col in df.columns:
+        dtype = df[col].dtype
+        if not isinstance(dtype, np.dtype):
+            continue
+
+        if dtype.kind in 'iu':
+            df[col] = pd.to_numeric(df[col], downcast='unsigned' if dtype.kind == 'u' else 'integer')
+        elif dtype == np.float64:
+            narrowed = df[col].astype(np.float32)
+            if np.array_equal(narrowed.to_numpy(dtype=np.float64), df[col].to_numpy(), equal_nan=True):
+                df[col] = narrowed
+
+    return df
+
+
+def optimize_dataframe_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Optimize the dtypes of an already-loaded DataFrame (used for Excel files).
+
+    Peak memory is not reduced here, but the resident frame shrinks.
+    """
+    original_dtypes = {col: str(df[col].dtype) for col in df.columns}
+    string_dtypes, date_formats = _infer_string_dtypes(df.head(INFERENCE_SAMPLE_ROWS))
+
+    for col, fmt in date_formats.items():
+        try:
+            df[col] = pd.to_datetime(df[col], format=fmt)
+        except (ValueError, TypeError):
+            continue
+    for col, dtype in string_dtypes.items():
+        df[col] = df[col].astype(dtype)
+
+    df = downcast_numeric_columns(df)
+    df.attrs["original_dtypes"] = original_dtypes
+    return df
+
+
+def source_size(source: DatasetSource) -> int:
+    """Size in bytes of downloaded content or of a downloaded file."""
+    if isinstance(source, (bytes, bytearray)):
+        return len(source)
+    return os.path.getsize(source)
+
+
+def read_csv_source(source: DatasetSource, **kwargs):
+    """pd.read_csv over downloaded content, or over a memory-mapped downloaded file."""
+    if isinstance(source, (bytes, bytearray)):
+        return pd.read_csv(BytesIO(source), **kwargs)
+    return pd.read_csv(source, memory_map=True, **kwargs)
+
+
+def read_csv_optimized(file_content: DatasetSource, sample_rows: int = INFERENCE_SAMPLE_ROWS) -> pd.DataFrame:
+    """
+    Read CSV content with inferred, memory-efficient dtypes.
+
+    String columns are parsed straight into their target dtype, so the
+    full-size object column is never built for them.
+    """
+    sample = read_csv_source(file_content, nrows=sample_rows)
+    string_dtypes, date_formats = _infer_string_dtypes(sample)
+
+    df = read_csv_source(
+        file_content,
+        dtype=string_dtypes or None,
+        parse_dates=list(date_formats) or None,
+        date_format=date_formats or None
+    )
+
+    original_dtypes = {}
+    for col in df.columns:
+        if col in string_dtypes or col in date_formats:
+            original_dtypes[col] = 'object'
+        else:
+            original_dtypes[col] = str(df[col].dtype)
+
+    df = downcast_numeric_columns(df)
+    df.attrs["original_dtypes"] = original_dtypes
+    return df
+
+
+def read_csv_chunks_optimized(file_content: DatasetSource, chunksize: int,
+                              sample_rows: int = INFERENCE_SAMPLE_ROWS) -> Tuple[Iterator[pd.DataFrame], Dict[str, str]]:
+    """
+    Stream CSV content in chunks using the string dtypes inferred from a sample.
+
+    Numeric columns are not downcast, since the widths could differ between
+    chunks.
+
+    Returns:
+        Tuple of (chunk iterator, original dtype per column)
+    """
+    sample = read_csv_source(file_content, nrows=sample_rows)
+    string_dtypes, date_formats = _infer_string_dtypes(sample)
+    original_dtypes = {col: str(sample[col].dtype) for col in sample.columns}
+
+    chunks = read_csv_source(
+        file_content,
+        chunksize=chunksize,
+        dtype=string_dtypes or None,
+        parse_dates=list(date_formats) or None,
+        date_format=date_formats or None
+    )
+    return chunks, original_dtypes
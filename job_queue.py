@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Asynchronous job queue for long-running dataset processing.
+
+Submitting a dataset returns a job ID immediately; a bounded pool of worker
+threads runs `process_dataset_with_organization` in the background. Jobs
+report per-stage progress, can be cancelled, and a second submission of a
+file that is already queued or running returns the existing job instead of
+starting duplicate work.
+
+Jobs are stored in a local SQLite database, so queued jobs survive a
+restart. Several processes (the HTTP server and each stdio MCP session) may
+share one store: a running job records the process that claimed it and a
+heartbeat, and only jobs whose owner has died or stopped heartbeating are
+queued again.
+"""
+
+import os
+import json
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Dict, List, Any, Optional
+from artifact_store import pid_alive, recover_incomplete_datasets
+from pipeline_config import PIPELINE_STAGES, validate_profile_mode
+
+DEFAULT_JOB_DB = "jobs.db"
+DEFAULT_JOB_WORKERS = 2
+JOB_HEARTBEAT_SECONDS = 30
+JOB_STALE_SECONDS = 120
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+ACTIVE_STATUSES = ("queued", "running")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    file_id TEXT NOT NULL,
+    profile_mode TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    stages TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner_host TEXT,
+    owner_pid INTEGER,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_file_id ON jobs (file_id, status);
+"""
+
+# Added after the first release; older stores are migrated on startup
+_OWNER_COLUMNS = {"owner_host": "TEXT", "owner_pid": "INTEGER", "heartbeat_at": "REAL"}
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job when cancellation was requested."""
+
+
+class JobQueue:
+    """Durable job queue with a bounded worker pool."""
+
+    def __init__(self, db_path: str = DEFAULT_JOB_DB, max_workers: int = DEFAULT_JOB_WORKERS,
+                 output_folder: str = "processed_datasets"):
+        self.db_path = db_path
+        self.output_folder = output_folder
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dataset-job")
+        self._host = socket.gethostname()
+        self._prefetched = set()
+        self._stopped = threading.Event()
+
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for name, sql_type in _OWNER_COLUMNS.items():
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {sql_type}")
+        # Only touches staging whose owning process is gone, so other servers and the
+        # auto-processor may keep working in the same output folder
+        recover_incomplete_datasets(output_folder)
+        self._recover()
+        threading.Thread(target=self._heartbeat_forever, name="job-heartbeat", daemon=True).start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _owner_alive(self, row: sqlite3.Row, now: float) -> bool:
+        """True unless the process running a job is provably gone."""
+        if row["heartbeat_at"] is None or now - row["heartbeat_at"] > JOB_STALE_SECONDS:
+            return False
+        if row["owner_host"] != self._host:
+            return True
+        # Signal 0 only checks for existence on POSIX; elsewhere trust the heartbeat
+        return pid_alive(row["owner_pid"]) if os.name == 'posix' else True
+
+    def _reclaim_orphans(self) -> List[str]:
+        """Re-queue running jobs whose owner died, returning their IDs."""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            orphans = [row["job_id"] for row in conn.execute("SELECT * FROM jobs WHERE status = 'running'")
+                       if not self._owner_alive(row, now)]
+            for job_id in orphans:
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', stage = NULL, started_at = NULL, owner_host = NULL, "
+                    "owner_pid = NULL, heartbeat_at = NULL WHERE job_id = ?",
+                    (job_id,)
+                )
+        if orphans:
+            print(f"🔄 Re-queued {len(orphans)} job(s) whose process stopped")
+        return orphans
+
+    def _recover(self):
+        """Re-queue jobs interrupted by a dead process and schedule everything still queued."""
+        self._reclaim_orphans()
+        with closing(self._connect()) as conn:
+            queued = [row["job_id"] for row in conn.execute(
+                "SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at")]
+        for job_id in queued:
+            self._executor.submit(self._run, job_id)
+
+    def _heartbeat_forever(self):
+        """Renew this process's running jobs and pick up jobs orphaned by other processes."""
+        while not self._stopped.wait(JOB_HEARTBEAT_SECONDS):
+            try:
+                with closing(self._connect()) as conn, conn:
+                    conn.execute(
+                        "UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND owner_host = ? AND owner_pid = ?",
+                        (time.time(), self._host, os.getpid())
+                    )
+                for job_id in self._reclaim_orphans():
+                    self._executor.submit(self._run, job_id)
+            except (sqlite3.Error, RuntimeError) as e:
+                # RuntimeError: the executor was shut down between the check and the submit
+                print(f"Warning: Could not renew job heartbeats: {e}")
+
+    def submit(self, file_id: str, profile_mode: str = "exact") -> Dict[str, Any]:
+        """
+        Queue a dataset for processing.
+
+        If the same file is already queued or running, the existing job is
+        returned and no new work is started.
+
+        Returns:
+            The job, with "coalesced" set when an existing job was reused
+        """
+        validate_profile_mode(profile_mode)
+
+        # BEGIN IMMEDIATE takes the write lock before the lookup, so two processes
+        # sharing the store cannot both miss each other's job and insert a duplicate
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            existing = conn.execute(
+                "SELECT * FROM jobs WHERE file_id = ? AND status IN ('queued', 'running') "
+                "AND cancel_requested = 0 ORDER BY created_at LIMIT 1",
+                (file_id,)
+            ).fetchone()
+            if existing:
+                job = self._to_dict(existing)
+                job["coalesced"] = True
+                return job
+
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (job_id, file_id, profile_mode, status, stages, created_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, file_id, profile_mode, json.dumps({stage: "pending" for stage in PIPELINE_STAGES}), time.time())
+            )
+
+        self._executor.submit(self._run, job_id)
+        job = self.get(job_id)
+        job["coalesced"] = False
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job's status and progress, or None if it does not exist."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return the most recent jobs, optionally filtered by status."""
+        if status is not None and status not in JOB_STATUSES:
+            raise ValueError(f"Unknown job status '{status}'. Expected one of: {', '.join(JOB_STATUSES)}")
+
+        query = "SELECT * FROM jobs"
+        params: List[Any] = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+
+        with closing(self._connect()) as conn:
+            return [self._to_dict(row) for row in conn.execute(query, params)]
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a job.
+
+        Queued jobs are cancelled immediately; running jobs stop at the start
+        of their next stage. Finished jobs are returned unchanged.
+        """
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE job_id = ? AND status = 'queued'",
+                (time.time(), job_id)
+            )
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE job_id = ? AND status = 'running'", (job_id,))
+        return self.get(job_id)
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work; queued jobs stay in the store for the next start."""
+        self._stopped.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job_id: str):
+        # Claim the job; it may have been cancelled while waiting in the pool
+        with closing(self._connect()) as conn, conn:
+            now = time.time()
+            claimed = conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, owner_host = ?, owner_pid = ?, heartbeat_at = ? "
+                "WHERE job_id = ? AND status = 'queued'",
+                (now, self._host, os.getpid(), now, job_id)
+            ).rowcount
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if not claimed:
+            return
+
+        stages = json.loads(row["stages"])
+
+        def on_stage(stage: str, **details):
+            if details:
+                # Only stage transitions are recorded; byte/row/column progress is not persisted
+                return
+            with closing(self._connect()) as conn, conn:
+                cancel_requested = conn.execute(
+                    "SELECT cancel_requested FROM jobs WHERE job_id = ?", (job_id,)).fetchone()[0]
+                if cancel_requested:
+                    raise JobCancelled(f"Job {job_id} cancelled before stage '{stage}'")
+                for name, state in stages.items():
+                    if state == "running":
+                        stages[name] = "done"
+                stages[stage] = "running"
+                conn.execute("UPDATE jobs SET stage = ?, stages = ? WHERE job_id = ?",
+                             (stage, json.dumps(stages), job_id))
+
+        # Loaded on the first job so that starting the queue stays cheap
+        from dataset_processor import process_dataset_with_organization
+        
+        self._prefetch_metadata()
+        print(f"🚀 Job {job_id}: processing file {row['file_id']}")
+        try:
+            result = process_dataset_with_organization(row["file_id"], output_folder=self.output_folder,
+                                                       profile_mode=row["profile_mode"],
+                                                       progress_callback=on_stage)
+        except Exception as e:
+            result = {"status": "error", "message": str(e)}
+
+        with closing(self._connect()) as conn, conn:
+            cancel_requested = conn.execute(
+                "SELECT cancel_requested FROM jobs WHERE job_id = ?", (job_id,)).fetchone()[0]
+            if result["status"] == "success":
+                stages = {name: "done" for name in stages}
+                status, error = "succeeded", None
+                summary = {
+                    "output_folder": result["output_folder"],
+                    "files_created": result["files_created"],
+                    "filename": result["metadata"]["filename"],
+                    "row_count": result["metadata"]["row_count"],
+                    "column_count": result["metadata"]["column_count"],
+                    "dq_rule_count": len(result["dq_rules"])
+                }
+            else:
+                stages = {name: ("failed" if state == "running" else state) for name, state in stages.items()}
+                status = "cancelled" if cancel_requested else "failed"
+                error, summary = result.get("message", "Unknown error"), None
+            recorded = conn.execute(
+                "UPDATE jobs SET status = ?, stages = ?, result = ?, error = ?, finished_at = ? "
+                "WHERE job_id = ? AND owner_host = ? AND owner_pid = ?",
+                (status, json.dumps(stages), json.dumps(summary) if summary else None, error, time.time(),
+                 job_id, self._host, os.getpid())
+            ).rowcount
+        if not recorded:
+            # Our heartbeat lapsed and another process took the job over
+            print(f"⚠️ Job {job_id}: re-queued by another process, dropping this run's result")
+            return
+        print(f"{'✅' if status == 'succeeded' else '❌'} Job {job_id}: {status}")
+
+    def _prefetch_metadata(self):
+        """Fetch the Drive metadata of newly waiting files in batches, sparing each job a round trip."""
+        from utils import get_drive_service
+        from drive_metadata import prefetch_file_metadata
+        
+        with closing(self._connect()) as conn:
+            waiting = [row[0] for row in conn.execute(
+                "SELECT file_id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at")]
+        # Files prefetched for an earlier job are cached (or were just fetched by their own job)
+        with self._lock:
+            file_ids = [file_id for file_id in dict.fromkeys(waiting) if file_id not in self._prefetched]
+            self._prefetched.update(file_ids)
+        if not file_ids:
+            return
+        try:
+            prefetch_file_metadata(get_drive_service(), file_ids)
+        except Exception as e:
+            # Each job then fetches its own metadata
+            print(f"Warning: Could not prefetch file metadata: {e}")
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["stages"] = json.loads(job["stages"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Return the process-wide job queue, starting it on first use.
+
+    The store path and worker count come from the JOB_QUEUE_DB and
+    JOB_QUEUE_WORKERS environment variables.
+    """
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(
+                db_path=os.getenv('JOB_QUEUE_DB', DEFAULT_JOB_DB),
+                max_workers=int(os.getenv('JOB_QUEUE_WORKERS', DEFAULT_JOB_WORKERS))
+            )
+        return _job_queue
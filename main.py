@@ -20,6 +20,10 @@ from utils import (
     generate_dq_report,
     publish_to_mock_catalog
 )
+from dataset_processor import extract_file_metadata
+from catalog import DatasetCatalog
+from job_queue import get_job_queue
+from drive_governor import get_drive_governor
 
 # Load environment variables
 load_dotenv()
@@ -33,6 +37,7 @@ app = FastAPI(
 # Pydantic models
 class FileMetadataRequest(BaseModel):
     file_id: str
+    profile_mode: str = "exact"
 
 class DQRulesRequest(BaseModel):
     metadata: Dict[str, Any]
@@ -48,6 +53,7 @@ class PublishRequest(BaseModel):
 
 class ProcessDatasetRequest(BaseModel):
     file_id: str
+    profile_mode: str = "exact"
 
 
 @app.get("/")
@@ -62,7 +68,9 @@ async def root():
             "/tool/update_contract",
             "/tool/publish_to_catalog",
             "/tool/list_catalog",
-            "/process_dataset"
+            "/catalog/columns",
+            "/process_dataset",
+            "/jobs"
         ]
     }
 
@@ -73,23 +81,9 @@ async def extract_metadata(request: FileMetadataRequest):
     try:
         drive_service = get_drive_service()
         
-        # Download file from Google Drive
-        file_content = download_file_from_drive(request.file_id, drive_service)
-        
-        # Get file info to determine type
-        file_info = drive_service.files().get(fileId=request.file_id).execute()
-        filename = file_info['name']
-        
-        # Read file based on extension
-        if filename.lower().endswith('.csv'):
-            df = pd.read_csv(BytesIO(file_content))
-        elif filename.lower().endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(BytesIO(file_content))
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file format. Only CSV and Excel files are supported.")
-        
-        # Extract metadata
-        metadata = extract_metadata_from_dataframe(df, filename)
+        # Download file from Google Drive and extract metadata
+        metadata = extract_file_metadata(request.file_id, drive_service, request.profile_mode)
+        filename = metadata['filename']
         
         return {
             "status": "success",
@@ -97,6 +91,8 @@ async def extract_metadata(request: FileMetadataRequest):
             "message": f"Successfully extracted metadata from {filename}"
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to extract metadata: {str(e)}")
 
@@ -209,13 +205,48 @@ async def list_catalog():
         raise HTTPException(status_code=500, detail=f"Failed to list catalog: {str(e)}")
 
 
+@app.get("/catalog/columns")
+async def search_catalog_columns(name: Optional[str] = None, query: Optional[str] = None,
+                                 data_type: Optional[str] = None,
+                                 min_null_percentage: Optional[float] = None,
+                                 max_null_percentage: Optional[float] = None,
+                                 min_unique_count: Optional[int] = None,
+                                 max_unique_count: Optional[int] = None,
+                                 limit: int = 100):
+    """Search columns across all locally processed datasets."""
+    try:
+        columns = DatasetCatalog().search_columns(
+            name=name,
+            query=query,
+            data_type=data_type,
+            min_null_percentage=min_null_percentage,
+            max_null_percentage=max_null_percentage,
+            min_unique_count=min_unique_count,
+            max_unique_count=max_unique_count,
+            limit=limit
+        )
+        
+        return {
+            "status": "success",
+            "columns": columns,
+            "total_matches": len(columns),
+            "message": f"Found {len(columns)} matching columns"
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search catalog columns: {str(e)}")
+
+
 @app.post("/process_dataset")
 async def process_dataset(request: ProcessDatasetRequest):
     """Complete workflow: extract metadata, apply DQ rules, create contract, and publish to catalog."""
     try:
         # Step 1: Extract metadata
         print(f"Step 1: Extracting metadata for file {request.file_id}")
-        metadata_response = await extract_metadata(FileMetadataRequest(file_id=request.file_id))
+        metadata_response = await extract_metadata(FileMetadataRequest(
+            file_id=request.file_id,
+            profile_mode=request.profile_mode
+        ))
         metadata = metadata_response["metadata"]
         print(f"[OK] Metadata extracted for {metadata['filename']}")
         
@@ -269,6 +300,52 @@ async def process_dataset(request: ProcessDatasetRequest):
         raise HTTPException(status_code=500, detail=f"Failed to process dataset: {str(e)}")
 
 
+@app.post("/jobs")
+async def submit_job(request: ProcessDatasetRequest):
+    """Queue a dataset for background processing and return its job ID immediately."""
+    try:
+        job = get_job_queue().submit(request.file_id, request.profile_mode)
+        return {
+            "status": "success",
+            "job": job,
+            "message": f"Job {job['job_id']} is {job['status']}" + (" (already in progress)" if job["coalesced"] else "")
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to submit job: {str(e)}")
+
+
+@app.get("/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = 50):
+    """List recent processing jobs."""
+    try:
+        jobs = get_job_queue().list(status=status, limit=limit)
+        return {"status": "success", "jobs": jobs, "total_jobs": len(jobs)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list jobs: {str(e)}")
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get the status and per-stage progress of a processing job."""
+    job = get_job_queue().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return {"status": "success", "job": job}
+
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running processing job."""
+    job = get_job_queue().cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return {"status": "success", "job": job}
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -284,8 +361,8 @@ async def health_check():
             raise Exception("Missing folder IDs in environment variables")
         
         # Test access to folders
-        drive_service.files().get(fileId=server_folder_id).execute()
-        drive_service.files().get(fileId=client_folder_id).execute()
+        get_drive_governor().execute(drive_service.files().get(fileId=server_folder_id))
+        get_drive_governor().execute(drive_service.files().get(fileId=client_folder_id))
         
         return {
             "status": "healthy",
@@ -293,13 +370,15 @@ async def health_check():
             "folders": {
                 "server_folder": server_folder_id,
                 "client_folder": client_folder_id
-            }
+            },
+            "drive_api": get_drive_governor().metrics()
         }
         
     except Exception as e:
         return {
             "status": "unhealthy",
-            "error": str(e)
+            "error": str(e),
+            "drive_api": get_drive_governor().metrics()
         }
 
 
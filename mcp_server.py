@@ -6,7 +6,8 @@ This implements the actual MCP protocol for LLM integration.
 
 import asyncio
 import json
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Callable, Dict, List, Optional
 from mcp.server import Server
 from mcp.server.models import InitializationOptions
 from mcp.server.stdio import stdio_server
@@ -19,20 +20,22 @@ from mcp.types import (
     TextContent,
     ImageContent,
     EmbeddedResource,
+    Resource,
+    ResourceTemplate,
+    ListResourceTemplatesRequest,
+    ListResourceTemplatesResult,
+    ServerResult,
 )
+from pydantic import AnyUrl
 
-# Import our existing functions
-from dataset_processor import process_dataset_with_organization, list_processed_datasets
-from utils import (
-    get_drive_service,
-    download_file_from_drive,
-    list_files_in_folder,
-    extract_metadata_from_dataframe,
-    suggest_dq_rules,
-    generate_dq_report
-)
-import pandas as pd
-from io import BytesIO
+# Import our existing functions. The processing pipeline (pandas, openpyxl, the
+# Google client) is imported by the tools that use it, so the server starts quickly
+# and catalog-only sessions never load it.
+from catalog import DatasetCatalog, SORTABLE_FIELDS, list_processed_datasets, get_processed_dataset
+from pipeline_config import PIPELINE_STAGES
+from job_queue import get_job_queue
+from dataset_resources import RESOURCE_TEMPLATES, list_dataset_resources, read_dataset_resource
+from readme_renderer import DEFAULT_SUMMARY_COLUMNS, render_dataset_summary
 import os
 from dotenv import load_dotenv
 
@@ -41,6 +44,56 @@ load_dotenv()
 # Create MCP server instance
 server = Server("dataset-onboarding")
 
+# Minimum gap between in-stage progress notifications; stage changes and the schema are always sent
+PROGRESS_INTERVAL_SECONDS = 0.5
+
+# Stages reported by extract_file_metadata
+METADATA_STAGES = ("download", "profile")
+
+async def run_with_progress(stages: tuple, func: Callable, *args, **kwargs) -> Any:
+    """
+    Run blocking pipeline work in a worker thread, relaying its progress
+    callbacks to the client while it runs.
+    
+    Overall progress (stage index plus the fraction of the current stage) is
+    sent as `notifications/progress` when the client supplied a progress
+    token. Details such as bytes downloaded, rows parsed and columns
+    profiled, and partial results like the schema, are sent as log message
+    notifications as soon as they are available.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        ctx = server.request_context
+    except LookupError:
+        ctx = None
+    session = ctx.session if ctx else None
+    progress_token = ctx.meta.progressToken if ctx and ctx.meta else None
+    state = {"progress": 0.0, "last_sent": 0.0}
+    
+    def on_progress(stage: str, **details):
+        if session is None or stage not in stages:
+            return
+        now = time.monotonic()
+        if details and "schema" not in details and now - state["last_sent"] < PROGRESS_INTERVAL_SECONDS:
+            return
+        state["last_sent"] = now
+        
+        fraction = 0.0
+        if details.get("total_bytes"):
+            fraction = details["bytes_downloaded"] / details["total_bytes"]
+        elif details.get("total_columns"):
+            fraction = details["columns_profiled"] / details["total_columns"]
+        # Progress must never go backwards
+        state["progress"] = max(state["progress"], stages.index(stage) + min(fraction, 1.0))
+        
+        if progress_token is not None:
+            asyncio.run_coroutine_threadsafe(
+                session.send_progress_notification(progress_token, state["progress"], len(stages)), loop)
+        asyncio.run_coroutine_threadsafe(
+            session.send_log_message("info", {"stage": stage, **details}, logger="dataset-onboarding"), loop)
+    
+    return await asyncio.to_thread(func, *args, progress_callback=on_progress, **kwargs)
+
 @server.list_tools()
 async def handle_list_tools() -> List[Tool]:
     """List all available tools for the MCP client (LLM)."""
@@ -54,6 +107,11 @@ async def handle_list_tools() -> List[Tool]:
                     "file_id": {
                         "type": "string",
                         "description": "Google Drive file ID of the CSV or Excel file to analyze"
+                    },
+                    "profile_mode": {
+                        "type": "string",
+                        "enum": ["exact", "sampled"],
+                        "description": "'exact' (default) computes full statistics; 'sampled' returns a fast estimate with confidence intervals from a sample of the file"
                     }
                 },
                 "required": ["file_id"]
@@ -68,6 +126,11 @@ async def handle_list_tools() -> List[Tool]:
                     "file_id": {
                         "type": "string",
                         "description": "Google Drive file ID of the dataset to analyze for quality rules"
+                    },
+                    "profile_mode": {
+                        "type": "string",
+                        "enum": ["exact", "sampled"],
+                        "description": "'exact' (default) or 'sampled' for rules based on a fast estimated profile"
                     }
                 },
                 "required": ["file_id"]
@@ -75,13 +138,18 @@ async def handle_list_tools() -> List[Tool]:
         ),
         Tool(
             name="process_complete_dataset",
-            description="Run the complete dataset onboarding pipeline: extract metadata, generate quality rules, create contracts, and organize all artifacts.",
+            description="Run the complete dataset onboarding pipeline: extract metadata, generate quality rules, create contracts, and organize all artifacts. Waits for completion; use submit_dataset_job for large files.",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "file_id": {
                         "type": "string",
                         "description": "Google Drive file ID of the dataset to process completely"
+                    },
+                    "profile_mode": {
+                        "type": "string",
+                        "enum": ["exact", "sampled"],
+                        "description": "'exact' (default) or 'sampled' to profile a sample of the rows"
                     }
                 },
                 "required": ["file_id"]
@@ -98,29 +166,167 @@ async def handle_list_tools() -> List[Tool]:
         ),
         Tool(
             name="list_processed_datasets",
-            description="List all locally processed datasets with their metadata and processing information.",
+            description="List locally processed datasets with their metadata and processing information. Results are paginated and sorted (most recently processed first by default).",
             inputSchema={
                 "type": "object",
-                "properties": {},
+                "properties": {
+                    "offset": {
+                        "type": "integer",
+                        "description": "Number of datasets to skip",
+                        "default": 0
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Maximum number of datasets to return",
+                        "default": 50
+                    },
+                    "sort_by": {
+                        "type": "string",
+                        "enum": list(SORTABLE_FIELDS),
+                        "description": "Field to sort by",
+                        "default": "processed_date"
+                    }
+                },
                 "required": []
             }
         ),
         Tool(
             name="get_dataset_summary",
-            description="Get a comprehensive summary of a specific processed dataset including quality metrics and recommendations.",
+            description="Get a comprehensive summary of a specific processed dataset including quality metrics and recommendations. Wide datasets are summarized by their first max_columns columns; read the dataset://{dataset_name}/columns and dataset://{dataset_name}/dq_report resources to page through the rest.",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "dataset_name": {
                         "type": "string",
                         "description": "Name of the processed dataset to summarize"
+                    },
+                    "max_columns": {
+                        "type": "integer",
+                        "description": "Columns, rules and quality entries to include (0 for all)",
+                        "minimum": 0,
+                        "default": DEFAULT_SUMMARY_COLUMNS
                     }
                 },
                 "required": ["dataset_name"]
             }
+        ),
+        Tool(
+            name="search_columns",
+            description="Search columns across all locally processed datasets by name, data type and statistics, e.g. which datasets contain a customer_id column with more than 5% nulls. Use this instead of summarizing every dataset.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "name": {
+                        "type": "string",
+                        "description": "Exact column name (case-insensitive)"
+                    },
+                    "query": {
+                        "type": "string",
+                        "description": "Words that must all appear in the column name (e.g. 'customer id' matches customer_id and CustomerID)"
+                    },
+                    "data_type": {
+                        "type": "string",
+                        "description": "Data type or prefix (e.g. 'int', 'float64', 'datetime', 'category')"
+                    },
+                    "min_null_percentage": {"type": "number", "description": "Minimum null percentage"},
+                    "max_null_percentage": {"type": "number", "description": "Maximum null percentage"},
+                    "min_unique_count": {"type": "integer", "description": "Minimum distinct value count"},
+                    "max_unique_count": {"type": "integer", "description": "Maximum distinct value count"},
+                    "limit": {"type": "integer", "description": "Maximum number of matches", "default": 100}
+                },
+                "required": []
+            }
+        ),
+        Tool(
+            name="submit_dataset_job",
+            description="Queue the complete onboarding pipeline for a dataset and return a job ID immediately. Submitting a file that is already being processed returns the existing job. Poll with get_job_status.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "file_id": {
+                        "type": "string",
+                        "description": "Google Drive file ID of the dataset to process"
+                    },
+                    "profile_mode": {
+                        "type": "string",
+                        "enum": ["exact", "sampled"],
+                        "description": "'exact' (default) or 'sampled' for a fast estimated profile"
+                    }
+                },
+                "required": ["file_id"]
+            }
+        ),
+        Tool(
+            name="get_job_status",
+            description="Get the status and per-stage progress of a dataset processing job.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "Job ID returned by submit_dataset_job"
+                    }
+                },
+                "required": ["job_id"]
+            }
+        ),
+        Tool(
+            name="cancel_job",
+            description="Cancel a queued or running dataset processing job.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "Job ID returned by submit_dataset_job"
+                    }
+                },
+                "required": ["job_id"]
+            }
         )
     ]
 
+@server.list_resources()
+async def handle_list_resources() -> List[Resource]:
+    """List the metadata and README resources of processed datasets."""
+    return [Resource(**resource) for resource in list_dataset_resources()]
+
+async def handle_list_resource_templates(_: ListResourceTemplatesRequest) -> ServerResult:
+    """List the URI templates for dataset artifacts (metadata, column pages, DQ report pages)."""
+    return ServerResult(ListResourceTemplatesResult(
+        resourceTemplates=[ResourceTemplate(**template) for template in RESOURCE_TEMPLATES]
+    ))
+
+# This mcp version has no decorator for resource templates
+server.request_handlers[ListResourceTemplatesRequest] = handle_list_resource_templates
+
+@server.read_resource()
+async def handle_read_resource(uri: AnyUrl) -> str:
+    """Read a dataset artifact lazily from the local processed datasets."""
+    return await asyncio.to_thread(read_dataset_resource, str(uri))
+
+def _format_stat(value: Optional[float]) -> str:
+    """Format a numeric statistic, which is missing for all-null columns."""
+    return f"{value:.4f}" if value is not None else "N/A"
+
+def format_job_status(job: Dict[str, Any]) -> str:
+    """Render a job's status and stage progress for the LLM."""
+    icons = {"pending": "⏳", "running": "🔄", "done": "✅", "failed": "❌"}
+    summary = f"🧾 **Job {job['job_id']}**\n"
+    summary += f"📄 File ID: {job['file_id']} ({job['profile_mode']})\n"
+    summary += f"📌 Status: {job['status']}" + (" (cancellation requested)" if job['cancel_requested'] and job['status'] == "running" else "") + "\n\n"
+    summary += "**Stages:**\n"
+    for stage, state in job['stages'].items():
+        summary += f"{icons.get(state, '•')} {stage}: {state}\n"
+    
+    if job['result']:
+        result = job['result']
+        summary += f"\n📊 {result['filename']}: {result['row_count']:,} rows × {result['column_count']} columns, {result['dq_rule_count']} DQ rules\n"
+        summary += f"📁 Output Folder: {result['output_folder']}\n"
+    if job['error']:
+        summary += f"\n❌ Error: {job['error']}\n"
+    return summary
+
 @server.call_tool()
 async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> CallToolResult:
     """Handle tool calls from the MCP client (LLM)."""
@@ -128,40 +334,53 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> CallToolResu
     try:
         if name == "extract_dataset_metadata":
             file_id = arguments["file_id"]
+            profile_mode = arguments.get("profile_mode", "exact")
+            from dataset_processor import extract_file_metadata
             
             # Download and analyze file
-            drive_service = get_drive_service()
-            file_content = download_file_from_drive(file_id, drive_service)
-            file_info = drive_service.files().get(fileId=file_id).execute()
-            filename = file_info['name']
-            
-            # Read file based on extension
-            if filename.lower().endswith('.csv'):
-                df = pd.read_csv(BytesIO(file_content))
-            elif filename.lower().endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(BytesIO(file_content))
-            else:
-                raise ValueError("Unsupported file format. Only CSV and Excel files are supported.")
-            
-            # Extract metadata
-            metadata = extract_metadata_from_dataframe(df, filename)
+            metadata = await run_with_progress(METADATA_STAGES, extract_file_metadata, file_id, profile_mode=profile_mode)
+            filename = metadata['filename']
+            sampled = metadata.get('profile_mode') == 'sampled'
+            approx = "~" if sampled else ""
             
             # Format response for LLM
             summary = f"""Dataset Analysis Complete for: {filename}
 
 📊 **Dataset Overview:**
-- Rows: {metadata['row_count']:,}
+- Rows: {approx if 'row_count' in metadata.get('estimated_fields', []) else ''}{metadata['row_count']:,}
 - Columns: {metadata['column_count']}
-
-📋 **Column Details:**
 """
+            if sampled:
+                sampling = metadata['sampling']
+                summary += f"- Profile: sampled ({sampling['sample_size']:,} rows, {sampling['method']}); values marked ~ are estimates with {sampling['confidence_level']:.0%} confidence intervals\n"
+            
+            summary += "\n📋 **Column Details:**\n"
             for col in metadata['columns']:
                 summary += f"\n• **{col['name']}** ({col['data_type']})"
-                summary += f"\n  - Null values: {col['null_count']} ({col['null_percentage']:.1f}%)"
-                summary += f"\n  - Unique values: {col['unique_count']}"
+                if col.get('original_data_type', col['data_type']) != col['data_type']:
+                    summary += f" (optimized from {col['original_data_type']})"
+                summary += f"\n  - Null values: {approx}{col['null_count']} ({approx}{col['null_percentage']:.1f}%"
+                if 'null_percentage_ci' in col:
+                    summary += f", CI {col['null_percentage_ci'][0]:.1f}-{col['null_percentage_ci'][1]:.1f}%"
+                summary += ")"
+                summary += f"\n  - Unique values: {approx}{col['unique_count']}"
                 if 'min_value' in col:
-                    summary += f"\n  - Range: {col['min_value']:.4f} to {col['max_value']:.4f}"
-                    summary += f"\n  - Mean: {col['mean_value']:.4f}"
+                    summary += f"\n  - Range: {_format_stat(col['min_value'])} to {_format_stat(col['max_value'])}"
+                    summary += f"\n  - Mean: {approx}{_format_stat(col.get('mean_value'))}"
+                    if 'mean_value_ci' in col:
+                        summary += f" (CI {_format_stat(col['mean_value_ci'][0])} to {_format_stat(col['mean_value_ci'][1])})"
+                if col.get('quantiles'):
+                    q = col['quantiles']
+                    summary += f"\n  - Percentiles: p05 {q['p05']:.4g}, median {q['p50']:.4g}, p95 {q['p95']:.4g}"
+                    summary += f"\n  - Zeros: {col['zero_count']}, negatives: {col['negative_count']}"
+                if 'min_datetime' in col:
+                    summary += f"\n  - Time range: {col['min_datetime']} to {col['max_datetime']} ({col['datetime_granularity']} granularity)"
+                if 'min_length' in col:
+                    summary += f"\n  - Length: {col['min_length']}-{col['max_length']} characters"
+                if col.get('patterns'):
+                    summary += "\n  - Formats: " + ", ".join(f"{name} {pct:.0f}%" for name, pct in col['patterns'].items())
+                if col.get('top_values') and col['unique_count'] <= 20:
+                    summary += "\n  - Top values: " + ", ".join(f"{item['value']} ({item['count']})" for item in col['top_values'][:5])
             
             return CallToolResult(
                 content=[TextContent(type="text", text=summary)],
@@ -170,21 +389,13 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> CallToolResu
         
         elif name == "generate_data_quality_rules":
             file_id = arguments["file_id"]
+            from dataset_processor import extract_file_metadata
+            from utils import suggest_dq_rules
             
             # First extract metadata
-            drive_service = get_drive_service()
-            file_content = download_file_from_drive(file_id, drive_service)
-            file_info = drive_service.files().get(fileId=file_id).execute()
-            filename = file_info['name']
-            
-            if filename.lower().endswith('.csv'):
-                df = pd.read_csv(BytesIO(file_content))
-            elif filename.lower().endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(BytesIO(file_content))
-            else:
-                raise ValueError("Unsupported file format")
-            
-            metadata = extract_metadata_from_dataframe(df, filename)
+            metadata = await run_with_progress(METADATA_STAGES, extract_file_metadata, file_id,
+                                               profile_mode=arguments.get("profile_mode", "exact"))
+            filename = metadata['filename']
             dq_rules = suggest_dq_rules(metadata)
             
             # Format response
@@ -219,9 +430,11 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> CallToolResu
         
         elif name == "process_complete_dataset":
             file_id = arguments["file_id"]
+            from dataset_processor import process_dataset_with_organization
             
             # Run complete processing
-            result = process_dataset_with_organization(file_id)
+            result = await run_with_progress(PIPELINE_STAGES, process_dataset_with_organization, file_id,
+                                             profile_mode=arguments.get("profile_mode", "exact"))
             
             if result["status"] == "success":
                 metadata = result["metadata"]
@@ -260,6 +473,7 @@ The dataset is now fully processed and ready for use!"""
                 )
         
         elif name == "list_catalog_files":
+            from utils import get_drive_service, list_files_in_folder
             drive_service = get_drive_service()
             catalog_folder_id = os.getenv('MCP_CLIENT_FOLDER_ID')
             files = list_files_in_folder(drive_service, catalog_folder_id)
@@ -279,16 +493,22 @@ The dataset is now fully processed and ready for use!"""
             )
         
         elif name == "list_processed_datasets":
-            datasets = list_processed_datasets()
+            offset = arguments.get("offset", 0)
+            limit = arguments.get("limit", 50)
+            total = DatasetCatalog().count()
+            datasets = list_processed_datasets(offset=offset, limit=limit,
+                                               sort_by=arguments.get("sort_by", "processed_date"))
             
             if not datasets:
-                summary = "📭 No datasets have been processed locally yet."
+                summary = "📭 No datasets have been processed locally yet." if total == 0 else f"📭 No datasets at offset {offset} ({total} total)."
             else:
-                summary = f"📊 Processed Datasets ({len(datasets)} total):\n\n"
+                summary = f"📊 Processed Datasets ({offset + 1}-{offset + len(datasets)} of {total} total):\n\n"
                 for dataset in datasets:
                     summary += f"📄 **{dataset['dataset_name']}**\n"
                     summary += f"   📊 Size: {dataset['row_count']:,} rows × {dataset['column_count']} columns\n"
                     summary += f"   📁 Location: {dataset['folder_path']}\n\n"
+                if offset + len(datasets) < total:
+                    summary += f"➡️ More datasets available: use offset={offset + len(datasets)}\n"
             
             return CallToolResult(
                 content=[TextContent(type="text", text=summary)],
@@ -297,8 +517,14 @@ The dataset is now fully processed and ready for use!"""
         
         elif name == "get_dataset_summary":
             dataset_name = arguments["dataset_name"]
-            datasets = list_processed_datasets()
-            dataset = next((d for d in datasets if d['dataset_name'] == dataset_name), None)
+            max_columns = arguments.get("max_columns", DEFAULT_SUMMARY_COLUMNS)
+            if max_columns is not None and max_columns < 0:
+                return CallToolResult(
+                    content=[TextContent(type="text", text=f"❌ max_columns must be 0 or more, got {max_columns}.")],
+                    isError=True
+                )
+            
+            dataset = get_processed_dataset(dataset_name)
             
             if not dataset:
                 return CallToolResult(
@@ -306,13 +532,10 @@ The dataset is now fully processed and ready for use!"""
                     isError=True
                 )
             
-            # Read the README file for comprehensive summary
-            readme_path = os.path.join(dataset['folder_path'], "README.md")
-            if os.path.exists(readme_path):
-                with open(readme_path, 'r', encoding='utf-8') as f:
-                    readme_content = f.read()
-                
-                summary = f"📋 **Dataset Summary: {dataset_name}**\n\n{readme_content}"
+            # Render from the stored artifacts; cached until the dataset is reprocessed
+            rendered = render_dataset_summary(dataset, max_columns or None)
+            if rendered:
+                summary = f"📋 **Dataset Summary: {dataset_name}**\n\n{rendered}"
             else:
                 summary = f"📄 **{dataset_name}**\n"
                 summary += f"📊 Size: {dataset['row_count']:,} rows × {dataset['column_count']} columns\n"
@@ -324,6 +547,53 @@ The dataset is now fully processed and ready for use!"""
                 isError=False
             )
         
+        elif name == "submit_dataset_job":
+            job = get_job_queue().submit(arguments["file_id"], arguments.get("profile_mode", "exact"))
+            prefix = "♻️ Already in progress, returning the existing job.\n\n" if job["coalesced"] else "📥 Job queued.\n\n"
+            
+            return CallToolResult(
+                content=[TextContent(type="text", text=prefix + format_job_status(job))],
+                isError=False
+            )
+        
+        elif name in ("get_job_status", "cancel_job"):
+            job_queue = get_job_queue()
+            job_id = arguments["job_id"]
+            job = job_queue.get(job_id) if name == "get_job_status" else job_queue.cancel(job_id)
+            
+            if not job:
+                return CallToolResult(
+                    content=[TextContent(type="text", text=f"❌ Job '{job_id}' not found.")],
+                    isError=True
+                )
+            
+            return CallToolResult(
+                content=[TextContent(type="text", text=format_job_status(job))],
+                isError=False
+            )
+        
+        elif name == "search_columns":
+            filters = {key: arguments[key] for key in (
+                "name", "query", "data_type", "min_null_percentage", "max_null_percentage",
+                "min_unique_count", "max_unique_count", "limit") if arguments.get(key) is not None}
+            columns = DatasetCatalog().search_columns(**filters)
+            
+            if not columns:
+                summary = "📭 No matching columns found in processed datasets."
+            else:
+                summary = f"🔎 Found {len(columns)} matching column(s):\n\n"
+                for col in columns:
+                    summary += f"📄 **{col['dataset_name']}** → `{col['name']}` ({col['data_type']})\n"
+                    summary += f"   Nulls: {col['null_percentage']:.1f}% | Unique: {col['unique_count']:,} | Rows: {col['row_count']:,}\n"
+                    if col['min_value'] is not None:
+                        summary += f"   Range: {col['min_value']} to {col['max_value']}\n"
+                summary += "\n"
+            
+            return CallToolResult(
+                content=[TextContent(type="text", text=summary)],
+                isError=False
+            )
+        
         else:
             return CallToolResult(
                 content=[TextContent(type="text", text=f"❌ Unknown tool: {name}")],
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Names shared by the processing pipeline and the code that drives it.
+
+Kept free of pandas and the Google client libraries, so that the CLIs, the
+job queue and the MCP server can validate requests and describe progress
+without loading the pipeline itself.
+"""
+
+import os
+
+PROFILE_MODES = ("exact", "sampled")
+
+# Where downloaded files are kept while they are processed, selected with the
+# DOWNLOAD_MODE environment variable:
+#   memory: the content is downloaded into memory and written to the dataset
+#           folder when it is published
+#   disk:   the file is downloaded straight into the dataset's staging folder
+#           and memory-mapped for parsing, so its content is never held in memory
+DOWNLOAD_MODES = ("memory", "disk")
+
+# Stages of process_dataset_with_organization, reported to progress callbacks in order.
+# Callbacks are called as progress_callback(stage) when a stage starts and as
+# progress_callback(stage, **details) for progress within it:
+#   download: bytes_downloaded, total_bytes
+#   profile:  schema (column names and dtypes, before any statistics), row_count,
+#             rows_parsed, columns_profiled, total_columns
+PIPELINE_STAGES = ("download", "profile", "dq_rules", "contract", "dq_report", "save")
+
+# Worker stages of the pipelined executor (see dataset_processor.DatasetPipeline)
+# and the progress stages each of them runs. Downloads wait on the network,
+# analysis on the CPU and publication on the disk, so they overlap well.
+EXECUTION_STAGES = {
+    "download": ("download",),
+    "analyze": ("profile", "dq_rules", "contract", "dq_report"),
+    "publish": ("save",),
+}
+
+DEFAULT_STAGE_WORKERS = {"download": 2, "analyze": 1, "publish": 1}
+
+# Reported by DatasetPipeline as progress_callback(STAGE_QUEUED) when a file has
+# finished a worker stage and waits in the queue of the next one
+STAGE_QUEUED = "queued"
+
+
+def validate_profile_mode(profile_mode: str) -> str:
+    """Return the profile mode, raising ValueError if it is not supported."""
+    if profile_mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{profile_mode}'. Expected one of: {', '.join(PROFILE_MODES)}")
+    return profile_mode
+
+
+def validate_stage_workers(stage_workers: dict) -> dict:
+    """Complete per-stage worker counts with the defaults, raising ValueError for unknown stages."""
+    unknown = set(stage_workers) - set(EXECUTION_STAGES)
+    if unknown:
+        raise ValueError(f"Unknown pipeline stage(s) {', '.join(sorted(unknown))}. "
+                         f"Expected: {', '.join(EXECUTION_STAGES)}")
+    workers = {**DEFAULT_STAGE_WORKERS, **stage_workers}
+    for stage, count in workers.items():
+        if count < 1:
+            raise ValueError(f"Pipeline stage '{stage}' needs at least one worker, got {count}")
+    return workers
+
+
+def download_mode() -> str:
+    """Return the configured DOWNLOAD_MODE, validated."""
+    mode = os.getenv('DOWNLOAD_MODE', 'memory').lower()
+    if mode not in DOWNLOAD_MODES:
+        raise ValueError(f"Invalid DOWNLOAD_MODE '{mode}'. Must be one of: {', '.join(DOWNLOAD_MODES)}")
+    return mode
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Processing history of the auto-processor, for throughput and latency analytics.
+
+Every processing attempt is stored in a local SQLite database with its
+timings: when the file was created on Drive, when processing started and
+finished, and how long each pipeline stage took. Every check cycle also
+records the backlog (supported files on Drive that are neither processed nor
+waiting for a retry).
+
+Attempts and backlog samples are indexed by time, so `analytics` only reads
+the rows of the requested window however many months of history the
+database holds. It answers "are we keeping up?": files, rows and bytes per
+hour, p50/p95/p99 time from upload to catalog, per-stage durations, error
+rates and the backlog trend.
+"""
+
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pipeline_config import PIPELINE_STAGES, STAGE_QUEUED
+
+DEFAULT_HISTORY_DB = "processing_history.db"
+
+# Window analysed by default
+DEFAULT_ANALYTICS_HOURS = 24
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_id TEXT NOT NULL,
+    filename TEXT,
+    folder_id TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    size_bytes INTEGER,
+    row_count INTEGER,
+    column_count INTEGER,
+    created_at REAL,
+    started_at REAL,
+    finished_at REAL NOT NULL,
+    latency_seconds REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_finished ON runs (finished_at);
+CREATE TABLE IF NOT EXISTS stage_timings (
+    run_id INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    status TEXT NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_stage_timings_finished ON stage_timings (finished_at);
+CREATE TABLE IF NOT EXISTS backlog (
+    sampled_at REAL NOT NULL,
+    pending INTEGER NOT NULL,
+    retrying INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_backlog_sampled ON backlog (sampled_at);
+"""
+
+
+def drive_timestamp(value: Optional[str]) -> Optional[float]:
+    """Convert a Drive RFC 3339 time (e.g. createdTime) to a Unix timestamp."""
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list, or None if it is empty."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class StageTimer:
+    """
+    Progress callback that times the stages of process_dataset_with_organization.
+
+    Each stage lasts from its start until the next stage starts (or the file
+    is queued for the next pipeline stage); the last one lasts until the time
+    passed to `durations`. Time spent queued is not counted in any stage.
+    """
+
+    def __init__(self):
+        self._starts: List[tuple] = []
+
+    def __call__(self, stage: str, **details):
+        # Calls with details report progress within the current stage
+        if not details and (stage in PIPELINE_STAGES or stage == STAGE_QUEUED):
+            self._starts.append((stage, time.time()))
+
+    def durations(self, finished_at: Optional[float] = None) -> Dict[str, float]:
+        """Seconds spent in each stage that was started."""
+        finished_at = finished_at or time.time()
+        ends = [start for _, start in self._starts[1:]] + [finished_at]
+        return {stage: round(end - start, 3) for (stage, start), end in zip(self._starts, ends)
+                if stage != STAGE_QUEUED}
+
+
+class ProcessingHistory:
+    """SQLite store of processing attempts and backlog samples."""
+
+    def __init__(self, db_path: str = DEFAULT_HISTORY_DB):
+        self.db_path = db_path
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def is_empty(self) -> bool:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM runs LIMIT 1").fetchone() is None
+
+    def record_run(self, file_id: str, status: str, finished_at: float,
+                   filename: Optional[str] = None, folder_id: Optional[str] = None,
+                   started_at: Optional[float] = None, created_at: Optional[float] = None,
+                   size_bytes: Optional[int] = None, row_count: Optional[int] = None,
+                   column_count: Optional[int] = None, error: Optional[str] = None,
+                   stage_seconds: Optional[Dict[str, float]] = None):
+        """
+        Record one processing attempt.
+
+        Args:
+            file_id: Drive file ID
+            status: "success" or "failed"
+            finished_at: When the attempt ended (Unix time)
+            created_at: When the file was created on Drive; the upload-to-catalog
+                latency of successful attempts is measured from it
+            stage_seconds: Seconds spent in each pipeline stage
+        """
+        latency = finished_at - created_at if created_at is not None and status == "success" else None
+        with closing(self._connect()) as conn, conn:
+            run_id = conn.execute(
+                "INSERT INTO runs (file_id, filename, folder_id, status, error, size_bytes, row_count, column_count, "
+                "created_at, started_at, finished_at, latency_seconds) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_id, filename, folder_id, status, error, size_bytes, row_count, column_count,
+                 created_at, started_at, finished_at, latency)
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO stage_timings (run_id, stage, seconds, status, finished_at) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, stage, seconds, status, finished_at) for stage, seconds in (stage_seconds or {}).items()]
+            )
+
+    def record_backlog(self, pending: int, retrying: int = 0, sampled_at: Optional[float] = None):
+        """Record the number of files waiting to be processed or retried."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT INTO backlog (sampled_at, pending, retrying) VALUES (?, ?, ?)",
+                         (sampled_at or time.time(), pending, retrying))
+
+    def import_processed_files(self, processed_files: Dict[str, Dict[str, Any]]) -> int:
+        """Seed the history from a processed files log. Returns the number of runs imported."""
+        rows = []
+        for file_id, info in processed_files.items():
+            try:
+                finished_at = datetime.fromisoformat(info['processed_at']).timestamp()
+            except (KeyError, ValueError):
+                continue
+            latency = info.get('time_to_catalog_seconds')
+            rows.append((file_id, info.get('filename'), info.get('folder_id'), "success", info.get('size_bytes'),
+                         info.get('row_count'), info.get('column_count'),
+                         finished_at - latency if latency is not None else None, finished_at, latency))
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT INTO runs (file_id, filename, folder_id, status, size_bytes, row_count, column_count, "
+                "created_at, finished_at, latency_seconds) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def analytics(self, hours: int = DEFAULT_ANALYTICS_HOURS, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Throughput, latency, stage, error and backlog figures for the last `hours` hours.
+
+        Returns:
+            A dict with "totals", "hourly" (one entry per hour that had
+            activity), "latency" (p50/p95/p99 upload-to-catalog seconds),
+            "stages" (mean/p95/max seconds per stage) and "backlog"
+            (hourly mean/max, the latest sample and the trend)
+        """
+        now = now or time.time()
+        since = now - hours * 3600
+
+        with closing(self._connect()) as conn:
+            hourly = [dict(row) for row in conn.execute(
+                "SELECT CAST(finished_at / 3600 AS INTEGER) * 3600 AS hour, "
+                "SUM(status = 'success') AS files, SUM(status = 'failed') AS failures, "
+                "SUM(CASE WHEN status = 'success' THEN COALESCE(row_count, 0) ELSE 0 END) AS rows, "
+                "SUM(CASE WHEN status = 'success' THEN COALESCE(size_bytes, 0) ELSE 0 END) AS bytes "
+                "FROM runs WHERE finished_at >= ? GROUP BY hour ORDER BY hour", (since,))]
+
+            latencies = [row[0] for row in conn.execute(
+                "SELECT latency_seconds FROM runs WHERE finished_at >= ? AND latency_seconds IS NOT NULL "
+                "ORDER BY latency_seconds", (since,))]
+
+            stage_rows: Dict[str, List[float]] = {}
+            for row in conn.execute(
+                    "SELECT stage, seconds FROM stage_timings WHERE finished_at >= ? AND status = 'success' "
+                    "ORDER BY seconds", (since,)):
+                stage_rows.setdefault(row["stage"], []).append(row["seconds"])
+
+            backlog_hourly = [dict(row) for row in conn.execute(
+                "SELECT CAST(sampled_at / 3600 AS INTEGER) * 3600 AS hour, "
+                "AVG(pending + retrying) AS mean, MAX(pending + retrying) AS max "
+                "FROM backlog WHERE sampled_at >= ? GROUP BY hour ORDER BY hour", (since,))]
+            latest = conn.execute("SELECT * FROM backlog ORDER BY sampled_at DESC LIMIT 1").fetchone()
+
+        files = sum(hour["files"] for hour in hourly)
+        failures = sum(hour["failures"] for hour in hourly)
+        for hour in hourly:
+            attempts = hour["files"] + hour["failures"]
+            hour["error_rate"] = hour["failures"] / attempts if attempts else 0.0
+
+        return {
+            "hours": hours,
+            "since": since,
+            "totals": {
+                "files": files,
+                "failures": failures,
+                "rows": sum(hour["rows"] for hour in hourly),
+                "bytes": sum(hour["bytes"] for hour in hourly),
+                "files_per_hour": files / hours,
+                "error_rate": failures / (files + failures) if files + failures else 0.0
+            },
+            "hourly": hourly,
+            "latency": {
+                "count": len(latencies),
+                "p50": percentile(latencies, 0.50),
+                "p95": percentile(latencies, 0.95),
+                "p99": percentile(latencies, 0.99)
+            },
+            "stages": {
+                stage: {
+                    "mean": sum(values) / len(values),
+                    "p95": percentile(values, 0.95),
+                    "max": values[-1]
+                }
+                for stage, values in sorted(stage_rows.items(), key=lambda item: PIPELINE_STAGES.index(item[0])
+                                            if item[0] in PIPELINE_STAGES else len(PIPELINE_STAGES))
+            },
+            "backlog": {
+                "hourly": backlog_hourly,
+                "current": latest["pending"] + latest["retrying"] if latest else None,
+                # Mean backlog in the first and the last hour of the window, for the trend
+                "start": backlog_hourly[0]["mean"] if backlog_hourly else None,
+                "end": backlog_hourly[-1]["mean"] if backlog_hourly else None
+            }
+        }
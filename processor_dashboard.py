@@ -9,13 +9,21 @@ import time
 from datetime import datetime, timedelta
 from typing import Dict, Any
 from dotenv import load_dotenv
-from utils import get_drive_service, list_files_in_folder
+from retry_scheduler import load_failed_files, FAILED_FILES_LOG
+from status_publisher import STATUS_FILE, read_status, wait_for_status, new_events, is_stale
+from processing_history import ProcessingHistory, DEFAULT_HISTORY_DB, DEFAULT_ANALYTICS_HOURS
 
 load_dotenv()
 
 class ProcessorDashboard:
-    def __init__(self, processed_files_log: str = "processed_files.json"):
+    def __init__(self, processed_files_log: str = "processed_files.json",
+                 failed_files_log: str = FAILED_FILES_LOG,
+                 status_file: str = STATUS_FILE,
+                 history_db: str = DEFAULT_HISTORY_DB):
         self.processed_files_log = processed_files_log
+        self.failed_files_log = failed_files_log
+        self.status_file = status_file
+        self.history_db = history_db
         self.server_folder_id = os.getenv('MCP_SERVER_FOLDER_ID')
     
     def _load_processed_files(self) -> Dict[str, Any]:
@@ -28,8 +36,20 @@ class ProcessorDashboard:
                 pass
         return {}
     
+    @staticmethod
+    def _published_folder_stats(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Folder statistics from the auto processor's last check, summed over its folders."""
+        folders = snapshot['folders'].values()
+        return {
+            key: sum(folder[key] for folder in folders)
+            for key in ("total_files", "supported_files", "unsupported_files", "pending_files")
+        }
+    
     def _get_folder_stats(self) -> Dict[str, Any]:
         """Get statistics about the monitored folder."""
+        # Loaded here so the dashboard starts without the Google client libraries
+        from utils import get_drive_service, list_files_in_folder
+        
         try:
             drive_service = get_drive_service()
             all_files = list_files_in_folder(drive_service, self.server_folder_id)
@@ -50,24 +70,40 @@ class ProcessorDashboard:
         print("📊 MCP Auto Processor Dashboard")
         print("=" * 50)
         
-        # Load processed files
+        # Load processed and failed files
         processed_files = self._load_processed_files()
+        failed_files = load_failed_files(self.failed_files_log)
+        retrying = {fid: info for fid, info in failed_files.items() if info['status'] == "retrying"}
+        dead_letter = {fid: info for fid, info in failed_files.items() if info['status'] == "dead_letter"}
         
-        # Get folder stats
-        folder_stats = self._get_folder_stats()
+        # Get folder stats, from the running auto processor's last check when it publishes them
+        snapshot = read_status(self.status_file)
+        if snapshot and snapshot.get('folders'):
+            folder_stats = self._published_folder_stats(snapshot)
+            monitored = ', '.join(snapshot['folder_ids'])
+        else:
+            snapshot = None
+            folder_stats = self._get_folder_stats()
+            monitored = self.server_folder_id
         
         # Basic stats
-        print(f"📁 Monitored Folder: {self.server_folder_id}")
+        print(f"📁 Monitored Folder: {monitored}")
         print(f"📋 Processed Files: {len(processed_files)}")
         
         if "error" not in folder_stats:
+            if snapshot:
+                checked_at = datetime.fromtimestamp(snapshot['last_check_at'] or snapshot['updated_at']).strftime('%Y-%m-%d %H:%M:%S')
+                print(f"📡 Folder counts from the auto processor's check at {checked_at}")
             print(f"📄 Total Files in Folder: {folder_stats['total_files']}")
             print(f"✅ Supported Files: {folder_stats['supported_files']}")
             print(f"❌ Unsupported Files: {folder_stats['unsupported_files']}")
             
             # Calculate pending files
-            pending = folder_stats['supported_files'] - len(processed_files)
+            pending = folder_stats.get('pending_files',
+                                       folder_stats['supported_files'] - len(processed_files) - len(failed_files))
             print(f"⏳ Pending Files: {max(0, pending)}")
+            print(f"🔁 Awaiting Retry: {len(retrying)}")
+            print(f"☠️  Dead-Lettered: {len(dead_letter)}")
         else:
             print(f"❌ Error accessing folder: {folder_stats['error']}")
         
@@ -109,13 +145,31 @@ class ProcessorDashboard:
         else:
             print("📭 No files processed yet")
             print()
+        
+        # Failed files
+        if failed_files:
+            print("🔁 Failed Files:")
+            print("-" * 30)
+            
+            for file_id, info in sorted(failed_files.items(), key=lambda x: x[1].get('last_failed_at', 0), reverse=True):
+                if info['status'] == "dead_letter":
+                    state = "dead letter"
+                else:
+                    wait = info['next_retry_at'] - time.time()
+                    state = f"retry in {wait / 60:.0f}m" if wait > 0 else "retry due"
+                print(f"  📄 {info['filename'][:40]:<40} {info['attempts']} attempt(s), {state}")
+                print(f"     ❌ {info.get('last_error', '')[:70]}")
+            
+            print()
     
-    def show_detailed_stats(self):
-        """Show detailed statistics."""
+    def show_detailed_stats(self, hours: int = DEFAULT_ANALYTICS_HOURS):
+        """Show detailed statistics, followed by the operational analytics of the last `hours` hours."""
         processed_files = self._load_processed_files()
         
         if not processed_files:
             print("📭 No processed files to analyze")
+            print()
+            self.show_analytics(hours)
             return
         
         print("📈 Detailed Statistics")
@@ -161,25 +215,183 @@ class ProcessorDashboard:
             print(f"  {date} │ {bar} {count}")
         
         print()
+        self.show_analytics(hours)
+    
+    @staticmethod
+    def _format_seconds(seconds: float) -> str:
+        if seconds is None:
+            return "n/a"
+        if seconds < 60:
+            return f"{seconds:.1f}s"
+        if seconds < 3600:
+            return f"{seconds / 60:.1f}m"
+        return f"{seconds / 3600:.1f}h"
+    
+    @staticmethod
+    def _format_bytes(size: float) -> str:
+        for unit in ("B", "KB", "MB", "GB"):
+            if size < 1024:
+                return f"{size:.1f} {unit}"
+            size /= 1024
+        return f"{size:.1f} TB"
+    
+    def show_analytics(self, hours: int = DEFAULT_ANALYTICS_HOURS):
+        """Show throughput, latency, stage, error and backlog analytics from the processing history."""
+        if not os.path.exists(self.history_db):
+            print("📭 No processing history yet (it is recorded by the auto processor)")
+            return
+        
+        report = ProcessingHistory(self.history_db).analytics(hours)
+        totals, latency = report['totals'], report['latency']
+        
+        print(f"⚡ Operations (last {hours}h)")
+        print("-" * 40)
+        print(f"📦 Throughput: {totals['files']} files ({totals['files_per_hour']:.1f}/h), "
+              f"{totals['rows']:,} rows, {self._format_bytes(totals['bytes'])}")
+        print(f"⏱️  Upload to catalog: p50 {self._format_seconds(latency['p50'])}, "
+              f"p95 {self._format_seconds(latency['p95'])}, p99 {self._format_seconds(latency['p99'])} "
+              f"({latency['count']} files)")
+        attempts = totals['files'] + totals['failures']
+        print(f"❌ Error rate: {totals['error_rate'] * 100:.1f}% ({totals['failures']} of {attempts} attempts)")
+        
+        if report['stages']:
+            print("🧩 Stage times (mean / p95 / max):")
+            for stage, times in report['stages'].items():
+                print(f"   {stage:<10} {self._format_seconds(times['mean']):>7} / "
+                      f"{self._format_seconds(times['p95']):>7} / {self._format_seconds(times['max']):>7}")
+        
+        backlog = report['backlog']
+        if backlog['start'] is not None:
+            growing = backlog['end'] > backlog['start'] * 1.1 and backlog['end'] >= 1
+            trend = "growing" if growing else "shrinking" if backlog['end'] < backlog['start'] * 0.9 else "steady"
+            print(f"📥 Backlog: {backlog['current']} files now; hourly mean {backlog['start']:.1f} → "
+                  f"{backlog['end']:.1f} over the window ({trend})")
+            if growing:
+                print("⚠️  Not keeping up: files arrive faster than they are processed")
+            else:
+                print("✅ Keeping up with new files")
+        print()
+        
+        # Hour by hour, with the backlog of the same hour
+        backlog_by_hour = {hour['hour']: hour for hour in backlog['hourly']}
+        hourly = {hour['hour']: hour for hour in report['hourly']}
+        hour_keys = sorted(set(hourly) | set(backlog_by_hour))
+        if hour_keys:
+            print("🕐 Per hour:")
+            for key in hour_keys:
+                activity = hourly.get(key, {"files": 0, "failures": 0, "rows": 0, "bytes": 0})
+                line = (f"  {datetime.fromtimestamp(key).strftime('%m-%d %H:00')} │ {'█' * min(activity['files'], 30) or '░'} "
+                        f"{activity['files']} files, {activity['rows']:,} rows, {self._format_bytes(activity['bytes'])}, "
+                        f"{activity['failures']} errors")
+                if key in backlog_by_hour:
+                    line += f" │ backlog {backlog_by_hour[key]['mean']:.0f} (max {backlog_by_hour[key]['max']})"
+                print(line)
+            print()
+    
+    @staticmethod
+    def _format_event(event: Dict[str, Any]) -> str:
+        """One line describing a published processor event."""
+        kind = event['event']
+        if kind == "check":
+            text = f"🔍 Checked for new files: {event['new_files']} found"
+        elif kind == "started":
+            text = f"🚀 Processing {event['filename']}"
+        elif kind == "processed":
+            text = (f"✅ Processed {event['filename']}: {event['row_count']:,} rows × "
+                    f"{event['column_count']} cols, {event['dq_rules_count']} rules")
+        elif kind == "failed" and event['status'] == "dead_letter":
+            text = f"☠️  {event['filename']} dead-lettered after {event['attempts']} attempts: {event['error'][:60]}"
+        elif kind == "failed":
+            text = f"❌ {event['filename']} failed (attempt {event['attempts']}): {event['error'][:60]}"
+        elif kind == "error":
+            text = f"❌ Monitoring cycle error: {event['error'][:70]}"
+        elif kind == "running":
+            text = "🤖 Auto processor started"
+        elif kind == "stopped":
+            text = "🛑 Auto processor stopped"
+        else:
+            text = kind
+        return f"{datetime.fromtimestamp(event['time']).strftime('%H:%M:%S')}  {text}"
+    
+    @staticmethod
+    def _counters(snapshot: Dict[str, Any]) -> str:
+        """The headline counters of a published status, on one line."""
+        queue = snapshot['queue']
+        pending = sum(folder['pending_files'] for folder in snapshot['folders'].values())
+        return (f"📋 {snapshot['processed_count']} processed | 📥 {queue['pending']} waiting, {len(snapshot['running'])} running | "
+                f"⏳ {pending} pending | 🔁 {snapshot['failed']['retrying']} retrying, "
+                f"{snapshot['failed']['dead_letter']} dead-lettered")
+    
+    def _render_snapshot(self, snapshot: Dict[str, Any]):
+        """Print a full published status."""
+        started = datetime.fromtimestamp(snapshot['started_at']).strftime('%Y-%m-%d %H:%M:%S')
+        print(f"📡 Auto processor (pid {snapshot['pid']}, running since {started})")
+        print(f"📁 Monitored Folder(s): {', '.join(snapshot['folder_ids'])}")
+        for folder_id, folder in snapshot['folders'].items():
+            print(f"   {folder_id}: {folder['total_files']} files, {folder['supported_files']} supported, "
+                  f"{folder['pending_files']} pending")
+        print(self._counters(snapshot))
+        drive = snapshot['drive']
+        print(f"🌐 Drive API: {drive['requests']} requests, {drive['retries']} retries, "
+              f"{drive['throttled_requests']} throttled, circuit {drive['circuit_state']}")
+        if snapshot.get('stages'):
+            print("⚙️  Pipeline stages: " + ", ".join(
+                f"{name} {stage['utilization']:.0%} busy, {stage['blocked_share']:.0%} blocked "
+                f"({stage['workers']} worker(s))" for name, stage in snapshot['stages'].items()))
+        
+        for running in snapshot['running']:
+            elapsed = time.time() - running['started_at']
+            print(f"   🚀 {running['filename'][:40]:<40} running for {elapsed / 60:.0f}m")
+        if snapshot['recent']:
+            print("🕐 Recent Activity:")
+            for info in reversed(snapshot['recent']):
+                processed_time = datetime.fromisoformat(info['processed_at']).strftime('%Y-%m-%d %H:%M:%S')
+                print(f"   📄 {info['filename'][:40]:<40} {processed_time}")
+        print("-" * 50)
+    
+    def _render_delta(self, previous: Dict[str, Any], snapshot: Dict[str, Any]):
+        """Print what changed between two published statuses."""
+        for event in new_events(snapshot, previous):
+            print(self._format_event(event))
+        if self._counters(snapshot) != self._counters(previous):
+            print(f"          {self._counters(snapshot)}")
     
     def monitor_live(self, refresh_interval: int = 10):
-        """Live monitoring with auto-refresh."""
+        """
+        Live monitoring from the status published by the auto processor.
+        
+        Prints the full status once, then one line per event as it happens.
+        Makes no Drive calls; `refresh_interval` is how long to wait for news
+        before checking whether the processor is still running.
+        """
         print("🔴 Live Monitoring Mode (Press Ctrl+C to exit)")
-        print(f"🔄 Refreshing every {refresh_interval} seconds")
+        print(f"📡 Following {self.status_file}")
         print()
         
+        previous = None
+        warned = False
         try:
             while True:
-                # Clear screen (works on most terminals)
-                os.system('cls' if os.name == 'nt' else 'clear')
-                
-                print(f"🕐 Last Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                print()
+                snapshot = wait_for_status(self.status_file, previous, timeout=refresh_interval)
                 
-                self.show_status()
+                if snapshot is None:
+                    if warned:
+                        continue
+                    if previous is None:
+                        print("⏳ No status published yet; start auto_processor.py (waiting...)")
+                        warned = True
+                    elif is_stale(previous) and not previous['stopped']:
+                        updated = datetime.fromtimestamp(previous['updated_at']).strftime('%H:%M:%S')
+                        print(f"⚠️  No news from the auto processor since {updated}; is it still running?")
+                        warned = True
+                    continue
                 
-                print(f"🔄 Next refresh in {refresh_interval} seconds... (Ctrl+C to exit)")
-                time.sleep(refresh_interval)
+                if previous is None or snapshot['started_at'] != previous['started_at']:
+                    self._render_snapshot(snapshot)
+                else:
+                    self._render_delta(previous, snapshot)
+                previous = snapshot
+                warned = False
                 
         except KeyboardInterrupt:
             print("\n👋 Live monitoring stopped")
@@ -189,8 +401,11 @@ def main():
     
     parser = argparse.ArgumentParser(description="MCP Processor Dashboard")
     parser.add_argument('--live', action='store_true', help='Live monitoring mode')
-    parser.add_argument('--stats', action='store_true', help='Show detailed statistics')
-    parser.add_argument('--refresh', type=int, default=10, help='Refresh interval for live mode')
+    parser.add_argument('--stats', action='store_true', help='Show detailed statistics and operational analytics')
+    parser.add_argument('--hours', type=int, default=DEFAULT_ANALYTICS_HOURS,
+                        help=f'Hours covered by the analytics (default: {DEFAULT_ANALYTICS_HOURS})')
+    parser.add_argument('--refresh', type=int, default=10,
+                        help='Live mode: seconds without news before checking that the processor is running')
     
     args = parser.parse_args()
     
@@ -199,7 +414,7 @@ def main():
     if args.live:
         dashboard.monitor_live(args.refresh)
     elif args.stats:
-        dashboard.show_detailed_stats()
+        dashboard.show_detailed_stats(args.hours)
     else:
         dashboard.show_status()
 
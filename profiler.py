@@ -0,0 +1,603 @@
+#!/usr/bin/env python3
+"""
+Column profiling for dataset metadata extraction.
+
+Profiles are computed one column at a time by `ColumnProfiler`, which can
+also accumulate statistics over a stream of chunks in one pass. Very wide
+DataFrames can be sharded by column across a process pool; fixed-width
+columns, categorical codes and (with pyarrow installed) string columns are
+handed to the workers through shared memory so they are never pickled.
+"""
+
+import os
+import numbers
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Any, Callable, Iterable, Optional, Tuple
+from sketches import KMinValues, SpaceSaving, TDigest
+
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Parallel profiling only pays off once there is enough work to amortise
+# worker start-up and the copy into shared memory.
+PARALLEL_MIN_COLUMNS = 200
+PARALLEL_MIN_CELLS = 2_000_000
+PARALLEL_MIN_COLUMNS_PER_WORKER = 50
+# Shards per worker, so one slow shard does not leave the other cores idle.
+PARALLEL_SHARDS_PER_WORKER = 4
+# Columns in a shared-memory block start on cache-line boundaries (Arrow expects 8-byte alignment).
+SHARED_ALIGNMENT = 64
+
+
+# Quantiles reported for numeric columns
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+HISTOGRAM_BINS = 10
+
+# Candidate datetime granularities, coarsest first, in nanoseconds
+DATETIME_GRANULARITIES = (
+    ("day", 86_400 * 10**9),
+    ("hour", 3_600 * 10**9),
+    ("minute", 60 * 10**9),
+    ("second", 10**9),
+    ("millisecond", 10**6),
+    ("microsecond", 10**3),
+    ("nanosecond", 1)
+)
+
+
+# Heavy-hitter tracking: values monitored per column and values reported
+HEAVY_HITTER_CAPACITY = 64
+TOP_VALUES_REPORTED = 10
+SHAPE_CAPACITY = 32
+TOP_SHAPES_REPORTED = 5
+
+# Distinct-value hashes kept per streamed column; counts beyond this are
+# estimated with about 1.6% relative error
+DISTINCT_SKETCH_SIZE = 4096
+
+# Known value formats for string columns, checked with a full match
+VALUE_PATTERNS = {
+    "email": r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}",
+    "uuid": r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}",
+    "url": r"https?://[^\s/$.?#][^\s]*",
+    "iso_date": r"\d{4}-\d{2}-\d{2}",
+    "iso_datetime": r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?",
+    "integer_string": r"[+-]?\d+",
+    "decimal_string": r"[+-]?(\d+\.\d*|\.\d+)([eE][+-]?\d+)?"
+}
+
+
+def _to_builtin(value: Any) -> Any:
+    """Convert numpy/pandas scalars to JSON-friendly Python values."""
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def _distinct_key(value: Any) -> str:
+    """
+    Key of a value in a mixed-type column, equal for values pandas counts as one.
+
+    1, 1.0 and True compare equal (and are one value to `nunique`) while '1'
+    is another one, so numbers are keyed by their value and everything else
+    by its type and text.
+    """
+    if isinstance(value, numbers.Real):
+        as_float = float(value)
+        if as_float == value:
+            return f"n:{as_float!r}"
+        return f"n:{value!r}"
+    return f"{type(value).__name__}:{value}"
+
+
+def _distinct_hashes(values: pd.Index) -> np.ndarray:
+    """64-bit hashes of distinct values, one per pandas-distinct value."""
+    if values.dtype == object:
+        values = pd.Index([_distinct_key(value) for value in values])
+    elif pd.api.types.is_float_dtype(values.dtype):
+        # -0.0 and 0.0 hash differently but count as one value
+        values = values + 0
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+
+
+def value_shapes(values: pd.Index) -> pd.Index:
+    """Map strings to their shape, e.g. 'AB-1234' -> 'A-9' and 'john@x.io' -> 'a@a.a'."""
+    return (values.str.replace(r'[A-Z]+', 'A', regex=True)
+                  .str.replace(r'[a-z]+', 'a', regex=True)
+                  .str.replace(r'\d+', '9', regex=True))
+
+
+def is_numeric_column(series: pd.Series) -> bool:
+    """Check whether a column gets numeric statistics (any int or float width, not bool)."""
+    return pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+
+
+def _column_kind(dtype) -> str:
+    """Classify a dtype as numeric, bool, datetime, string or other."""
+    if pd.api.types.is_bool_dtype(dtype):
+        return "bool"
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "numeric"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "datetime"
+    if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        return "string"
+    return "other"
+
+
+def _common_dtype(first, second):
+    """Dtype covering two chunks of the same column."""
+    if first is None or first == second:
+        return second
+    if isinstance(first, pd.CategoricalDtype) and isinstance(second, pd.CategoricalDtype):
+        return first
+    return pd.api.types.find_common_type([first, second])
+
+
+class ColumnProfiler:
+    """
+    Single-pass statistics accumulator for one column.
+
+    `update` can be called once with a whole column or repeatedly with chunks
+    of a streamed dataset; every statistic (counts, moments, quantile sketch,
+    histogram, datetime range and granularity, string lengths, heavy hitters,
+    value formats and distinct values) is maintained incrementally, so the
+    data is scanned exactly once and memory per column is bounded by the
+    sketch sizes.
+
+    Distinct values are counted with a KMV sketch, exact up to
+    DISTINCT_SKETCH_SIZE values. A profiler given the whole column in one
+    update (`exact_distinct=True`) counts them exactly with pandas instead.
+    """
+
+    def __init__(self, name: Any, exact_distinct: bool = False):
+        self.name = name
+        self.dtype = None
+        self.rows = 0
+        self.nulls = 0
+        self.exact_distinct = exact_distinct
+        self.distinct_count: Optional[int] = None
+        self.distinct = KMinValues(DISTINCT_SKETCH_SIZE)
+
+        # Numeric moments (Chan et al. parallel update) and sketch
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self.zero_count = 0
+        self.negative_count = 0
+        self.digest = TDigest()
+
+        self.true_count = 0
+
+        self.datetime_min = None
+        self.datetime_max = None
+        self.granularity_index = 0
+
+        self.length_count = 0
+        self.length_sum = 0
+        self.length_min = None
+        self.length_max = None
+
+        # Value distribution and format classification, bounded per column
+        self.heavy_hitters = SpaceSaving(HEAVY_HITTER_CAPACITY)
+        self.shapes = SpaceSaving(SHAPE_CAPACITY)
+        self.pattern_counts = {name: 0 for name in VALUE_PATTERNS}
+        self.classified_count = 0
+
+    def update(self, series: pd.Series) -> 'ColumnProfiler':
+        """Fold a column (or a chunk of one) into the running statistics."""
+        self.dtype = _common_dtype(self.dtype, series.dtype)
+        self.rows += len(series)
+        null_mask = series.isnull()
+        self.nulls += int(null_mask.sum())
+
+        if self.exact_distinct:
+            if self.distinct_count is not None:
+                raise ValueError("Exact distinct counts need the whole column in a single update")
+            self.distinct_count = int(series.nunique())
+
+        non_null = series[~null_mask]
+        if non_null.empty:
+            return self
+
+        kind = _column_kind(series.dtype)
+        value_counts = non_null.value_counts()
+        value_counts = value_counts[value_counts > 0]
+        if not self.exact_distinct:
+            self.distinct.update(_distinct_hashes(value_counts.index))
+        self._update_heavy_hitters(value_counts)
+
+        if kind == "numeric":
+            self._update_numeric(non_null)
+        elif kind == "bool":
+            self.true_count += int(non_null.astype(bool).sum())
+        elif kind == "datetime":
+            self._update_datetime(non_null)
+        elif kind == "string":
+            self._update_lengths(non_null)
+            self._update_patterns(value_counts)
+        return self
+
+    def _update_heavy_hitters(self, value_counts: pd.Series):
+        top = value_counts.iloc[:HEAVY_HITTER_CAPACITY]
+        floor = int(value_counts.iloc[HEAVY_HITTER_CAPACITY]) if len(value_counts) > HEAVY_HITTER_CAPACITY else 0
+        self.heavy_hitters.update_counts(
+            {_to_builtin(value): int(count) for value, count in top.items()},
+            total=int(value_counts.sum()),
+            floor=floor
+        )
+
+    def _update_patterns(self, value_counts: pd.Series):
+        # Classify each distinct value once, weighted by how often it occurs
+        values = pd.Index(value_counts.index.astype(str))
+        counts = value_counts.to_numpy()
+        self.classified_count += int(counts.sum())
+        for name, regex in VALUE_PATTERNS.items():
+            self.pattern_counts[name] += int(counts[np.asarray(values.str.fullmatch(regex), dtype=bool)].sum())
+
+        shape_counts = pd.Series(counts, index=value_shapes(values)).groupby(level=0).sum()
+        shape_counts = shape_counts.sort_values(ascending=False)
+        self.shapes.update_counts(
+            {shape: int(count) for shape, count in shape_counts.iloc[:SHAPE_CAPACITY].items()},
+            total=int(shape_counts.sum()),
+            floor=int(shape_counts.iloc[SHAPE_CAPACITY]) if len(shape_counts) > SHAPE_CAPACITY else 0
+        )
+
+    def _update_numeric(self, non_null: pd.Series):
+        values = non_null.to_numpy(dtype='float64')
+        n = len(values)
+        chunk_mean = values.mean()
+        chunk_m2 = ((values - chunk_mean) ** 2).sum()
+
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta * delta * self.count * n / total
+        self.count = total
+
+        self.min = np.nanmin([self.min, values.min()])
+        self.max = np.nanmax([self.max, values.max()])
+        self.zero_count += int((values == 0).sum())
+        self.negative_count += int((values < 0).sum())
+        self.digest.update(values[np.isfinite(values)])
+
+    def _update_datetime(self, non_null: pd.Series):
+        chunk_min, chunk_max = non_null.min(), non_null.max()
+        self.datetime_min = chunk_min if self.datetime_min is None else min(self.datetime_min, chunk_min)
+        self.datetime_max = chunk_max if self.datetime_max is None else max(self.datetime_max, chunk_max)
+
+        # Granularity is judged on wall-clock time
+        wall = non_null.dt.tz_localize(None) if non_null.dt.tz is not None else non_null
+        ticks = wall.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        while self.granularity_index < len(DATETIME_GRANULARITIES) - 1:
+            if not (ticks % DATETIME_GRANULARITIES[self.granularity_index][1]).any():
+                break
+            self.granularity_index += 1
+
+    def _update_lengths(self, non_null: pd.Series):
+        if isinstance(non_null.dtype, pd.CategoricalDtype):
+            category_lengths = non_null.cat.categories.astype(str).str.len().to_numpy()
+            lengths = category_lengths[non_null.cat.codes.to_numpy()]
+        else:
+            lengths = non_null.astype(str).str.len().to_numpy()
+
+        self.length_count += len(lengths)
+        self.length_sum += int(lengths.sum())
+        chunk_min, chunk_max = int(lengths.min()), int(lengths.max())
+        self.length_min = chunk_min if self.length_min is None else min(self.length_min, chunk_min)
+        self.length_max = chunk_max if self.length_max is None else max(self.length_max, chunk_max)
+
+    def result(self, row_count: Optional[int] = None) -> Dict[str, Any]:
+        """Build the metadata entry for the column."""
+        row_count = self.rows if row_count is None else row_count
+        col_info = {
+            "name": self.name,
+            "data_type": str(self.dtype),
+            "null_count": int(self.nulls),
+            "null_percentage": float(np.int64(self.nulls) / row_count * 100),
+            "unique_count": (self.distinct_count or 0) if self.exact_distinct else self.distinct.estimate()
+        }
+        if not self.exact_distinct and not self.distinct.exact:
+            col_info["estimated_fields"] = ["unique_count"]
+
+        kind = _column_kind(self.dtype)
+        empty = self.rows == 0
+
+        # Add basic statistics for numeric columns
+        if kind == "numeric":
+            std = np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+            col_info.update({
+                "min_value": None if empty else float(self.min),
+                "max_value": None if empty else float(self.max),
+                "mean_value": None if empty else float(self.mean if self.count else np.nan),
+                "std_value": None if empty else float(std),
+                "zero_count": self.zero_count,
+                "negative_count": self.negative_count,
+                "quantiles": {f"p{int(q * 100):02d}": self.digest.quantile(q) for q in QUANTILES} if self.digest.count else {},
+                "histogram": self.digest.histogram(HISTOGRAM_BINS)
+            })
+        elif kind == "bool":
+            non_null = self.rows - self.nulls
+            col_info.update({
+                "true_count": self.true_count,
+                "true_percentage": float(self.true_count / non_null * 100) if non_null else None
+            })
+        elif kind == "datetime" and self.datetime_min is not None:
+            col_info.update({
+                "min_datetime": self.datetime_min.isoformat(),
+                "max_datetime": self.datetime_max.isoformat(),
+                "datetime_granularity": DATETIME_GRANULARITIES[self.granularity_index][0]
+            })
+        elif kind == "string" and self.length_count:
+            col_info.update({
+                "min_length": self.length_min,
+                "max_length": self.length_max,
+                "mean_length": float(self.length_sum / self.length_count)
+            })
+
+        if self.heavy_hitters.total:
+            col_info.update({
+                "top_values": self.heavy_hitters.top(TOP_VALUES_REPORTED),
+                "top_values_exact": self.heavy_hitters.exact
+            })
+        if kind == "string" and self.classified_count:
+            col_info.update({
+                "patterns": {
+                    name: float(count / self.classified_count * 100)
+                    for name, count in self.pattern_counts.items() if count
+                },
+                "top_shapes": [
+                    {"shape": item["value"], "count": item["count"]}
+                    for item in self.shapes.top(TOP_SHAPES_REPORTED)
+                ]
+            })
+
+        return col_info
+
+
+def profile_column(series: pd.Series, row_count: int) -> Dict[str, Any]:
+    """Compute the metadata entry for a single column."""
+    return ColumnProfiler(series.name, exact_distinct=True).update(series).result(row_count)
+
+
+def dataframe_schema(df: pd.DataFrame) -> List[Dict[str, str]]:
+    """Column names and dtypes, available before any statistics are computed."""
+    return [{"name": str(name), "data_type": str(dtype)} for name, dtype in zip(df.columns, df.dtypes)]
+
+
+def profile_columns(df: pd.DataFrame,
+                    progress_callback: Optional[Callable[..., None]] = None) -> List[Dict[str, Any]]:
+    """
+    Profile every column of the DataFrame in the current process.
+
+    `progress_callback` is called as `progress_callback(columns_profiled=..., total_columns=...)`
+    after each column.
+    """
+    profiles = []
+    for i in range(len(df.columns)):
+        profiles.append(profile_column(df.iloc[:, i], len(df)))
+        if progress_callback:
+            progress_callback(columns_profiled=i + 1, total_columns=len(df.columns))
+    return profiles
+
+
+def parallel_worker_count(df: pd.DataFrame, max_workers: Optional[int] = None) -> int:
+    """
+    Return how many worker processes are worth using for this DataFrame.
+
+    A result below 2 means the frame should be profiled serially.
+    """
+    column_count = len(df.columns)
+    if column_count < PARALLEL_MIN_COLUMNS or len(df) * column_count < PARALLEL_MIN_CELLS:
+        return 1
+
+    workers = max_workers or os.cpu_count() or 1
+    return max(1, min(workers, column_count // PARALLEL_MIN_COLUMNS_PER_WORKER))
+
+
+def _is_shareable(series: pd.Series) -> bool:
+    """Check whether the column is backed by a plain fixed-width numpy array."""
+    return isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufcmM'
+
+
+def _is_string_column(series: pd.Series) -> bool:
+    """Check whether the column holds only strings (and nulls), so Arrow can carry it."""
+    if isinstance(series.dtype, pd.StringDtype):
+        return True
+    return series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) == "string"
+
+
+def _arrow_ipc(series: pd.Series) -> "pa.Buffer":
+    """Serialize a string column as an Arrow IPC stream."""
+    array = pa.array(series.to_numpy(dtype=object, na_value=None), type=pa.large_string(), from_pandas=True)
+    batch = pa.record_batch([array], names=["values"])
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue()
+
+
+def _shared_block(series: pd.Series) -> Optional[Tuple[str, np.ndarray, Dict[str, Any]]]:
+    """The bytes a column is shared as, with what the worker needs to rebuild it, or None."""
+    if _is_shareable(series):
+        values = series.to_numpy()
+        return "array", values, {"dtype": values.dtype.str}
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        # Only the categories are pickled; they are usually far fewer than the rows
+        return "categorical", codes, {"dtype": codes.dtype.str, "categories": series.cat.categories,
+                                      "ordered": series.cat.ordered}
+    if PYARROW_AVAILABLE and _is_string_column(series):
+        return "arrow", np.frombuffer(_arrow_ipc(series), dtype=np.uint8), {"dtype": str(series.dtype)}
+    return None
+
+
+def _build_shard(df: pd.DataFrame, positions: range) -> Tuple[Optional[shared_memory.SharedMemory], Dict[str, Any]]:
+    """
+    Copy the columns of a shard into one shared-memory block.
+
+    Fixed-width columns are copied as-is, categoricals as their codes (the
+    categories travel with the task) and string columns as Arrow IPC streams
+    when pyarrow is installed. Columns that fit none of these (mixed-type
+    object columns, other extension dtypes, or strings without pyarrow) are
+    pickled inline instead.
+    """
+    shared_columns = []
+    inline_columns = []
+    total_bytes = 0
+
+    for position in positions:
+        series = df.iloc[:, position]
+        block = _shared_block(series)
+        if block is None:
+            inline_columns.append((position, series))
+            continue
+        shared_columns.append((position, series.name) + block)
+        total_bytes += -(-block[1].nbytes // SHARED_ALIGNMENT) * SHARED_ALIGNMENT
+
+    shm = None
+    layout = []
+    if shared_columns:
+        shm = shared_memory.SharedMemory(create=True, size=max(total_bytes, 1))
+        offset = 0
+        for position, name, kind, values, details in shared_columns:
+            target = np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf, offset=offset)
+            target[:] = values
+            layout.append((position, name, kind, offset, len(values), details))
+            offset += -(-values.nbytes // SHARED_ALIGNMENT) * SHARED_ALIGNMENT
+            del target
+
+    shard = {
+        "shm_name": shm.name if shm else None,
+        "row_count": len(df),
+        "layout": layout,
+        "inline": inline_columns
+    }
+    return shm, shard
+
+
+def _shared_series(shm: shared_memory.SharedMemory, name: Any, kind: str, offset: int,
+                   length: int, details: Dict[str, Any]) -> pd.Series:
+    """Rebuild a column from its shared-memory block."""
+    if kind == "array":
+        values = np.ndarray((length,), dtype=np.dtype(details["dtype"]), buffer=shm.buf, offset=offset)
+        return pd.Series(values, name=name, copy=False)
+    if kind == "categorical":
+        codes = np.ndarray((length,), dtype=np.dtype(details["dtype"]), buffer=shm.buf, offset=offset)
+        # from_codes keeps the array, so copy the (narrow) codes out of the block
+        categorical = pd.Categorical.from_codes(codes.copy(), categories=details["categories"],
+                                                ordered=details["ordered"])
+        return pd.Series(categorical, name=name)
+
+    view = shm.buf[offset:offset + length]
+    try:
+        with pa.ipc.open_stream(pa.py_buffer(view)) as reader:
+            values = reader.read_all().column(0).to_numpy()
+        series = pd.Series(values, name=name, dtype=object)
+        return series if details["dtype"] == "object" else series.astype(details["dtype"])
+    finally:
+        # The Arrow objects must be gone before the view (and the block) can be released
+        reader = values = None
+        view.release()
+
+
+def _profile_shard(shard: Dict[str, Any]) -> List[Tuple[int, Dict[str, Any]]]:
+    """Worker entry point: profile the columns of one shard."""
+    row_count = shard["row_count"]
+    results = [(position, profile_column(series, row_count)) for position, series in shard["inline"]]
+
+    if shard["shm_name"]:
+        shm = shared_memory.SharedMemory(name=shard["shm_name"])
+        try:
+            for position, name, kind, offset, length, details in shard["layout"]:
+                series = _shared_series(shm, name, kind, offset, length, details)
+                results.append((position, profile_column(series, row_count)))
+                del series
+        finally:
+            shm.close()
+
+    return results
+
+
+def profile_columns_parallel(df: pd.DataFrame, max_workers: int,
+                             progress_callback: Optional[Callable[..., None]] = None) -> List[Dict[str, Any]]:
+    """
+    Profile the columns of a wide DataFrame across a process pool.
+
+    The column set is split into contiguous shards; results are stitched
+    back in column order so the output matches `profile_columns` exactly.
+    Progress is reported as each shard is collected.
+    """
+    column_count = len(df.columns)
+    shard_count = min(column_count, max_workers * PARALLEL_SHARDS_PER_WORKER)
+    bounds = np.linspace(0, column_count, shard_count + 1, dtype=int)
+
+    segments = []
+    profiles: List[Optional[Dict[str, Any]]] = [None] * column_count
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = []
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                if start == stop:
+                    continue
+                shm, shard = _build_shard(df, range(start, stop))
+                if shm:
+                    segments.append(shm)
+                futures.append(executor.submit(_profile_shard, shard))
+
+            columns_profiled = 0
+            for future in futures:
+                for position, col_info in future.result():
+                    profiles[position] = col_info
+                    columns_profiled += 1
+                if progress_callback:
+                    progress_callback(columns_profiled=columns_profiled, total_columns=column_count)
+    finally:
+        for shm in segments:
+            shm.close()
+            shm.unlink()
+
+    return profiles
+
+
+def profile_chunks(chunks: Iterable[pd.DataFrame],
+                   progress_callback: Optional[Callable[..., None]] = None) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Profile a stream of DataFrame chunks (e.g. `pd.read_csv(..., chunksize=...)`)
+    in a single pass. Memory is one chunk plus the per-column sketches, never
+    the whole dataset; distinct counts above DISTINCT_SKETCH_SIZE are estimates.
+
+    `progress_callback` receives the schema as soon as the first chunk is read
+    (`schema=...`), the running row count after every chunk (`rows_parsed=...`)
+    and finally `columns_profiled=..., total_columns=...`.
+
+    Returns:
+        Tuple of (total row count, column profiles)
+    """
+    profilers: Optional[List[ColumnProfiler]] = None
+    row_count = 0
+    for chunk in chunks:
+        if profilers is None:
+            profilers = [ColumnProfiler(name) for name in chunk.columns]
+            if progress_callback:
+                progress_callback(schema=dataframe_schema(chunk))
+        row_count += len(chunk)
+        for i, profiler in enumerate(profilers):
+            profiler.update(chunk.iloc[:, i])
+        if progress_callback:
+            progress_callback(rows_parsed=row_count)
+
+    columns = [profiler.result(row_count) for profiler in profilers or []]
+    if progress_callback:
+        progress_callback(columns_profiled=len(columns), total_columns=len(columns))
+    return row_count, columns
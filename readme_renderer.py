@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Rendering of the dataset README and of dataset summaries.
+
+The README is assembled from the section templates below and one line per
+column, rule and quality entry, written to a file object as it is produced,
+so rendering time and memory grow linearly with the size of the schema.
+
+The same renderer produces summaries for the MCP `get_dataset_summary`
+tool. A summary can be truncated to the first N columns (and the most
+severe N rules) for very wide datasets; truncated sections end with a note
+pointing to the dataset:// resources. Rendered summaries are cached in
+memory, keyed by the metadata file's path, inode, modification time and
+size, the requested size and the processing date shown in the header, so a
+dataset is only rendered again after it has been reprocessed and a cache
+hit costs one stat call.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from io import StringIO
+from typing import Any, Dict, List, Optional, TextIO
+from artifact_format import find_artifact, load_dq_report, read_json_artifact
+from dataset_resources import dataset_uri
+
+HEADER_TEMPLATE = """# Dataset Processing Report
+
+## Dataset Information
+- **Filename**: {filename}
+- **Rows**: {row_count:,}
+- **Columns**: {column_count}
+- **Processing Date**: {processed_at}
+- **Profile Mode**: {profile_mode}
+
+## Column Details
+| Column Name | Data Type | Null Count | Null % | Unique Count | Min Value | Max Value | Mean |
+|-------------|-----------|------------|--------|--------------|-----------|-----------|------|
+"""
+
+DQ_SUMMARY_TEMPLATE = """
+## Data Quality Summary
+- **Total Rules**: {total_rules}
+- **Error Rules**: {error_rules}
+- **Warning Rules**: {warning_rules}
+
+## Data Quality Rules
+"""
+
+FOOTER_TEMPLATE = """
+## Files Generated
+- `{filename}` - Original dataset
+- `{metadata_file}` - Detailed metadata
+- `{base_name}_contract.xlsx` - Data contract with schema and DQ rules
+- `{dq_report_file}` - Comprehensive data quality report
+- `README.md` - This summary document
+
+## Usage
+This dataset has been processed through the MCP Dataset Onboarding pipeline. All artifacts are ready for catalog publication or further analysis.
+"""
+
+TRUNCATED_TEMPLATE = "\n_… {remaining:,} more {what} not shown; read `{uri}` for all of them._\n"
+
+# Columns shown by get_dataset_summary unless the caller asks otherwise
+DEFAULT_SUMMARY_COLUMNS = 50
+
+# Rendered summaries kept in memory
+SUMMARY_CACHE_SIZE = 64
+
+
+def _stat(col: Dict[str, Any], key: str) -> str:
+    value = col.get(key)
+    return f"{value:.4f}" if value is not None else "N/A"
+
+
+def _column_row(col: Dict[str, Any]) -> str:
+    return f"| {col['name']} | {col['data_type']} | {col['null_count']} | {col['null_percentage']:.1f}% | {col['unique_count']} | {_stat(col, 'min_value')} | {_stat(col, 'max_value')} | {_stat(col, 'mean_value')} |\n"
+
+
+def _distribution_line(col: Dict[str, Any]) -> Optional[str]:
+    if col.get('quantiles'):
+        q = col['quantiles']
+        return f"- **{col['name']}**: p01 {q['p01']:.4g}, median {q['p50']:.4g}, p99 {q['p99']:.4g}; {col['zero_count']} zeros, {col['negative_count']} negatives\n"
+    if 'min_datetime' in col:
+        return f"- **{col['name']}**: {col['min_datetime']} to {col['max_datetime']} ({col['datetime_granularity']} granularity)\n"
+    if 'true_count' in col:
+        return f"- **{col['name']}**: {col['true_count']} true ({col['true_percentage'] or 0:.1f}%)\n"
+    if 'min_length' in col:
+        return f"- **{col['name']}**: length {col['min_length']}-{col['max_length']} (mean {col['mean_length']:.1f})\n"
+    return None
+
+
+def _rule_line(rule: Dict[str, Any]) -> str:
+    severity_icon = "🔴" if rule['severity'] == 'error' else "🟡"
+    return f"- {severity_icon} **{rule['rule_type'].upper()}**: {rule['description']}\n"
+
+
+def _quality_line(col_quality: Dict[str, Any]) -> str:
+    return f"- **{col_quality['column_name']}**: {col_quality['completeness']:.1f}% complete, {col_quality['uniqueness']:.1f}% unique\n"
+
+
+def render_readme(out: TextIO, metadata: Dict[str, Any], dq_rules: List[Dict[str, Any]],
+                  dq_report: Dict[str, Any], processed_at: Optional[str] = None,
+                  max_columns: Optional[int] = None, dataset_uri: Optional[str] = None,
+                  metadata_file: Optional[str] = None, dq_report_file: Optional[str] = None):
+    """
+    Write the dataset README to a text file object.
+
+    Args:
+        out: Destination (an open file, StringIO, ...)
+        metadata: Dataset metadata
+        dq_rules: Suggested DQ rules
+        dq_report: DQ report (its summary and column quality are rendered)
+        processed_at: Processing date to show (default: now)
+        max_columns: Show only this many columns, column quality entries and
+            rules (errors first); None renders everything
+        dataset_uri: Resource URI mentioned in truncation notes
+        metadata_file, dq_report_file: Names the JSON artifacts were written
+            under (see write_json_artifact; default: uncompressed `.json`)
+    """
+    columns = metadata['columns']
+    shown_columns = columns if max_columns is None else columns[:max_columns]
+    if max_columns is None:
+        shown_rules = dq_rules
+    else:
+        shown_rules = sorted(dq_rules, key=lambda rule: rule['severity'] != 'error')[:max_columns]
+
+    def truncation_note(total: int, shown: int, what: str, resource: str):
+        if shown < total:
+            out.write(TRUNCATED_TEMPLATE.format(remaining=total - shown, what=what,
+                                                uri=f"{dataset_uri or 'dataset://<name>'}/{resource}"))
+
+    out.write(HEADER_TEMPLATE.format(
+        filename=metadata['filename'],
+        row_count=metadata['row_count'],
+        column_count=metadata['column_count'],
+        processed_at=processed_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        profile_mode=metadata.get('profile_mode', 'exact')
+    ))
+    out.writelines(map(_column_row, shown_columns))
+    truncation_note(len(columns), len(shown_columns), "columns", "columns")
+
+    out.write("\n## Distribution Details\n")
+    out.writelines(filter(None, map(_distribution_line, shown_columns)))
+
+    out.write(DQ_SUMMARY_TEMPLATE.format(**dq_report['data_quality_summary']))
+    out.writelines(map(_rule_line, shown_rules))
+    truncation_note(len(dq_rules), len(shown_rules), "rules", "dq_report")
+
+    out.write("\n## Column Quality Metrics\n")
+    column_quality = dq_report['column_quality']
+    shown_quality = column_quality if max_columns is None else column_quality[:max_columns]
+    out.writelines(map(_quality_line, shown_quality))
+    truncation_note(len(column_quality), len(shown_quality), "column quality entries", "dq_report")
+
+    base_name = metadata['filename'].split('.')[0]
+    out.write(FOOTER_TEMPLATE.format(filename=metadata['filename'], base_name=base_name,
+                                     metadata_file=metadata_file or f"{base_name}_metadata.json",
+                                     dq_report_file=dq_report_file or f"{base_name}_dq_report.json"))
+
+
+def write_readme(readme_path: str, metadata: Dict[str, Any], dq_rules: List[Dict[str, Any]],
+                 dq_report: Dict[str, Any], **kwargs):
+    """Render the README straight into a file."""
+    with open(readme_path, 'w', encoding='utf-8') as f:
+        render_readme(f, metadata, dq_rules, dq_report, **kwargs)
+
+
+class SummaryCache:
+    """LRU cache of rendered summaries keyed by metadata file identity, summary size and processing date."""
+
+    def __init__(self, max_entries: int = SUMMARY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[str]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        return None
+
+    def put(self, key: tuple, summary: str):
+        with self._lock:
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_summaries = SummaryCache()
+
+
+def render_dataset_summary(dataset: Dict[str, Any], max_columns: Optional[int] = DEFAULT_SUMMARY_COLUMNS) -> Optional[str]:
+    """
+    Render the summary of a processed dataset from its stored artifacts.
+
+    Args:
+        dataset: Catalog entry (dataset_name, folder_path, processed_date)
+        max_columns: Columns to include; None for the full README content
+
+    Returns:
+        Markdown text, or None if the dataset has no metadata or DQ report
+    """
+    name, folder = dataset['dataset_name'], dataset['folder_path']
+    metadata_path = find_artifact(folder, f"{name}_metadata")
+    if metadata_path is None:
+        return None
+
+    # Publishing replaces the whole folder, so a reprocessed dataset always has a new file
+    stat = os.stat(metadata_path)
+    key = (metadata_path, stat.st_ino, stat.st_mtime_ns, stat.st_size, max_columns, dataset.get('processed_date'))
+    summary = _summaries.get(key)
+    if summary is not None:
+        return summary
+
+    metadata = read_json_artifact(metadata_path)
+    dq_report_path = find_artifact(folder, f"{name}_dq_report")
+    dq_report = load_dq_report(folder, name, metadata)
+    if dq_report is None:
+        return None
+
+    out = StringIO()
+    processed_at = datetime.fromtimestamp(dataset['processed_date']).strftime('%Y-%m-%d %H:%M:%S') \
+        if dataset.get('processed_date') else None
+    render_readme(out, metadata, dq_report['suggested_rules'], dq_report, processed_at=processed_at,
+                  max_columns=max_columns, dataset_uri=dataset_uri(name, "").rstrip('/'),
+                  metadata_file=os.path.basename(metadata_path), dq_report_file=os.path.basename(dq_report_path))
+    summary = out.getvalue()
+    _summaries.put(key, summary)
+    return summary
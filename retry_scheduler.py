@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Retry scheduling for files the auto-processor failed to process.
+
+Every failure is recorded with its attempt count and the time of the next
+allowed attempt. The delay starts at `retry_failed_after` seconds and
+doubles with each further failure (up to RETRY_MAX_DELAY_SECONDS). After
+`max_attempts` failures a file is dead-lettered: it is no longer retried
+until its contents change on Drive or it is requeued by hand.
+
+State is kept in a small JSON file next to processed_files.json so that
+schedules survive restarts and the dashboard can show them. Instances
+sharing a lease store pass the history kept with the lease to
+`record_failure`, so a file's attempts are counted across instances.
+"""
+
+import os
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+FAILED_FILES_LOG = "failed_files.json"
+
+DEFAULT_RETRY_AFTER_SECONDS = 3600
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_MAX_DELAY_SECONDS = 24 * 3600
+
+RETRY_STATUSES = ("retrying", "dead_letter")
+
+
+def retry_delay(attempts: int, retry_after: float = DEFAULT_RETRY_AFTER_SECONDS) -> float:
+    """Seconds to wait after the given number of failed attempts."""
+    return min(RETRY_MAX_DELAY_SECONDS, retry_after * 2 ** max(0, attempts - 1))
+
+
+def load_failed_files(path: str = FAILED_FILES_LOG) -> Dict[str, Dict[str, Any]]:
+    """Read the failure log; a missing or unreadable log counts as empty."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Warning: Could not load failed files log: {e}")
+        return {}
+
+
+class RetryScheduler:
+    """Tracks failed files and decides when each may be attempted again."""
+
+    def __init__(self, path: str = FAILED_FILES_LOG,
+                 retry_after: float = DEFAULT_RETRY_AFTER_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.retry_after = retry_after
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self.failures = load_failed_files(path)
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.failures, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def is_due(self, file_info: Dict[str, Any], now: Optional[float] = None) -> bool:
+        """
+        Whether a file may be processed now.
+
+        Files that never failed are always due. A file whose modifiedTime
+        changed since its last failure gets a fresh start, even when
+        dead-lettered.
+        """
+        with self._lock:
+            failure = self.failures.get(file_info['id'])
+            if not failure:
+                return True
+            if file_info.get('modifiedTime') and file_info['modifiedTime'] != failure.get('modified_time'):
+                del self.failures[file_info['id']]
+                self._save()
+                return True
+            if failure['status'] == "dead_letter":
+                return False
+            return (now or time.time()) >= failure['next_retry_at']
+
+    def record_failure(self, file_info: Dict[str, Any], error: str,
+                       shared: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Count a failed attempt and schedule the next one. Returns the updated entry.
+
+        Args:
+            shared: Failure history recorded by any instance (kept with the
+                file's lease); counted from instead of the local log
+        """
+        now = time.time()
+        with self._lock:
+            previous = dict(shared) if shared else self.failures.get(file_info['id'])
+            if previous and previous.get('modified_time') != file_info.get('modifiedTime'):
+                previous = None  # The file changed since; it starts over
+            failure = previous or {
+                "filename": file_info.get('name', 'Unknown'),
+                "attempts": 0,
+                "first_failed_at": now
+            }
+            failure["attempts"] += 1
+            failure["last_failed_at"] = now
+            failure["last_error"] = error
+            failure["modified_time"] = file_info.get('modifiedTime')
+            if failure["attempts"] >= self.max_attempts:
+                failure["status"] = "dead_letter"
+                failure["next_retry_at"] = None
+            else:
+                failure["status"] = "retrying"
+                failure["next_retry_at"] = now + retry_delay(failure["attempts"], self.retry_after)
+            self.failures[file_info['id']] = failure
+            self._save()
+            return dict(failure)
+
+    def record_success(self, file_id: str):
+        """Forget a file's failures once it has been processed."""
+        with self._lock:
+            if self.failures.pop(file_id, None) is not None:
+                self._save()
+
+    def requeue(self, file_id: Optional[str] = None) -> int:
+        """
+        Clear the failure history of one file, or of every dead-lettered file,
+        so it is attempted on the next cycle. Returns the number of files requeued.
+        """
+        with self._lock:
+            if file_id is not None:
+                file_ids = [file_id] if file_id in self.failures else []
+            else:
+                file_ids = [fid for fid, failure in self.failures.items() if failure['status'] == "dead_letter"]
+            for fid in file_ids:
+                del self.failures[fid]
+            if file_ids:
+                self._save()
+            return len(file_ids)
+
+    def entries(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Failure entries (with "file_id"), soonest retry first and dead letters last."""
+        with self._lock:
+            items = [dict(failure, file_id=fid) for fid, failure in self.failures.items()
+                     if status is None or failure['status'] == status]
+        return sorted(items, key=lambda f: (f['status'] == "dead_letter", f['next_retry_at'] or 0))
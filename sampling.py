@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Sampling-based fast profile mode.
+
+Instead of scanning the whole dataset, a uniform row sample is profiled and
+population statistics are reported with confidence intervals. Every value
+that is an estimate rather than an exact figure is listed in the column's
+`estimated_fields`.
+
+Two ways of drawing the sample are supported:
+- reservoir sampling over a stream of DataFrame chunks (one pass, bounded memory)
+- block sampling of a CSV from byte ranges spread across the file, so only a
+  few megabytes of a multi-gigabyte file ever need to be fetched
+"""
+
+import math
+import numpy as np
+import pandas as pd
+from io import StringIO
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+from profiler import is_numeric_column
+from pipeline_config import PROFILE_MODES, validate_profile_mode
+
+# Rows kept by the reservoir sampler
+DEFAULT_SAMPLE_SIZE = 50_000
+
+# Byte-range sampling budget for remote CSV files
+DEFAULT_BLOCK_COUNT = 16
+DEFAULT_BLOCK_BYTES = 256 * 1024
+
+# z-score for the reported confidence intervals
+CONFIDENCE_LEVEL = 0.95
+_Z = 1.959963984540054
+
+
+def reservoir_sample(chunks: Iterable[pd.DataFrame], sample_size: int = DEFAULT_SAMPLE_SIZE,
+                     seed: int = 0) -> Tuple[pd.DataFrame, int]:
+    """
+    Draw a uniform sample of rows from a stream of DataFrame chunks.
+
+    Each row gets a random key and the rows with the smallest keys are kept,
+    which is equivalent to classic reservoir sampling but vectorises per chunk.
+
+    Returns:
+        Tuple of (sample DataFrame, total number of rows seen)
+    """
+    rng = np.random.default_rng(seed)
+    sample = None
+    sample_keys = np.empty(0)
+    rows_seen = 0
+
+    for chunk in chunks:
+        rows_seen += len(chunk)
+        keys = rng.random(len(chunk))
+
+        if sample is None:
+            sample, sample_keys = chunk, keys
+        else:
+            sample = pd.concat([sample, chunk], ignore_index=True)
+            sample_keys = np.concatenate([sample_keys, keys])
+
+        if len(sample) > sample_size:
+            keep = np.sort(np.argpartition(sample_keys, sample_size)[:sample_size])
+            sample = sample.iloc[keep].reset_index(drop=True)
+            sample_keys = sample_keys[keep]
+
+    if sample is None:
+        sample = pd.DataFrame()
+    return sample.reset_index(drop=True), rows_seen
+
+
+def block_ranges(file_size: int, block_count: int = DEFAULT_BLOCK_COUNT,
+                 block_bytes: int = DEFAULT_BLOCK_BYTES) -> List[Tuple[int, int]]:
+    """
+    Return inclusive byte ranges spread evenly across a file.
+
+    The first range always starts at offset 0 so the header row is included.
+    Returns a single range covering the file when it fits in the budget.
+    """
+    if file_size <= block_count * block_bytes:
+        return [(0, max(file_size - 1, 0))]
+
+    stride = (file_size - block_bytes) / (block_count - 1)
+    return [(int(i * stride), min(int(i * stride) + block_bytes, file_size) - 1) for i in range(block_count)]
+
+
+def dataframe_from_csv_blocks(blocks: List[bytes], encoding: str = 'utf-8') -> Tuple[pd.DataFrame, int]:
+    """
+    Parse rows out of byte blocks sampled from a CSV file.
+
+    The first block must start at the beginning of the file; its first line is
+    used as the header. Partial lines at block edges are discarded.
+
+    Returns:
+        Tuple of (sampled rows, number of bytes the kept rows occupied)
+    """
+    first_text = blocks[0].decode(encoding, errors='replace')
+    header, _, first_body = first_text.partition('\n')
+
+    bodies = [first_body] + [block.decode(encoding, errors='replace').partition('\n')[2] for block in blocks[1:]]
+    lines = []
+    sampled_bytes = 0
+    for body in bodies:
+        # The last line of a block is almost always cut off
+        body_lines = body.split('\n')[:-1] if len(blocks) > 1 else body.split('\n')
+        body_lines = [line for line in body_lines if line.strip()]
+        lines.extend(body_lines)
+        sampled_bytes += sum(len(line.encode(encoding)) + 1 for line in body_lines)
+
+    df = pd.read_csv(StringIO(header + '\n' + '\n'.join(lines)), on_bad_lines='skip')
+    return df, sampled_bytes
+
+
+def _finite_population_correction(sample_rows: int, population_rows: int) -> float:
+    if population_rows <= 1 or sample_rows >= population_rows:
+        return 0.0
+    return math.sqrt((population_rows - sample_rows) / (population_rows - 1))
+
+
+def _wilson_interval(successes: int, trials: int, fpc: float) -> Tuple[float, float]:
+    """Wilson score interval for a proportion, with finite population correction."""
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    z = _Z * fpc
+    denom = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denom
+    half = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def _estimate_distinct(series: pd.Series, population_rows: int) -> int:
+    """
+    Guaranteed-error estimator of the number of distinct values.
+
+    Values seen once in the sample are scaled up by sqrt(N/n); values seen
+    more than once are assumed to have been fully discovered. Columns where
+    nearly every sampled value is distinct are treated as keys and scaled
+    linearly, since the estimator badly undercounts those.
+    """
+    values = series.dropna()
+    if values.empty:
+        return 0
+    frequencies = values.value_counts()
+    seen_once = int((frequencies == 1).sum())
+    seen_more = len(frequencies) - seen_once
+    ratio = population_rows / len(series) if len(series) else 1.0
+    if seen_once >= 0.95 * len(values):
+        return int(min(population_rows, round(len(frequencies) * ratio)))
+    return int(min(population_rows, round(math.sqrt(ratio) * seen_once + seen_more)))
+
+
+def profile_sampled_column(series: pd.Series, population_rows: int) -> Dict[str, Any]:
+    """Compute an estimated metadata entry for a column from a row sample."""
+    sample_rows = len(series)
+    fpc = _finite_population_correction(sample_rows, population_rows)
+
+    null_count = int(series.isnull().sum())
+    null_fraction = null_count / sample_rows if sample_rows else 0.0
+    null_low, null_high = _wilson_interval(null_count, sample_rows, fpc)
+
+    col_info = {
+        "name": series.name,
+        "data_type": str(series.dtype),
+        "null_count": int(round(null_fraction * population_rows)),
+        "null_percentage": float(null_fraction * 100),
+        "null_percentage_ci": [float(null_low * 100), float(null_high * 100)],
+        "unique_count": _estimate_distinct(series, population_rows),
+        "estimated_fields": ["null_count", "null_percentage", "unique_count"]
+    }
+
+    if is_numeric_column(series):
+        values = pd.Series(series.to_numpy(dtype='float64', na_value=np.nan)).dropna()
+        n = len(values)
+        mean = float(values.mean()) if n else float('nan')
+        std = float(values.std()) if n > 1 else float('nan')
+        mean_half = _Z * fpc * std / math.sqrt(n) if n > 1 else float('nan')
+        std_half = _Z * fpc * std / math.sqrt(2 * (n - 1)) if n > 1 else float('nan')
+
+        col_info.update({
+            "min_value": float(values.min()) if n else float('nan'),
+            "max_value": float(values.max()) if n else float('nan'),
+            "mean_value": mean,
+            "mean_value_ci": [mean - mean_half, mean + mean_half],
+            "std_value": std,
+            "std_value_ci": [max(0.0, std - std_half), std + std_half]
+        })
+        col_info["estimated_fields"] += ["min_value", "max_value", "mean_value", "std_value"]
+
+    return col_info
+
+
+def extract_sampled_metadata(sample: pd.DataFrame, filename: str, population_rows: int,
+                             row_count_estimated: bool = False,
+                             sampling_method: str = "reservoir") -> Dict[str, Any]:
+    """
+    Extract metadata from a row sample, in the same shape as
+    `extract_metadata_from_dataframe` plus confidence intervals.
+
+    Args:
+        sample: Uniform sample of the dataset's rows
+        filename: Name of the source file
+        population_rows: Total rows in the dataset (or an estimate of it)
+        row_count_estimated: Whether population_rows is itself an estimate
+        sampling_method: How the sample was drawn ("reservoir" or "byte_blocks")
+    """
+    population_rows = max(population_rows, len(sample))
+    metadata = {
+        "filename": filename,
+        "row_count": int(population_rows),
+        "column_count": len(sample.columns),
+        "columns": [],
+        "summary_stats": {},
+        "profile_mode": "sampled",
+        "sampling": {
+            "method": sampling_method,
+            "sample_size": len(sample),
+            "confidence_level": CONFIDENCE_LEVEL
+        },
+        "estimated_fields": ["row_count"] if row_count_estimated else []
+    }
+
+    for i in range(len(sample.columns)):
+        metadata["columns"].append(profile_sampled_column(sample.iloc[:, i], population_rows))
+
+    return metadata
+
+
+def sample_csv_blocks(blocks: List[bytes], filename: str, file_size: int) -> Dict[str, Any]:
+    """Profile a CSV from byte blocks, estimating the row count from the file size."""
+    sample, sampled_bytes = dataframe_from_csv_blocks(blocks)
+    bytes_per_row = sampled_bytes / len(sample) if len(sample) else 1
+    estimated_rows = int(round(file_size / bytes_per_row)) if bytes_per_row else len(sample)
+    return extract_sampled_metadata(sample, filename, estimated_rows,
+                                    row_count_estimated=True, sampling_method="byte_blocks")
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Bounded-memory sketches used by the column profiler.
+
+Sketches can be updated chunk by chunk and merged, so statistics over
+streamed or sharded data come from a single pass.
+"""
+
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+
+class TDigest:
+    """
+    Merging t-digest for approximate quantiles.
+
+    Values are clustered into centroids whose size shrinks towards the tails
+    (arcsine scale function), which keeps extreme quantiles accurate. Memory
+    is bounded by roughly `compression` centroids regardless of input size.
+    """
+
+    def __init__(self, compression: int = 200):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray):
+        """Add a batch of finite float values."""
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._compress(np.concatenate([self.means, values]),
+                       np.concatenate([self.weights, np.ones(len(values))]))
+
+    def merge(self, other: 'TDigest'):
+        """Merge another digest into this one."""
+        if other.count == 0:
+            return
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(np.concatenate([self.means, other.means]),
+                       np.concatenate([self.weights, other.weights]))
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        if len(means) <= self.compression:
+            self.means, self.weights = means, weights
+            return
+
+        total = weights.sum()
+        # Quantile at each point's midpoint, mapped through the k1 scale function;
+        # points whose k-values share an integer bucket collapse into one centroid.
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        groups = np.floor(k - k.min()).astype(np.int64)
+        _, groups = np.unique(groups, return_inverse=True)
+
+        merged_weights = np.bincount(groups, weights=weights)
+        self.means = np.bincount(groups, weights=means * weights) / merged_weights
+        self.weights = merged_weights
+
+    def quantile(self, q: float) -> float:
+        """Estimate the value at quantile q (0..1)."""
+        if self.count == 0:
+            return float('nan')
+        if len(self.means) == 1:
+            return float(self.means[0])
+
+        centres = np.cumsum(self.weights) - self.weights / 2
+        target = q * self.weights.sum()
+        positions = np.concatenate([[0.0], centres, [self.weights.sum()]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(target, positions, values))
+
+    def cdf(self, x: np.ndarray) -> np.ndarray:
+        """Estimate the fraction of values at or below each x."""
+        if self.count == 0:
+            return np.zeros(len(x))
+        centres = np.cumsum(self.weights) - self.weights / 2
+        total = self.weights.sum()
+        positions = np.concatenate([[0.0], centres, [total]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(x, values, positions) / total
+
+    def histogram(self, bins: int = 10) -> Dict[str, List[float]]:
+        """Approximate equal-width histogram between the observed min and max."""
+        if self.count == 0:
+            return {"bin_edges": [], "counts": []}
+        if self.min == self.max:
+            return {"bin_edges": [self.min, self.max], "counts": [self.count]}
+        edges = np.linspace(self.min, self.max, bins + 1)
+        cumulative = np.round(self.cdf(edges) * self.count).astype(np.int64)
+        cumulative[0], cumulative[-1] = 0, self.count
+        counts = np.diff(np.maximum.accumulate(cumulative))
+        return {"bin_edges": [float(e) for e in edges], "counts": [int(c) for c in counts]}
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitters summary for approximate top-k counts.
+
+    At most `capacity` values are monitored. Each monitored value has an
+    estimated count and an error bound; any value that is not monitored
+    occurred at most `floor` times. Summaries of successive chunks are merged
+    (Agarwal et al., "Mergeable Summaries"), so memory stays bounded on
+    arbitrarily long streams.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.counts: Dict[Any, int] = {}
+        self.errors: Dict[Any, int] = {}
+        # Upper bound on the count of any value that is not monitored
+        self.floor = 0
+        self.total = 0
+
+    @property
+    def exact(self) -> bool:
+        """True while every distinct value seen so far is monitored with an exact count."""
+        return self.floor == 0
+
+    def update_counts(self, counts: Dict[Any, int], total: Optional[int] = None, floor: int = 0):
+        """
+        Fold in exact counts from one chunk.
+
+        `counts` may already be cut down to the chunk's most frequent values;
+        `floor` is then the largest count that was left out and `total` the
+        number of values in the whole chunk.
+        """
+        if not counts:
+            return
+        ordered = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+        if len(ordered) > self.capacity:
+            floor = max(floor, ordered[self.capacity][1])
+        self._merge(dict(ordered[:self.capacity]), {}, floor)
+        self.total += sum(counts.values()) if total is None else total
+
+    def merge(self, other: 'SpaceSaving'):
+        """Merge another summary into this one."""
+        self._merge(other.counts, other.errors, other.floor)
+        self.total += other.total
+
+    def _merge(self, counts: Dict[Any, int], errors: Dict[Any, int], floor: int):
+        merged_counts = {}
+        merged_errors = {}
+        for value in set(self.counts) | set(counts):
+            # A value missing from one side may have occurred up to that side's floor times
+            merged_counts[value] = self.counts.get(value, self.floor) + counts.get(value, floor)
+            merged_errors[value] = (self.errors.get(value, 0) + errors.get(value, 0)
+                                    + (0 if value in self.counts else self.floor)
+                                    + (0 if value in counts else floor))
+
+        ordered = sorted(merged_counts, key=merged_counts.get, reverse=True)
+        kept = ordered[:self.capacity]
+        dropped_max = merged_counts[ordered[self.capacity]] if len(ordered) > self.capacity else 0
+        self.floor = max(self.floor + floor, dropped_max)
+        self.counts = {value: merged_counts[value] for value in kept}
+        self.errors = {value: merged_errors[value] for value in kept}
+
+    def top(self, k: int) -> List[Dict[str, Any]]:
+        """Return the k most frequent values with their estimated counts and error bounds."""
+        ordered = sorted(self.counts, key=self.counts.get, reverse=True)[:k]
+        return [{"value": value, "count": self.counts[value], "error": self.errors[value]} for value in ordered]
+
+
+class KMinValues:
+    """
+    K-minimum-values sketch for approximate distinct counts.
+
+    Keeps the `k` smallest distinct 64-bit hashes seen. While fewer than `k`
+    distinct hashes have been seen the count is exact; after that the k-th
+    smallest hash gives an unbiased estimate with a relative standard error
+    of about 1/sqrt(k). Memory is bounded by `k` hashes regardless of input
+    size, and sketches of chunks or shards merge into the sketch of the whole.
+    """
+
+    def __init__(self, k: int = 4096):
+        self.k = k
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    @property
+    def exact(self) -> bool:
+        """True while every distinct hash seen so far is kept."""
+        return len(self.hashes) < self.k
+
+    def update(self, hashes: np.ndarray):
+        """Add a batch of uniformly distributed uint64 hashes."""
+        if len(self.hashes) == self.k:
+            hashes = hashes[hashes < self.hashes[-1]]
+        self.hashes = np.union1d(self.hashes, hashes)[:self.k]
+
+    def merge(self, other: 'KMinValues'):
+        """Merge another sketch (of the same `k`) into this one."""
+        self.update(other.hashes)
+
+    def estimate(self) -> int:
+        """Number of distinct values (exact while `exact` is True)."""
+        if self.exact:
+            return len(self.hashes)
+        # The k-th smallest of n uniform hashes sits near k / n of the hash range
+        return int(round((self.k - 1) * 2.0 ** 64 / (float(self.hashes[-1]) + 1)))
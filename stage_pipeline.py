@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Staged execution of jobs with bounded queues between stages.
+
+Each stage has its own worker threads and an input queue of limited size.
+A job is a dict passed through the stages in order; each stage function
+updates it in place. While one file is being profiled the next can download
+and the previous one can publish, so network, CPU and disk work overlap
+instead of every file going through all stages alone.
+
+The queues apply backpressure: a stage whose downstream queue is full waits
+before taking more work, and `submit` waits while the first queue is full,
+so the number of jobs in memory stays bounded.
+
+Every stage measures how its workers spent their time:
+- busy: running the stage function
+- blocked: waiting for room in the next stage's queue (a slower stage
+  follows; more workers there would help)
+- idle: waiting for work (the stage is faster than what feeds it)
+
+Utilization is the busy share of the workers' time; a stage near 100%
+is the bottleneck and the candidate for more workers.
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Jobs waiting in front of each stage
+DEFAULT_STAGE_QUEUE_SIZE = 1
+
+# Marks the end of the input for a stage's workers
+_STOP = object()
+
+Job = Dict[str, Any]
+
+
+class _Stage:
+    def __init__(self, name: str, function: Callable[[Job], None], workers: int, queue_size: int):
+        if workers < 1:
+            raise ValueError(f"Stage '{name}' needs at least one worker, got {workers}")
+        self.name = name
+        self.function = function
+        self.workers = workers
+        self.queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.threads: List[threading.Thread] = []
+        self.jobs = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.lock = threading.Lock()
+
+
+class StagePipeline:
+    """
+    Runs jobs through a sequence of stages, each with its own worker threads.
+
+    A job that raises in a stage skips the remaining stages. Whatever happens,
+    the job's `on_done(job, error)` callback is called exactly once, from a
+    worker thread, with the exception or None.
+    """
+
+    def __init__(self, stages: List[Tuple[str, Callable[[Job], None], int]],
+                 queue_size: int = DEFAULT_STAGE_QUEUE_SIZE, name: str = "pipeline"):
+        """
+        Args:
+            stages: (name, function, workers) for each stage, in order
+            queue_size: Jobs that may wait in front of each stage
+            name: Prefix of the worker thread names
+        """
+        self._stages = [_Stage(stage_name, function, workers, queue_size)
+                        for stage_name, function, workers in stages]
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        for index, stage in enumerate(self._stages):
+            for worker in range(stage.workers):
+                thread = threading.Thread(target=self._work, args=(index,),
+                                          name=f"{name}-{stage.name}-{worker}", daemon=True)
+                thread.start()
+                stage.threads.append(thread)
+
+    def submit(self, job: Job, on_done: Callable[[Job, Optional[BaseException]], None]):
+        """Queue a job for the first stage, waiting while that stage's queue is full."""
+        self._stages[0].queue.put((job, on_done))
+
+    def has_room(self) -> bool:
+        """Whether `submit` would return without waiting (with a single submitting thread)."""
+        return not self._stages[0].queue.full()
+
+    def close(self):
+        """Wait for all submitted jobs to finish and stop the workers."""
+        for stage in self._stages:
+            for _ in stage.threads:
+                stage.queue.put(_STOP)
+            for thread in stage.threads:
+                thread.join()
+        self.finished_at = time.time()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _work(self, index: int):
+        stage = self._stages[index]
+        next_stage = self._stages[index + 1] if index + 1 < len(self._stages) else None
+        while True:
+            item = stage.queue.get()
+            if item is _STOP:
+                return
+            job, on_done = item
+
+            started = time.time()
+            error = None
+            try:
+                stage.function(job)
+            except Exception as e:
+                error = e
+            finished = time.time()
+
+            if error is None and next_stage is not None:
+                next_stage.queue.put(item)
+                blocked = time.time() - finished
+            else:
+                blocked = 0.0
+
+            with stage.lock:
+                stage.jobs += 1
+                stage.failures += error is not None
+                stage.busy_seconds += finished - started
+                stage.blocked_seconds += blocked
+
+            if error is not None or next_stage is None:
+                try:
+                    on_done(job, error)
+                except Exception as e:
+                    print(f"Warning: Completion callback failed in stage '{stage.name}': {e}")
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Time accounting of each stage since the pipeline started.
+
+        Returns:
+            Per stage name: workers, jobs, failures, queued jobs, busy, blocked
+            and idle seconds (summed over workers), and utilization and
+            blocked shares of the workers' time
+        """
+        elapsed = max((self.finished_at or time.time()) - self.started_at, 1e-9)
+        metrics = {}
+        for stage in self._stages:
+            with stage.lock:
+                capacity = stage.workers * elapsed
+                busy, blocked = stage.busy_seconds, stage.blocked_seconds
+                metrics[stage.name] = {
+                    "workers": stage.workers,
+                    "jobs": stage.jobs,
+                    "failures": stage.failures,
+                    "queued": stage.queue.qsize(),
+                    "busy_seconds": round(busy, 3),
+                    "blocked_seconds": round(blocked, 3),
+                    "idle_seconds": round(max(0.0, capacity - busy - blocked), 3),
+                    "utilization": round(min(1.0, busy / capacity), 3),
+                    "blocked_share": round(min(1.0, blocked / capacity), 3)
+                }
+        return metrics
+
+
+def bottleneck(metrics: Dict[str, Dict[str, Any]]) -> Optional[str]:
+    """The stage with the highest utilization, or None if no stage ran a job."""
+    ran = {name: stage for name, stage in metrics.items() if stage["jobs"]}
+    if not ran:
+        return None
+    return max(ran, key=lambda name: ran[name]["utilization"])
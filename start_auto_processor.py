@@ -54,7 +54,7 @@ def main():
     config = get_config()
     
     print("🚀 Starting Auto Processor...")
-    print(f"📁 Monitoring folder: {os.getenv('MCP_SERVER_FOLDER_ID')}")
+    print(f"📁 Monitoring folder(s): {', '.join([os.getenv('MCP_SERVER_FOLDER_ID')] + config['extra_folder_ids'])}")
     print(f"⏱️  Check interval: {config['check_interval']} seconds")
     print(f"📋 Supported formats: {', '.join(config['supported_extensions'])}")
     print(f"🛑 Press Ctrl+C to stop\n")
@@ -63,7 +63,25 @@ def main():
         # Create and start the processor
         processor = AutoDatasetProcessor(
             check_interval=config['check_interval'],
-            processed_files_log=config['processed_files_log']
+            processed_files_log=config['processed_files_log'],
+            profile_mode=config['profile_mode'],
+            folder_profile_modes=config['folder_profile_modes'],
+            retry_failed_after=config['retry_failed_after'],
+            max_retry_attempts=config['max_retry_attempts'],
+            failed_files_log=config['failed_files_log'],
+            extra_folder_ids=config['extra_folder_ids'],
+            scheduling_policy=config['scheduling_policy'],
+            folder_priorities=config['folder_priorities'],
+            max_concurrent_files=config['max_concurrent_files'],
+            folder_max_concurrent=config['folder_max_concurrent'],
+            status_file=config['status_file'],
+            history_db=config['history_db'],
+            lease_store=config['lease_store'],
+            lease_backend=config['lease_backend'],
+            lease_ttl=config['lease_ttl'],
+            ready_immediately_max_bytes=config['ready_immediately_max_bytes'],
+            upload_stable_seconds=config['upload_stable_seconds'],
+            stage_workers=config['stage_workers']
         )
         
         # Run continuous monitoring
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Live status of the auto-processor, shared with the dashboard through a file.
+
+The auto-processor publishes a snapshot of its state (folder counts from its
+own Drive listing, queue, running files, failures, Drive API metrics) to
+STATUS_FILE every time something happens, together with a numbered log of
+the most recent events. Snapshots are written to a temporary file and
+renamed into place, so readers always see a complete one.
+
+The dashboard watches the file's modification time and only reads it when it
+has changed, then prints the events it has not seen yet. It makes no Drive
+calls and its cost does not grow with the processing history.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+STATUS_FILE = "processor_status.json"
+
+# The processor republishes at least this often while it is processing files
+STATUS_HEARTBEAT_SECONDS = 15
+
+# How often readers check the file for changes
+STATUS_POLL_SECONDS = 0.5
+
+# Events kept in the snapshot for readers that fall behind
+STATUS_EVENTS_KEPT = 100
+
+
+class StatusPublisher:
+    """Writes processor status snapshots with a sequence number and recent events."""
+
+    def __init__(self, path: str = STATUS_FILE, events_kept: int = STATUS_EVENTS_KEPT):
+        self.path = path
+        self.seq = 0
+        self.started_at = time.time()
+        self._events = deque(maxlen=events_kept)
+        self._lock = threading.Lock()
+
+    def publish(self, state: Dict[str, Any], event: Optional[str] = None, **details):
+        """
+        Write a snapshot of `state`, optionally recording an event first.
+
+        Args:
+            state: Current counters and lists (must be JSON-serializable)
+            event: Event kind, e.g. "processed" or "failed"
+            **details: Event details (file_id, filename, error, ...)
+        """
+        with self._lock:
+            self.seq += 1
+            now = time.time()
+            if event:
+                self._events.append({"seq": self.seq, "time": now, "event": event, **details})
+            snapshot = {
+                **state,
+                "seq": self.seq,
+                "pid": os.getpid(),
+                "started_at": self.started_at,
+                "updated_at": now,
+                "events": list(self._events)
+            }
+            try:
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(snapshot, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Warning: Could not publish processor status: {e}")
+
+
+def read_status(path: str = STATUS_FILE) -> Optional[Dict[str, Any]]:
+    """Read the latest status snapshot, or None if there is none."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_newer(snapshot: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> bool:
+    """True if `snapshot` was published after `previous` (or by a restarted processor)."""
+    if previous is None:
+        return True
+    if snapshot.get('started_at') != previous.get('started_at'):
+        return True
+    return snapshot['seq'] > previous['seq']
+
+
+def wait_for_status(path: str = STATUS_FILE, previous: Optional[Dict[str, Any]] = None,
+                    timeout: float = 10.0) -> Optional[Dict[str, Any]]:
+    """
+    Wait until a snapshot newer than `previous` is published.
+
+    Only the file's modification time is checked while waiting. Returns the
+    new snapshot, or None if nothing was published within `timeout` seconds.
+    """
+    deadline = time.time() + timeout
+    last_mtime = None
+    while True:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime != last_mtime:
+            last_mtime = mtime
+            snapshot = read_status(path)
+            if snapshot and is_newer(snapshot, previous):
+                return snapshot
+        if time.time() >= deadline:
+            return None
+        time.sleep(STATUS_POLL_SECONDS)
+
+
+def new_events(snapshot: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Events of a snapshot that were published after `previous`."""
+    last_seq = previous['seq'] if previous and previous.get('started_at') == snapshot.get('started_at') else 0
+    return [event for event in snapshot.get('events', []) if event['seq'] > last_seq]
+
+
+def is_stale(snapshot: Dict[str, Any], now: Optional[float] = None) -> bool:
+    """True if the processor that published the snapshot appears to have stopped."""
+    now = now or time.time()
+    if snapshot.get('stopped'):
+        return True
+    expected_by = max(snapshot.get('next_check_at') or 0, snapshot['updated_at'] + STATUS_HEARTBEAT_SECONDS)
+    return now > expected_by + STATUS_HEARTBEAT_SECONDS
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for the dataset catalog: column search and stale-entry pruning
+"""
+
+import shutil
+
+import pytest
+
+from catalog import DatasetCatalog
+
+
+def _metadata(columns):
+    return {"filename": "data.csv", "row_count": 100, "column_count": len(columns), "columns": columns}
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = DatasetCatalog(str(tmp_path))
+    for name, columns in {
+        "orders": [
+            {"name": "customerID", "data_type": "int64", "null_percentage": 0.0, "unique_count": 80},
+            {"name": "order_total", "data_type": "float64", "null_percentage": 12.5, "unique_count": 95},
+        ],
+        "customers": [
+            {"name": "customer_id", "data_type": "int32", "null_percentage": 8.0, "unique_count": 100},
+            {"name": "email", "data_type": "object", "null_percentage": 1.0, "unique_count": 99},
+        ],
+    }.items():
+        folder = tmp_path / name
+        folder.mkdir()
+        catalog.upsert(name, str(folder), _metadata(columns), file_id=f"file-{name}")
+    return catalog
+
+
+def test_search_columns_by_tokens_type_and_nulls(catalog):
+    matches = catalog.search_columns(query="customer id")
+    assert [(m["dataset_name"], m["name"]) for m in matches] == [("customers", "customer_id"), ("orders", "customerID")]
+
+    assert [m["name"] for m in catalog.search_columns(data_type="int")] == ["customer_id", "customerID"]
+    assert [m["name"] for m in catalog.search_columns(query="customer id", min_null_percentage=5)] == ["customer_id"]
+    assert catalog.search_columns(name="EMAIL")[0]["dataset_name"] == "customers"
+
+
+def test_listing_drops_datasets_whose_folder_is_gone(catalog, tmp_path):
+    shutil.rmtree(tmp_path / "orders")
+
+    assert [entry["dataset_name"] for entry in catalog.list()] == ["customers"]
+    assert catalog.count() == 1
+    assert [m["dataset_name"] for m in catalog.search_columns(query="customer id")] == ["customers"]
+    assert catalog.get("orders") is None
+    assert catalog.find_by_file_id("file-orders") is None
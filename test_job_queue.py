@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for job coalescing and crash recovery in the job queue
+"""
+
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pytest
+
+from job_queue import JobQueue
+
+
+@pytest.fixture
+def idle_queue(tmp_path, monkeypatch):
+    """A job queue whose workers never pick jobs up, so they stay queued."""
+    monkeypatch.setattr(JobQueue, "_run", lambda self, job_id: None)
+
+    def make():
+        return JobQueue(db_path=str(tmp_path / "jobs.db"), max_workers=1,
+                        output_folder=str(tmp_path / "datasets"))
+    return make
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def _mark_running(db_path: str, job_id: str, pid: int, heartbeat_at: float):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'running', owner_host = ?, owner_pid = ?, heartbeat_at = ? WHERE job_id = ?",
+            (socket.gethostname(), pid, heartbeat_at, job_id)
+        )
+
+
+def test_submit_coalesces_active_jobs(idle_queue):
+    queue = idle_queue()
+    first = queue.submit("file-1")
+    second = queue.submit("file-1")
+    other = queue.submit("file-2")
+
+    assert first["coalesced"] is False
+    assert second["coalesced"] is True
+    assert second["job_id"] == first["job_id"]
+    assert other["job_id"] != first["job_id"]
+
+    # A new queue on the same store (another process) sees the same job
+    assert idle_queue().submit("file-1")["job_id"] == first["job_id"]
+
+
+def test_cancelled_job_is_not_coalesced(idle_queue):
+    queue = idle_queue()
+    first = queue.submit("file-1")
+    queue.cancel(first["job_id"])
+
+    assert queue.submit("file-1")["job_id"] != first["job_id"]
+
+
+def test_recovery_requeues_only_orphaned_jobs(idle_queue):
+    queue = idle_queue()
+    orphan = queue.submit("file-1")["job_id"]
+    stale = queue.submit("file-2")["job_id"]
+    live = queue.submit("file-3")["job_id"]
+    _mark_running(queue.db_path, orphan, _dead_pid(), time.time())
+    _mark_running(queue.db_path, stale, 1, time.time() - 3600)
+    _mark_running(queue.db_path, live, os.getpid(), time.time())
+
+    restarted = idle_queue()
+
+    assert restarted.get(orphan)["status"] == "queued"
+    assert restarted.get(stale)["status"] == "queued"
+    assert restarted.get(live)["status"] == "running"
+    assert restarted.get(live)["owner_pid"] == os.getpid()
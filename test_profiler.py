@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests that parallel column profiling matches the serial profiler
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import profiler
+from profiler import profile_columns, profile_columns_parallel
+
+
+def _mixed_frame(rows: int = 500) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    strings = pd.Series(rng.choice(["alpha", "beta", "gamma", "a@b.com"], rows), dtype=object)
+    strings[::17] = None
+    strings[::23] = np.nan
+    return pd.DataFrame({
+        "ints": rng.integers(-50, 50, rows),
+        "floats": np.where(rng.random(rows) < 0.1, np.nan, rng.normal(size=rows)),
+        "all_null": np.full(rows, np.nan),
+        "flags": rng.random(rows) < 0.5,
+        "when": pd.date_range("2024-01-01", periods=rows, freq="h"),
+        "category": pd.Categorical(rng.choice(["x", "y", None], rows), categories=["x", "y", "z"]),
+        "strings": strings,
+        "typed_strings": strings.astype("string"),
+        "mixed": pd.Series([1, "one", 2.5, None] * (rows // 4), dtype=object),
+    })
+
+
+def _canonical(profiles):
+    # NaN != NaN, so compare the serialized form
+    return json.dumps(profiles, sort_keys=True, default=str)
+
+
+@pytest.mark.parametrize("use_arrow", [True, False])
+def test_parallel_profile_matches_serial(monkeypatch, use_arrow):
+    if use_arrow and not profiler.PYARROW_AVAILABLE:
+        pytest.skip("pyarrow is not installed")
+    monkeypatch.setattr(profiler, "PYARROW_AVAILABLE", use_arrow and profiler.PYARROW_AVAILABLE)
+    df = _mixed_frame()
+
+    assert _canonical(profile_columns_parallel(df, max_workers=2)) == _canonical(profile_columns(df))
+
+
+def test_shard_shares_categoricals_and_strings():
+    df = _mixed_frame()
+    shm, shard = profiler._build_shard(df, range(len(df.columns)))
+    try:
+        kinds = {name: kind for _, name, kind, *_ in shard["layout"]}
+        inline = [series.name for _, series in shard["inline"]]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    assert kinds["ints"] == "array"
+    assert kinds["category"] == "categorical"
+    assert "mixed" in inline
+    if profiler.PYARROW_AVAILABLE:
+        assert kinds["strings"] == kinds["typed_strings"] == "arrow"
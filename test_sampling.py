@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for sampled profiling: confidence intervals and all-null columns
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from sampling import extract_sampled_metadata, profile_sampled_column
+from utils import suggest_dq_rules
+
+
+def test_intervals_cover_the_population_values():
+    rng = np.random.default_rng(3)
+    population = pd.Series(np.where(rng.random(100_000) < 0.2, np.nan, rng.normal(10, 2, 100_000)), name="x")
+    sample = population.sample(5_000, random_state=1)
+
+    col = profile_sampled_column(sample, len(population))
+
+    low, high = col["null_percentage_ci"]
+    assert low <= population.isnull().mean() * 100 <= high
+    low, high = col["mean_value_ci"]
+    assert low <= population.mean() <= high
+    low, high = col["std_value_ci"]
+    assert 0 <= low <= population.std() <= high
+    assert {"null_count", "unique_count", "mean_value", "std_value"} <= set(col["estimated_fields"])
+
+
+def test_full_sample_has_no_uncertainty():
+    values = pd.Series([1.0, 2.0, 3.0, 4.0], name="x")
+
+    col = profile_sampled_column(values, len(values))
+
+    assert col["mean_value_ci"] == [2.5, 2.5]
+    assert col["null_percentage_ci"] == [0.0, 0.0]
+
+
+def test_all_null_numeric_column():
+    sample = pd.DataFrame({"empty": [np.nan] * 50, "value": np.arange(50.0)})
+
+    metadata = extract_sampled_metadata(sample, "data.csv", population_rows=1_000)
+    empty = metadata["columns"][0]
+
+    assert math.isnan(empty["min_value"]) and math.isnan(empty["max_value"])
+    assert empty["null_percentage"] == 100.0
+    rules = suggest_dq_rules(metadata)
+    assert not [rule for rule in rules if rule["column"] == "empty" and "range" in rule["rule_type"]]
+    assert [rule["rule_type"] for rule in rules if rule["column"] == "value"].count("range") == 1
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for lease claiming and fencing-token checks in both lease backends
+"""
+
+import time
+
+import pytest
+
+from work_leases import LEASE_BACKENDS, create_lease_store
+
+
+@pytest.fixture(params=sorted(LEASE_BACKENDS))
+def store(request, tmp_path):
+    location = tmp_path / ("leases.db" if request.param == "sqlite" else "leases")
+    return create_lease_store(request.param, str(location))
+
+
+def test_claim_is_exclusive_until_expiry(store):
+    assert store.claim("file-1", "a") == 1
+    assert store.claim("file-1", "b") is None
+    assert store.in_use("file-1")
+
+
+def test_stale_token_is_fenced_out(store):
+    old_token = store.claim("file-1", "a", ttl=0.01)
+    time.sleep(0.02)
+    new_token = store.claim("file-1", "b")
+
+    assert new_token == old_token + 1
+    # The first holder's lease expired and was taken over: all its writes are rejected
+    assert store.renew("file-1", "a", old_token) is False
+    assert store.complete("file-1", "a", old_token, {"status": "success"}) is False
+    store.release("file-1", "a", old_token)
+    assert store.lookup(["file-1"])["file-1"]["owner"] == "b"
+
+    # The same owner under an old token is fenced out too
+    assert store.complete("file-1", "b", old_token, {"status": "success"}) is False
+    assert store.complete("file-1", "b", new_token, {"status": "success"}) is True
+    assert store.claim("file-1", "c") is None
+
+
+def test_failure_history_carries_over_to_the_next_claim(store):
+    token = store.claim("file-1", "a")
+    store.release("file-1", "a", token, hold_until=time.time() - 1, failure={"attempts": 1})
+
+    assert store.claim("file-1", "b") == token + 1
+    assert store.lookup(["file-1"])["file-1"]["result"] == {"attempts": 1}
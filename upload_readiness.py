@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Detection of files whose upload to Drive has finished.
+
+Instead of waiting a fixed time after a file's creation, the auto-processor
+asks a ReadinessDetector whether each new file is ready. The detector
+remembers each file's signature (size, md5Checksum, modifiedTime) between
+Drive listings:
+- a small file with a checksum is ready as soon as it is seen: Drive only
+  reports md5Checksum for stored content, and a small upload has no
+  meaningful in-progress window
+- any other file (large, or without a checksum yet, such as a file a sync
+  client is still writing) is ready once its signature has been observed
+  unchanged for `stable_seconds`
+
+Files held back are re-listed sooner than the normal check interval, so a
+finished large upload waits about `stable_seconds`, not a whole cycle.
+"""
+
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Files up to this size with a checksum are processed as soon as they are seen
+READY_IMMEDIATELY_MAX_BYTES = 32 * 1024 * 1024
+
+# Other files must keep the same size, checksum and modifiedTime this long
+UPLOAD_STABLE_SECONDS = 10
+
+
+def upload_signature(file_info: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """What changes while a file is still being written."""
+    return (file_info.get('size'), file_info.get('md5Checksum'), file_info.get('modifiedTime'))
+
+
+class ReadinessDetector:
+    """Tracks the signature of not-yet-ready files across Drive listings."""
+
+    def __init__(self, ready_immediately_max_bytes: int = READY_IMMEDIATELY_MAX_BYTES,
+                 stable_seconds: float = UPLOAD_STABLE_SECONDS):
+        self.ready_immediately_max_bytes = ready_immediately_max_bytes
+        self.stable_seconds = stable_seconds
+        # file_id -> (signature, time the signature was first seen)
+        self._observations: Dict[str, Tuple[tuple, float]] = {}
+
+    def is_ready(self, file_info: Dict[str, Any], now: Optional[float] = None) -> bool:
+        """Record an observation of a file and tell whether its upload has finished."""
+        now = now or time.time()
+        signature = upload_signature(file_info)
+        size, md5, _ = signature
+
+        if md5 and size is not None and int(size) <= self.ready_immediately_max_bytes:
+            self._observations.pop(file_info['id'], None)
+            return True
+
+        previous = self._observations.get(file_info['id'])
+        if previous is None or previous[0] != signature:
+            # New file, or still changing: start the stability window again
+            self._observations[file_info['id']] = (signature, now)
+            return False
+        if now - previous[1] < self.stable_seconds:
+            return False
+        del self._observations[file_info['id']]
+        return True
+
+    def held(self) -> int:
+        """Files currently waiting for their signature to settle."""
+        return len(self._observations)
+
+    def recheck_after(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until the earliest held file could become ready, or None if none is held."""
+        if not self._observations:
+            return None
+        now = now or time.time()
+        earliest = min(first_seen for _, first_seen in self._observations.values())
+        return max(0.0, earliest + self.stable_seconds - now)
+
+    def retain(self, file_ids: Iterable[str]):
+        """Forget files that are no longer candidates (processed, deleted, ...)."""
+        keep = set(file_ids)
+        for file_id in list(self._observations):
+            if file_id not in keep:
+                del self._observations[file_id]
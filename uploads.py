@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Resumable, chunked uploads to Google Drive.
+
+Files are streamed from disk in fixed-size chunks using Drive's resumable
+upload protocol, so memory stays flat regardless of file size and a failed
+chunk is retried from where the upload left off instead of from byte 0.
+
+The session URI of every in-progress upload is saved to a small JSON file.
+If the process restarts while uploading, the next upload of the same file
+to the same folder asks Drive how much it already received and continues
+from there. Sessions are forgotten once the upload completes, when the
+local file changes, or after Drive's one-week session lifetime.
+"""
+
+import os
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload
+from drive_governor import get_drive_governor
+
+UPLOAD_SESSIONS_FILE = "upload_sessions.json"
+
+# Drive requires chunk sizes in multiples of 256 KB
+UPLOAD_CHUNK_BYTES = 32 * 256 * 1024
+
+# Drive keeps resumable sessions for a week; stop trusting them a little earlier
+SESSION_MAX_AGE_SECONDS = 6 * 24 * 3600
+
+
+class UploadSessionStore:
+    """Persists resumable upload session URIs keyed by local file and target folder."""
+
+    def __init__(self, path: str = UPLOAD_SESSIONS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load upload sessions: {e}")
+            return {}
+
+    def _save(self, sessions: Dict[str, Dict[str, Any]]):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(sessions, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def key(file_path: str, folder_id: str) -> str:
+        return f"{os.path.abspath(file_path)}|{folder_id}"
+
+    def get(self, file_path: str, folder_id: str) -> Optional[str]:
+        """Return a saved session URI if it is still valid for the file as it is on disk now."""
+        stat = os.stat(file_path)
+        with self._lock:
+            session = self._load().get(self.key(file_path, folder_id))
+        if not session:
+            return None
+        if (session["size"] != stat.st_size or session["mtime"] != stat.st_mtime
+                or time.time() - session["created_at"] > SESSION_MAX_AGE_SECONDS):
+            self.remove(file_path, folder_id)
+            return None
+        return session["resumable_uri"]
+
+    def put(self, file_path: str, folder_id: str, resumable_uri: str):
+        stat = os.stat(file_path)
+        with self._lock:
+            sessions = self._load()
+            sessions[self.key(file_path, folder_id)] = {
+                "resumable_uri": resumable_uri,
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "created_at": time.time()
+            }
+            self._save(sessions)
+
+    def remove(self, file_path: str, folder_id: str):
+        with self._lock:
+            sessions = self._load()
+            if sessions.pop(self.key(file_path, folder_id), None) is not None:
+                self._save(sessions)
+
+
+def _query_session(request, resumable_uri: str, total_bytes: int) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+    """
+    Ask Drive how much of an upload session it has received.
+
+    Sends the protocol's status query (an empty PUT with
+    `Content-Range: bytes */<size>`).
+
+    Returns:
+        (bytes received, None) for a session that can be continued,
+        (None, created file) if the upload had already completed, or
+        (None, None) if the session no longer exists
+    """
+    resp, content = request.http.request(resumable_uri, "PUT", headers={
+        "Content-Range": f"bytes */{total_bytes}",
+        "Content-Length": "0"
+    })
+    if resp.status in (200, 201):
+        return None, request.postproc(resp, content)
+    if resp.status in (404, 410):
+        return None, None
+    if resp.status != 308:
+        raise HttpError(resp, content, uri=resumable_uri)
+    # "Range: bytes=0-<last byte received>"; no Range header means nothing was received
+    received = resp.get("range")
+    return (int(received.split("-")[1]) + 1 if received else 0), None
+
+
+def resumable_upload_file(file_path: str, service, folder_id: str, mimetype: str,
+                          progress_callback: Optional[Callable[..., None]] = None,
+                          session_store: Optional[UploadSessionStore] = None,
+                          chunk_bytes: int = UPLOAD_CHUNK_BYTES) -> str:
+    """
+    Upload a local file to a Drive folder in resumable chunks.
+
+    Args:
+        file_path: Local file to upload; it is read one chunk at a time
+        service: Google Drive service
+        folder_id: Target folder ID
+        mimetype: MIME type of the file
+        progress_callback: Called as progress_callback(bytes_uploaded=..., total_bytes=...)
+            after each chunk
+        session_store: Where session URIs are persisted (default: upload_sessions.json)
+        chunk_bytes: Chunk size, a multiple of 256 KB
+
+    Returns:
+        The ID of the created Drive file
+    """
+    session_store = session_store or UploadSessionStore()
+    total_bytes = os.path.getsize(file_path)
+    media = MediaFileUpload(file_path, mimetype=mimetype, chunksize=chunk_bytes, resumable=True)
+    request = service.files().create(
+        body={'name': os.path.basename(file_path), 'parents': [folder_id]},
+        media_body=media,
+        fields='id'
+    )
+
+    saved_uri = session_store.get(file_path, folder_id)
+    response = None
+    if saved_uri:
+        received, response = get_drive_governor().call(lambda: _query_session(request, saved_uri, total_bytes))
+        if received is not None:
+            print(f"🔁 Resuming upload of {os.path.basename(file_path)} at byte {received:,}")
+            request.resumable_uri = saved_uri
+            request.resumable_progress = received
+        elif response is None:
+            # The saved session expired on Drive's side; start a new one
+            print(f"⚠️ Upload session expired, restarting upload of {os.path.basename(file_path)}")
+            saved_uri = None
+
+    persisted = {"uri": saved_uri}
+
+    def next_chunk():
+        try:
+            return request.next_chunk()
+        finally:
+            if request.resumable_uri and request.resumable_uri != persisted["uri"]:
+                session_store.put(file_path, folder_id, request.resumable_uri)
+                persisted["uri"] = request.resumable_uri
+
+    try:
+        while response is None:
+            status, response = get_drive_governor().call(next_chunk)
+            if progress_callback:
+                uploaded = status.resumable_progress if status else total_bytes
+                progress_callback(bytes_uploaded=uploaded, total_bytes=total_bytes)
+    finally:
+        media.stream().close()
+
+    session_store.remove(file_path, folder_id)
+    return response.get('id')
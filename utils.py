@@ -1,13 +1,20 @@
 import os
+import re
+import math
 import json
 import pandas as pd
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Callable, Iterable, Optional, Tuple
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload, MediaIoBaseDownload
 from io import BytesIO, StringIO
 import openpyxl
 from openpyxl import Workbook
+from artifact_format import column_quality, describe_dq_rule
+from drive_governor import get_drive_governor
+from drive_metadata import FILE_METADATA_FIELDS, get_metadata_cache
+from uploads import resumable_upload_file, UPLOAD_CHUNK_BYTES
+from profiler import profile_columns, profile_columns_parallel, parallel_worker_count, profile_chunks, VALUE_PATTERNS
 
 
 def get_drive_service():
@@ -23,95 +30,158 @@ def get_drive_service():
     return build('drive', 'v3', credentials=credentials)
 
 
-def download_file_from_drive(file_id: str, service) -> bytes:
-    """Download file content from Google Drive."""
+# Chunk size for downloads that report progress or go straight to disk
+DOWNLOAD_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+def download_file_from_drive(file_id: str, service,
+                             progress_callback: Optional[Callable[..., None]] = None) -> bytes:
+    """
+    Download file content from Google Drive.
+    
+    With a `progress_callback` the file is fetched in chunks and the callback
+    is called as `progress_callback(bytes_downloaded=..., total_bytes=...)`
+    after each one.
+    """
+    try:
+        request = service.files().get_media(fileId=file_id)
+        if progress_callback is None:
+            return get_drive_governor().execute(request)
+        
+        buffer = BytesIO()
+        downloader = MediaIoBaseDownload(buffer, request, chunksize=DOWNLOAD_CHUNK_BYTES)
+        done = False
+        while not done:
+            status, done = get_drive_governor().call(downloader.next_chunk)
+            if status:
+                progress_callback(bytes_downloaded=status.resumable_progress, total_bytes=status.total_size)
+        return buffer.getvalue()
+    except Exception as e:
+        raise Exception(f"Failed to download file: {str(e)}")
+
+
+def download_file_to_path(file_id: str, service, path: str,
+                          progress_callback: Optional[Callable[..., None]] = None) -> int:
+    """
+    Download a file from Google Drive straight to `path`, chunk by chunk.
+    
+    Only one chunk is in memory at a time. Returns the number of bytes
+    written; `progress_callback` is called as in download_file_from_drive.
+    """
     try:
         request = service.files().get_media(fileId=file_id)
-        file_content = request.execute()
-        return file_content
+        with open(path, 'wb') as f:
+            downloader = MediaIoBaseDownload(f, request, chunksize=DOWNLOAD_CHUNK_BYTES)
+            done = False
+            while not done:
+                status, done = get_drive_governor().call(downloader.next_chunk)
+                if status and progress_callback:
+                    progress_callback(bytes_downloaded=status.resumable_progress, total_bytes=status.total_size)
+            return f.tell()
     except Exception as e:
         raise Exception(f"Failed to download file: {str(e)}")
 
 
+def download_file_ranges(file_id: str, service, ranges: List[Tuple[int, int]],
+                         progress_callback: Optional[Callable[..., None]] = None) -> List[bytes]:
+    """Download inclusive byte ranges of a file from Google Drive."""
+    try:
+        blocks = []
+        total_bytes = sum(end - start + 1 for start, end in ranges)
+        for start, end in ranges:
+            request = service.files().get_media(fileId=file_id)
+            request.headers['Range'] = f'bytes={start}-{end}'
+            blocks.append(get_drive_governor().execute(request))
+            if progress_callback:
+                progress_callback(bytes_downloaded=sum(len(block) for block in blocks), total_bytes=total_bytes)
+        return blocks
+    except Exception as e:
+        raise Exception(f"Failed to download file ranges: {str(e)}")
+
+
+def _mimetype_for(filename: str) -> str:
+    """Determine MIME type based on file extension."""
+    if filename.endswith('.json'):
+        return 'application/json'
+    elif filename.endswith('.xlsx'):
+        return 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    elif filename.endswith('.html'):
+        return 'text/html'
+    return 'application/octet-stream'
+
+
 def upload_to_drive(content: bytes, filename: str, service, folder_id: str) -> str:
-    """Upload content to Google Drive folder."""
+    """Upload content to Google Drive folder (resumable, so failed chunks are retried in place)."""
     try:
-        # Determine MIME type based on file extension
-        if filename.endswith('.json'):
-            mimetype = 'application/json'
-        elif filename.endswith('.xlsx'):
-            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        elif filename.endswith('.html'):
-            mimetype = 'text/html'
-        else:
-            mimetype = 'application/octet-stream'
-            
-        media = MediaIoBaseUpload(BytesIO(content), mimetype=mimetype)
+        media = MediaIoBaseUpload(BytesIO(content), mimetype=_mimetype_for(filename),
+                                  chunksize=UPLOAD_CHUNK_BYTES, resumable=True)
         file_metadata = {
             'name': filename,
             'parents': [folder_id]
         }
         
-        file = service.files().create(
+        request = service.files().create(
             body=file_metadata,
             media_body=media,
             fields='id'
-        ).execute()
+        )
+        file = None
+        while file is None:
+            _, file = get_drive_governor().call(request.next_chunk)
         
         return file.get('id')
     except Exception as e:
         raise Exception(f"Failed to upload file: {str(e)}")
 
 
-def upload_to_drive_file(file_path: str, service, folder_id: str) -> str:
-    """Upload file from local path to Google Drive folder."""
+def upload_to_drive_file(file_path: str, service, folder_id: str,
+                         progress_callback: Optional[Callable[..., None]] = None) -> str:
+    """
+    Upload file from local path to Google Drive folder.
+    
+    The file is streamed from disk in resumable chunks and the upload session
+    is persisted, so an interrupted upload resumes after a restart (see
+    uploads.py). `progress_callback` receives bytes_uploaded and total_bytes.
+    """
     try:
-        filename = os.path.basename(file_path)
-        
-        # Read file content and upload as bytes
-        with open(file_path, 'rb') as f:
-            file_content = f.read()
-        
-        # Determine MIME type based on file extension
-        if filename.endswith('.xlsx'):
-            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        elif filename.endswith('.json'):
-            mimetype = 'application/json'
-        else:
-            mimetype = 'application/octet-stream'
-        
-        media = MediaIoBaseUpload(BytesIO(file_content), mimetype=mimetype)
-        file_metadata = {
-            'name': filename,
-            'parents': [folder_id]
-        }
-        
-        file = service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields='id'
-        ).execute()
-        
-        return file.get('id')
+        return resumable_upload_file(file_path, service, folder_id, _mimetype_for(file_path),
+                                     progress_callback=progress_callback)
     except Exception as e:
         raise Exception(f"Failed to upload file: {str(e)}")
 
 
 def list_files_in_folder(service, folder_id: str) -> List[Dict]:
-    """List all files in a Google Drive folder."""
+    """
+    List all files in a Google Drive folder.
+    
+    The listed metadata is cached, so processing a listed file does not
+    fetch it again (see drive_metadata.py).
+    """
     try:
-        results = service.files().list(
+        results = get_drive_governor().execute(service.files().list(
             q=f"'{folder_id}' in parents and trashed=false",
-            fields="files(id, name, mimeType, createdTime, modifiedTime, size)"
-        ).execute()
+            fields=f"files({FILE_METADATA_FIELDS})"
+        ))
         
-        return results.get('files', [])
+        files = results.get('files', [])
+        get_metadata_cache().remember(files)
+        return files
     except Exception as e:
         raise Exception(f"Failed to list files: {str(e)}")
 
 
-def extract_metadata_from_dataframe(df: pd.DataFrame, filename: str) -> Dict[str, Any]:
-    """Extract metadata from pandas DataFrame."""
+def extract_metadata_from_dataframe(df: pd.DataFrame, filename: str,
+                                    parallel: Optional[bool] = None,
+                                    max_workers: Optional[int] = None,
+                                    progress_callback: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+    """
+    Extract metadata from pandas DataFrame.
+
+    Wide frames are profiled across a process pool, sharded by column. By
+    default a heuristic decides when that pays off; pass `parallel=True` or
+    `parallel=False` to force either mode. Both produce identical output.
+    `progress_callback` receives `columns_profiled=..., total_columns=...` updates.
+    """
     metadata = {
         "filename": filename,
         "row_count": len(df),
@@ -120,29 +190,48 @@ def extract_metadata_from_dataframe(df: pd.DataFrame, filename: str) -> Dict[str
         "summary_stats": {}
     }
     
-    for col in df.columns:
-        col_info = {
-            "name": col,
-            "data_type": str(df[col].dtype),
-            "null_count": int(df[col].isnull().sum()),
-            "null_percentage": float(df[col].isnull().sum() / len(df) * 100),
-            "unique_count": int(df[col].nunique())
-        }
-        
-        # Add basic statistics for numeric columns
-        if df[col].dtype in ['int64', 'float64', 'int32', 'float32']:
-            col_info.update({
-                "min_value": float(df[col].min()) if not df[col].empty else None,
-                "max_value": float(df[col].max()) if not df[col].empty else None,
-                "mean_value": float(df[col].mean()) if not df[col].empty else None,
-                "std_value": float(df[col].std()) if not df[col].empty else None
-            })
-        
-        metadata["columns"].append(col_info)
+    workers = parallel_worker_count(df, max_workers) if parallel is not False else 1
+    if parallel and workers < 2:
+        workers = max(2, max_workers or os.cpu_count() or 2)
+    
+    if workers > 1:
+        metadata["columns"] = profile_columns_parallel(df, workers, progress_callback)
+    else:
+        metadata["columns"] = profile_columns(df, progress_callback)
+    
+    # Report the pre-optimization dtype when the frame came through optimized ingestion
+    original_dtypes = df.attrs.get("original_dtypes")
+    if original_dtypes:
+        for col_info in metadata["columns"]:
+            col_info["original_data_type"] = original_dtypes.get(col_info["name"], col_info["data_type"])
     
     return metadata
 
 
+def extract_metadata_from_chunks(chunks: Iterable[pd.DataFrame], filename: str,
+                                 original_dtypes: Optional[Dict[str, str]] = None,
+                                 progress_callback: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+    """
+    Extract metadata from a stream of DataFrame chunks in a single pass.
+    
+    Produces the same structure as `extract_metadata_from_dataframe` without
+    ever holding the full dataset in memory. See `profile_chunks` for the
+    progress events.
+    """
+    row_count, columns = profile_chunks(chunks, progress_callback)
+    if original_dtypes:
+        for col_info in columns:
+            col_info["original_data_type"] = original_dtypes.get(col_info["name"], col_info["data_type"])
+    
+    return {
+        "filename": filename,
+        "row_count": row_count,
+        "column_count": len(columns),
+        "columns": columns,
+        "summary_stats": {}
+    }
+
+
 def suggest_dq_rules(metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Suggest data quality rules based on metadata."""
     dq_rules = []
@@ -155,7 +244,6 @@ def suggest_dq_rules(metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
             dq_rules.append({
                 "column": col_name,
                 "rule_type": "not_null",
-                "description": f"Column '{col_name}' should not contain null values",
                 "severity": "error"
             })
         
@@ -164,22 +252,118 @@ def suggest_dq_rules(metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
             dq_rules.append({
                 "column": col_name,
                 "rule_type": "unique",
-                "description": f"Column '{col_name}' should contain unique values",
                 "severity": "warning"
             })
         
-        # Range validation for numeric columns
-        if "min_value" in col and "max_value" in col:
+        # Range validation for numeric columns (all-null columns have no bounds)
+        has_bounds = all(isinstance(col.get(key), (int, float)) and math.isfinite(col[key])
+                         for key in ("min_value", "max_value"))
+        if has_bounds:
             dq_rules.append({
                 "column": col_name,
                 "rule_type": "range",
-                "description": f"Column '{col_name}' values should be between {col['min_value']} and {col['max_value']}",
                 "min_value": col["min_value"],
                 "max_value": col["max_value"],
                 "severity": "warning"
             })
+        
+        # Typical range from the 1st-99th percentiles, when the extremes are outliers
+        quantiles = col.get("quantiles") or {}
+        if has_bounds and "p01" in quantiles and "p99" in quantiles and (
+                quantiles["p01"] > col["min_value"] or quantiles["p99"] < col["max_value"]):
+            dq_rules.append({
+                "column": col_name,
+                "rule_type": "expected_range",
+                "min_value": quantiles["p01"],
+                "max_value": quantiles["p99"],
+                "severity": "warning"
+            })
+        
+        # Range validation for datetime columns
+        if "min_datetime" in col and "max_datetime" in col:
+            dq_rules.append({
+                "column": col_name,
+                "rule_type": "datetime_range",
+                "min_value": col["min_datetime"],
+                "max_value": col["max_datetime"],
+                "severity": "warning"
+            })
     
-    return dq_rules
+        # Allowed values for low-cardinality columns whose full value set is known
+        allowed = _allowed_values(col, metadata["row_count"])
+        if allowed is not None:
+            dq_rules.append({
+                "column": col_name,
+                "rule_type": "allowed_values",
+                "allowed_values": allowed,
+                "severity": "warning"
+            })
+        
+        # Format rule when nearly all values share a known format or shape
+        pattern = _dominant_pattern(col, metadata["row_count"])
+        if pattern is not None:
+            pattern_name, regex = pattern
+            dq_rules.append({
+                "column": col_name,
+                "rule_type": "pattern",
+                "pattern_name": pattern_name,
+                "pattern": regex,
+                "severity": "warning"
+            })
+    
+    columns_by_name = {col["name"]: col for col in metadata["columns"]}
+    return [_with_description(rule, columns_by_name[rule["column"]]) for rule in dq_rules]
+
+
+def _with_description(rule: Dict[str, Any], col: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the rule with its description placed right after the rule type."""
+    described = {"column": rule["column"], "rule_type": rule["rule_type"], "description": describe_dq_rule(rule, col)}
+    described.update(rule)
+    return described
+
+
+# Allowed-value rules are only proposed for at most this many distinct values
+ENUM_MAX_VALUES = 20
+# Share of non-null values that must match a format for a pattern rule
+PATTERN_MIN_PERCENTAGE = 99.0
+
+
+def _allowed_values(col: Dict[str, Any], row_count: int) -> Optional[List[Any]]:
+    """Return the allowed value set for enum-like columns, or None."""
+    if not col.get("top_values_exact") or not col.get("top_values"):
+        return None
+    if col["unique_count"] > ENUM_MAX_VALUES or col["data_type"].startswith(("float", "datetime")):
+        return None
+    # Values must actually repeat, otherwise the column is an identifier
+    non_null = row_count - col["null_count"]
+    if non_null < 2 * col["unique_count"]:
+        return None
+    if len(col["top_values"]) < col["unique_count"]:
+        return None
+    return sorted((item["value"] for item in col["top_values"]), key=str)
+
+
+def _shape_regex(shape: str) -> str:
+    """Turn a value shape such as 'A_A|9' into a regular expression."""
+    tokens = {'A': '[A-Z]+', 'a': '[a-z]+', '9': r'\d+'}
+    return ''.join(tokens.get(ch, re.escape(ch)) for ch in shape)
+
+
+def _dominant_pattern(col: Dict[str, Any], row_count: int) -> Optional[Tuple[str, str]]:
+    """Return (format name, regex) if almost every value matches one format."""
+    for name, percentage in (col.get("patterns") or {}).items():
+        if percentage >= PATTERN_MIN_PERCENTAGE:
+            return name, VALUE_PATTERNS[name]
+    
+    # Only the top shapes are reported, so the share is taken of all non-null values
+    shapes = col.get("top_shapes") or []
+    non_null = row_count - col["null_count"]
+    if shapes and non_null > 0 and shapes[0]["count"] / non_null * 100 >= PATTERN_MIN_PERCENTAGE:
+        if col.get("top_values_exact") and col["unique_count"] <= ENUM_MAX_VALUES:
+            # An allowed-values rule already covers this column more precisely
+            return None
+        return f"shape '{shapes[0]['shape']}'", _shape_regex(shapes[0]["shape"])
+    return None
 
 
 def create_contract_excel(metadata: Dict[str, Any], dq_rules: List[Dict[str, Any]], output_path: str):
@@ -189,7 +373,7 @@ def create_contract_excel(metadata: Dict[str, Any], dq_rules: List[Dict[str, Any
     # Schema sheet
     ws_schema = wb.active
     ws_schema.title = "Schema"
-    ws_schema.append(["Column Name", "Data Type", "Null Count", "Null %", "Unique Count", "Min Value", "Max Value", "Mean", "Std Dev"])
+    ws_schema.append(["Column Name", "Data Type", "Null Count", "Null %", "Unique Count", "Min Value", "Max Value", "Mean", "Std Dev", "Original Data Type"])
     
     for col in metadata["columns"]:
         row = [
@@ -201,13 +385,14 @@ def create_contract_excel(metadata: Dict[str, Any], dq_rules: List[Dict[str, Any
             col.get("min_value", ""),
             col.get("max_value", ""),
             col.get("mean_value", ""),
-            col.get("std_value", "")
+            col.get("std_value", ""),
+            col.get("original_data_type", col["data_type"])
         ]
         ws_schema.append(row)
     
     # Data Quality Rules sheet
     ws_dq = wb.create_sheet("Data_Quality_Rules")
-    ws_dq.append(["Column", "Rule Type", "Description", "Severity", "Min Value", "Max Value"])
+    ws_dq.append(["Column", "Rule Type", "Description", "Severity", "Min Value", "Max Value", "Allowed Values", "Pattern"])
     
     for rule in dq_rules:
         row = [
@@ -216,7 +401,9 @@ def create_contract_excel(metadata: Dict[str, Any], dq_rules: List[Dict[str, Any
             rule["description"],
             rule["severity"],
             rule.get("min_value", ""),
-            rule.get("max_value", "")
+            rule.get("max_value", ""),
+            ", ".join(str(v) for v in rule["allowed_values"]) if "allowed_values" in rule else "",
+            rule.get("pattern", "")
         ]
         ws_dq.append(row)
     
@@ -249,13 +436,7 @@ def generate_dq_report(metadata: Dict[str, Any], dq_rules: List[Dict[str, Any]])
     }
     
     for col in metadata["columns"]:
-        col_quality = {
-            "column_name": col["name"],
-            "completeness": 100 - col["null_percentage"],
-            "uniqueness": (col["unique_count"] / metadata["row_count"]) * 100,
-            "data_type": col["data_type"]
-        }
-        report["column_quality"].append(col_quality)
+        report["column_quality"].append(column_quality(col, metadata["row_count"]))
     
     return report
 
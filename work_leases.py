@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Lease-based work claiming for running several auto-processor instances.
+
+Before processing a file an instance claims it in a shared lease store. A
+lease expires after `ttl` seconds unless the instance renews it; a
+background heartbeat does that while the file is processing, so the leases
+of an instance that dies are reclaimed by the others once they expire.
+
+Every claim increments the file's fencing token. A result is committed with
+`complete`, which only succeeds while the caller still holds the lease under
+the same token, so exactly one instance records each file as processed. An
+instance whose lease was taken over discards its result. Dataset artifacts
+are published atomically under the same name, so a rare duplicate run
+replaces the folder with an identical one.
+
+Failed files stay held by the instance that failed them until their retry is
+due (dead letters until they are requeued), so other instances do not retry
+them sooner. The failure history (attempts, next retry, last error) is kept
+in the lease's result and carried over to the next claim, so attempts keep
+counting whichever instance retries the file.
+
+Backends:
+- "sqlite": a SQLite database, which can live on a volume shared by all
+  instances (use a filesystem with working locks; not SQLite's WAL mode)
+- "file": a JSON file in a local directory, for tests and single-host setups
+
+Further backends implement `LeaseStore._transaction` and are registered in
+LEASE_BACKENDS.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing, contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+DEFAULT_LEASE_TTL_SECONDS = 120
+
+# Lease states: "leased" (being processed), "held" (failed, waiting for its
+# retry) and "done" (processed). The result of a done lease is the file's
+# processing result; that of a leased or held one is its failure history, if any
+LEASE_STATES = ("leased", "held", "done")
+
+# Hold a dead-lettered file until it is requeued
+HOLD_INDEFINITELY = float('inf')
+
+
+def default_owner_id() -> str:
+    """Identify this process among the instances sharing a store."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class LeaseStore:
+    """
+    Shared store of file leases.
+
+    Subclasses provide `_transaction`, a context manager yielding an object
+    with get(file_id), put(lease) and delete(file_id) that are applied
+    atomically with respect to other instances.
+    """
+
+    def _transaction(self) -> Iterator[Any]:
+        raise NotImplementedError
+
+    def claim(self, file_id: str, owner: str, ttl: float = DEFAULT_LEASE_TTL_SECONDS) -> Optional[int]:
+        """
+        Claim a file for processing.
+
+        Returns:
+            The fencing token of the new lease, or None if the file is
+            processed already or leased/held by someone and not expired
+        """
+        now = time.time()
+        with self._transaction() as tx:
+            lease = tx.get(file_id)
+            if lease and (lease["state"] == "done" or lease["expires_at"] > now):
+                return None
+            token = (lease["token"] if lease else 0) + 1
+            tx.put({"file_id": file_id, "owner": owner, "token": token, "state": "leased",
+                    "expires_at": now + ttl, "result": lease["result"] if lease else None, "updated_at": now})
+            return token
+
+    def renew(self, file_id: str, owner: str, token: int, ttl: float = DEFAULT_LEASE_TTL_SECONDS) -> bool:
+        """Extend a lease. Returns False if it is no longer held under `token`."""
+        now = time.time()
+        with self._transaction() as tx:
+            lease = tx.get(file_id)
+            if not self._holds(lease, owner, token):
+                return False
+            lease.update(expires_at=now + ttl, updated_at=now)
+            tx.put(lease)
+            return True
+
+    def release(self, file_id: str, owner: str, token: int, hold_until: Optional[float] = None,
+                failure: Optional[Dict[str, Any]] = None):
+        """
+        Give a lease up without a result.
+
+        Args:
+            hold_until: Keep other instances off the file until then (e.g. its
+                next retry); None frees it immediately
+            failure: Failure history to store with the held lease
+        """
+        with self._transaction() as tx:
+            lease = tx.get(file_id)
+            if not self._holds(lease, owner, token):
+                return
+            if hold_until is None:
+                tx.delete(file_id)
+            else:
+                lease.update(state="held", expires_at=hold_until, updated_at=time.time(),
+                             result=failure if failure is not None else lease["result"])
+                tx.put(lease)
+
+    def complete(self, file_id: str, owner: str, token: int, result: Dict[str, Any]) -> bool:
+        """
+        Record the result of a file. Succeeds for exactly one holder of the file.
+
+        Returns:
+            False if the lease expired and was taken over (the result is not stored)
+        """
+        with self._transaction() as tx:
+            lease = tx.get(file_id)
+            if not self._holds(lease, owner, token):
+                return False
+            lease.update(state="done", expires_at=HOLD_INDEFINITELY, result=result, updated_at=time.time())
+            tx.put(lease)
+            return True
+
+    def reset(self, file_id: str) -> bool:
+        """Free a held file whatever its holder (used to requeue it). Done files stay done."""
+        with self._transaction() as tx:
+            lease = tx.get(file_id)
+            if not lease or lease["state"] == "done":
+                return False
+            tx.delete(file_id)
+            return True
+
+    def in_use(self, file_id: str) -> bool:
+        """Whether some instance is processing a file under an unexpired lease."""
+        lease = self.lookup([file_id]).get(file_id)
+        return bool(lease) and lease["state"] == "leased" and lease["expires_at"] > time.time()
+
+    def lookup(self, file_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Current leases of the given files (files without one are omitted)."""
+        leases = {}
+        with self._transaction() as tx:
+            for file_id in file_ids:
+                lease = tx.get(file_id)
+                if lease:
+                    leases[file_id] = lease
+        return leases
+
+    @staticmethod
+    def _holds(lease: Optional[Dict[str, Any]], owner: str, token: int) -> bool:
+        return bool(lease) and lease["state"] == "leased" and lease["owner"] == owner and lease["token"] == token
+
+
+class _SQLiteTransaction:
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT * FROM leases WHERE file_id = ?", (file_id,)).fetchone()
+        if row is None:
+            return None
+        lease = dict(row)
+        lease["result"] = json.loads(lease["result"]) if lease["result"] else None
+        return lease
+
+    def put(self, lease: Dict[str, Any]):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO leases (file_id, owner, token, state, expires_at, result, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (lease["file_id"], lease["owner"], lease["token"], lease["state"], lease["expires_at"],
+             json.dumps(lease["result"]) if lease["result"] is not None else None, lease["updated_at"])
+        )
+
+    def delete(self, file_id: str):
+        self.conn.execute("DELETE FROM leases WHERE file_id = ?", (file_id,))
+
+
+class SQLiteLeaseStore(LeaseStore):
+    """Leases in a SQLite database; every operation is one IMMEDIATE transaction."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases (file_id TEXT PRIMARY KEY, owner TEXT NOT NULL, "
+                "token INTEGER NOT NULL, state TEXT NOT NULL, expires_at REAL NOT NULL, result TEXT, "
+                "updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode, so transactions are opened explicitly below
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[_SQLiteTransaction]:
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield _SQLiteTransaction(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+
+class _FileTransaction:
+    def __init__(self, leases: Dict[str, Dict[str, Any]]):
+        self.leases = leases
+
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        lease = self.leases.get(file_id)
+        return dict(lease) if lease else None
+
+    def put(self, lease: Dict[str, Any]):
+        self.leases[lease["file_id"]] = lease
+
+    def delete(self, file_id: str):
+        self.leases.pop(file_id, None)
+
+
+class FileLeaseStore(LeaseStore):
+    """
+    Leases in a JSON file guarded by a lock file, for tests and single-host setups.
+
+    The whole file is rewritten on every change, so it suits small
+    histories; use the SQLite backend for real deployments.
+    """
+
+    # A lock file older than this was left by a crashed process
+    STALE_LOCK_SECONDS = 30
+    LOCK_TIMEOUT_SECONDS = 30
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "leases.json")
+        self.lock_path = os.path.join(directory, "leases.lock")
+
+    def _acquire_lock(self) -> int:
+        deadline = time.time() + self.LOCK_TIMEOUT_SECONDS
+        while True:
+            try:
+                return os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.lock_path) > self.STALE_LOCK_SECONDS:
+                        os.remove(self.lock_path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.time() > deadline:
+                    raise TimeoutError(f"Timed out waiting for the lease lock {self.lock_path}")
+                time.sleep(0.01)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[_FileTransaction]:
+        fd = self._acquire_lock()
+        try:
+            leases = {}
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    leases = json.load(f)
+            tx = _FileTransaction(leases)
+            yield tx
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(tx.leases, f)
+            os.replace(tmp_path, self.path)
+        finally:
+            os.close(fd)
+            os.remove(self.lock_path)
+
+
+LEASE_BACKENDS = {
+    "sqlite": SQLiteLeaseStore,
+    "file": FileLeaseStore,
+}
+
+
+def create_lease_store(backend: str, location: str) -> LeaseStore:
+    """Open a lease store: a database path for "sqlite", a directory for "file"."""
+    if backend not in LEASE_BACKENDS:
+        raise ValueError(f"Invalid lease backend '{backend}'. Must be one of: {', '.join(LEASE_BACKENDS)}")
+    return LEASE_BACKENDS[backend](location)
+
+
+class LeaseKeeper:
+    """
+    The leases of one instance, renewed by a heartbeat thread.
+
+    A lease that cannot be renewed (the instance stalled past its TTL and
+    another one took the file over) is marked lost; `complete` then fails.
+    """
+
+    def __init__(self, store: LeaseStore, owner: Optional[str] = None,
+                 ttl: float = DEFAULT_LEASE_TTL_SECONDS):
+        self.store = store
+        self.owner = owner or default_owner_id()
+        self.ttl = ttl
+        self._tokens: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def claim(self, file_id: str) -> bool:
+        """Claim a file. Returns False if another instance has it or it is done."""
+        token = self.store.claim(file_id, self.owner, self.ttl)
+        if token is None:
+            return False
+        with self._lock:
+            self._tokens[file_id] = token
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._renew_forever, name="lease-heartbeat", daemon=True)
+                self._heartbeat.start()
+        return True
+
+    def complete(self, file_id: str, result: Dict[str, Any]) -> bool:
+        """Commit a file's result. Returns False if the lease was lost."""
+        with self._lock:
+            token = self._tokens.pop(file_id, None)
+        return token is not None and self.store.complete(file_id, self.owner, token, result)
+
+    def release(self, file_id: str, hold_until: Optional[float] = None,
+                failure: Optional[Dict[str, Any]] = None):
+        """Give up a file without a result, optionally holding it (with its failure history) until a time."""
+        with self._lock:
+            token = self._tokens.pop(file_id, None)
+        if token is not None:
+            self.store.release(file_id, self.owner, token, hold_until, failure)
+
+    def failure_history(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """The shared failure history of a file this instance holds, or None."""
+        with self._lock:
+            token = self._tokens.get(file_id)
+        lease = self.store.lookup([file_id]).get(file_id)
+        if token is None or not lease or lease["token"] != token:
+            return None
+        return lease["result"]
+
+    def held(self) -> int:
+        with self._lock:
+            return len(self._tokens)
+
+    def _renew_forever(self):
+        while True:
+            time.sleep(self.ttl / 3)
+            with self._lock:
+                tokens = dict(self._tokens)
+            for file_id, token in tokens.items():
+                try:
+                    renewed = self.store.renew(file_id, self.owner, token, self.ttl)
+                except Exception as e:
+                    # Try again on the next beat; the lease survives until its TTL
+                    print(f"Warning: Could not renew the lease on {file_id}: {e}")
+                    continue
+                if not renewed:
+                    with self._lock:
+                        if self._tokens.get(file_id) == token:
+                            del self._tokens[file_id]
+                    print(f"⚠️  Lost the lease on {file_id}; another instance has taken it over")